@@ -1,4 +1,28 @@
-from typing import List, Optional, Dict
+import hashlib
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+)
+
+import acumulados
+import bitacora
+import constructor_rutinas
+import eventos
+import reportes
+import validacion
 
 
 class Parametros:
@@ -7,11 +31,45 @@ class Parametros:
     SEC_POR_REP: int = 5
     DESCANSO_ENTRE_SERIES: int = 30
 
+    # Repeticiones y series están acotadas a 1..100, así que para cada par
+    # (sec_por_rep, descanso) solo hay 100 x 100 duraciones posibles.
+    # Se precalculan una vez por par; índice: repeticiones * 101 + series.
+    # Solo se retienen los pares más recientes (cada tabla ocupa ~300 KB);
+    # los ejercicios guardan la suya, así que desalojarla no los afecta.
+    TABLAS_EN_CACHE: int = 16
+
+    @staticmethod
+    @lru_cache(maxsize=TABLAS_EN_CACHE)
+    def tabla_duraciones(sec_por_rep: int, descanso_entre_series: int) -> List[float]:
+        tabla: List[float] = []
+        rep = 0
+        while rep <= 100:
+            ser = 0
+            while ser <= 100:
+                movimiento = rep * sec_por_rep * ser
+                descanso_series = ser - 1
+                if descanso_series < 0:
+                    descanso_series = 0
+                descanso = descanso_entre_series * descanso_series
+                tabla.append((movimiento + descanso) / 60.0)
+                ser += 1
+            rep += 1
+        return tabla
+
+
+class PerfilTiempos(NamedTuple):
+    """Política de tiempos del gimnasio; cada cambio es una versión nueva."""
+
+    version: int
+    sec_por_rep: int
+    descanso_entre_series: int
+
 
 class Utilidades:
     """Utilidades estáticas (sin funciones sueltas en módulo)."""
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def minutos_a_texto(mins: float) -> str:
         total = int(round(mins * 60))
         m = total // 60
@@ -22,8 +80,164 @@ class Utilidades:
     def normalizar(s: str) -> str:
         return s.strip().lower()
 
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def huella_campos(
+        nombre_norm: str, rep: int, ser: int, sec: int, descanso: int
+    ) -> int:
+        # Misma codificación que Gestion_funcional: las huellas coinciden.
+        datos = f"{nombre_norm}\x1f{rep}\x1f{ser}\x1f{sec}\x1f{descanso}".encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(datos, digest_size=8).digest(), "little")
+
+
+_LAPIDA = object()
+_MASCARA_HUELLA = 0xFFFFFFFFFFFFFFFF
+
+
+class ListaOrdenada:
+    """
+    Lista en orden de alta con borrado O(1): el elemento quitado deja una
+    lápida en su lugar (se ubica por identidad) y las lápidas se compactan
+    de una vez cuando superan a los vivos, así que el costo amortizado de
+    cada borrado sigue siendo O(1). Se recorre, mide e indexa como una lista;
+    el acceso por índice salta las lápidas desde el último acceso, así que
+    un recorrido `lista[i]` con i creciente no obliga a compactar.
+    """
+
+    COMPACTAR_DESDE = 64
+
+    def __init__(self, elementos: Iterable = ()):
+        self._items: List[object] = []
+        self._posicion: Dict[int, int] = {}
+        self._lapidas = 0
+        # (vivos hasta ahí - 1, posición real) del último acceso por índice.
+        self._cursor: Tuple[int, int] = (-1, -1)
+        # Mientras haya una transacción abierta no se compacta: así las
+        # posiciones anotadas para deshacer siguen valiendo.
+        self._congelada = 0
+        for x in elementos:
+            self.append(x)
+
+    def append(self, x) -> None:
+        self._posicion[id(x)] = len(self._items)
+        self._items.append(x)
+
+    def quitar(self, x) -> bool:
+        pos = self._posicion.pop(id(x), None)
+        if pos is None:
+            return False
+        self._items[pos] = _LAPIDA
+        self._lapidas += 1
+        if pos <= self._cursor[1]:
+            self._cursor = (-1, -1)
+        self._quiza_compactar()
+        return True
+
+    def _quiza_compactar(self) -> None:
+        if (
+            self._congelada == 0
+            and self._lapidas >= ListaOrdenada.COMPACTAR_DESDE
+            and self._lapidas * 2 > len(self._items)
+        ):
+            self.compactar()
+
+    # --------- Deshacer (transacciones) ---------
+    def congelar(self) -> None:
+        self._congelada += 1
+
+    def descongelar(self) -> None:
+        self._congelada -= 1
+        self._quiza_compactar()
+
+    def deshacer_alta(self, x) -> None:
+        """Revierte el último `append(x)` (se deshace en orden inverso)."""
+        del self._posicion[id(x)]
+        self._items.pop()
+
+    def reponer(self, x, pos: int) -> None:
+        """Revierte `quitar(x)`: vuelve a su posición, que no cambió al estar congelada."""
+        self._items[pos] = x
+        self._posicion[id(x)] = pos
+        self._lapidas -= 1
+        if pos <= self._cursor[1]:
+            self._cursor = (-1, -1)
+
+    def compactar(self) -> None:
+        vivos: List[object] = []
+        posicion: Dict[int, int] = {}
+        i = 0
+        while i < len(self._items):
+            x = self._items[i]
+            if x is not _LAPIDA:
+                posicion[id(x)] = len(vivos)
+                vivos.append(x)
+            i += 1
+        self._items = vivos
+        self._posicion = posicion
+        self._lapidas = 0
+        self._cursor = (-1, -1)
+
+    def copia(self) -> "ListaOrdenada":
+        return ListaOrdenada(self)
+
+    def posicion(self, x) -> int:
+        """Posición interna de `x`: sirve para ordenar por orden de alta."""
+        return self._posicion[id(x)]
+
+    def __getstate__(self) -> List[object]:
+        # Las posiciones van por id() y la lápida es un centinela de este
+        # proceso: se guardan solo los vivos y se reconstruye al cargar.
+        return list(self)
+
+    def __setstate__(self, estado: List[object]) -> None:
+        self.__init__(estado)
+
+    def __contains__(self, x) -> bool:
+        return id(x) in self._posicion
+
+    def __len__(self) -> int:
+        return len(self._items) - self._lapidas
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        if self._lapidas == 0:
+            return self._items[i]
+        n = len(self)
+        if i < 0:
+            i += n
+        if i < 0 or i >= n:
+            raise IndexError("índice fuera de rango")
+        # Se avanza desde el último acceso saltando lápidas: recorrer 0..n-1
+        # cuesta O(1) amortizado por paso.
+        vivo, real = self._cursor
+        if i < vivo:
+            vivo, real = -1, -1
+        items = self._items
+        while vivo < i:
+            real += 1
+            if items[real] is not _LAPIDA:
+                vivo += 1
+        self._cursor = (vivo, real)
+        return items[real]
+
+    def __iter__(self) -> Iterator:
+        # Se recorre la lista vigente al empezar; compactar crea otra.
+        items = self._items
+        i = 0
+        while i < len(items):
+            if items[i] is not _LAPIDA:
+                yield items[i]
+            i += 1
+
 
 class Ejercicio:
+    # Atributos que son cachés compartidas: una transacción no los copia.
+    _CACHES: Tuple[str, ...] = ("_tabla",)
+    # Sube cada vez que cambia algún ejercicio: las rutinas lo comparan para
+    # saber si su huella guardada sigue vigente.
+    generacion: int = 0
+
     def __init__(
         self,
         nombre: str,
@@ -37,97 +251,117 @@ class Ejercicio:
         self.series: int = int(series)
         self.sec_por_rep: int = int(sec_por_rep)
         self.descanso_entre_series: int = int(descanso_entre_series)
+        self._texto: Optional[str] = None
         self._validar()
+        self._tabla: List[float] = Parametros.tabla_duraciones(
+            self.sec_por_rep, self.descanso_entre_series
+        )
+
+    def __getstate__(self) -> Dict[str, object]:
+        # La tabla es compartida; al serializar basta con los tiempos.
+        estado = dict(vars(self))
+        estado.pop("_tabla", None)
+        return estado
+
+    def __setstate__(self, estado: Dict[str, object]) -> None:
+        vars(self).update(estado)
+        self._tabla = Parametros.tabla_duraciones(
+            self.sec_por_rep, self.descanso_entre_series
+        )
 
     def _validar(self) -> None:
-        if self.nombre == "":
-            raise ValueError("El nombre del ejercicio no puede estar vacío.")
-        if self.repeticiones <= 0:
-            raise ValueError("Las repeticiones deben ser mayores a 0.")
-        if self.repeticiones > 100:
-            raise ValueError("Las repeticiones no pueden ser mayores a 100.")
-        if self.series <= 0:
-            raise ValueError("Las series deben ser mayores a 0.")
-        if self.series > 100:
-            raise ValueError("Las series no pueden ser mayores a 100.")
-        if self.sec_por_rep <= 0:
-            raise ValueError("Los segundos por repetición deben ser mayores a 0.")
-        if self.descanso_entre_series < 0:
-            raise ValueError("El descanso entre series no puede ser negativo.")
+        validacion.EJERCICIO.validar(vars(self))
 
     def cambiar_nombre(self, nuevo_nombre: str) -> None:
         nuevo = nuevo_nombre.strip()
         if nuevo == "":
             raise ValueError("El nombre del ejercicio no puede quedar vacío.")
         self.nombre = nuevo
+        self._invalidar()
 
     def actualizar(
         self, repeticiones: Optional[int] = None, series: Optional[int] = None
     ) -> None:
+        cambios: Dict[str, int] = {}
+        if repeticiones is not None:
+            cambios["repeticiones"] = repeticiones
+        if series is not None:
+            cambios["series"] = series
+        validacion.EJERCICIO.validar(cambios, parcial=True)
         if repeticiones is not None:
-            if repeticiones <= 0:
-                raise ValueError("Las repeticiones deben ser mayores a 0.")
-            if repeticiones > 100:
-                raise ValueError("Las repeticiones no pueden ser mayores a 100.")
             self.repeticiones = int(repeticiones)
-
         if series is not None:
-            if series <= 0:
-                raise ValueError("Las series deben ser mayores a 0.")
-            if series > 100:
-                raise ValueError("Las series no pueden ser mayores a 100.")
             self.series = int(series)
+        self._invalidar()
+
+    def cambiar_tiempos(self, sec_por_rep: int, descanso_entre_series: int) -> None:
+        validacion.PERFIL.validar(
+            {"sec_por_rep": sec_por_rep, "descanso_entre_series": descanso_entre_series}
+        )
+        self.sec_por_rep = int(sec_por_rep)
+        self.descanso_entre_series = int(descanso_entre_series)
+        self._tabla = Parametros.tabla_duraciones(
+            self.sec_por_rep, self.descanso_entre_series
+        )
+        self._invalidar()
+
+    def _invalidar(self) -> None:
+        self._texto = None
+        Ejercicio.generacion += 1
 
     def duracion_minutos(self) -> float:
-        movimiento = self.repeticiones * self.sec_por_rep * self.series
-        descanso_series = self.series - 1
-        if descanso_series < 0:
-            descanso_series = 0
-        descanso = self.descanso_entre_series * descanso_series
-        return (movimiento + descanso) / 60.0
+        return self._tabla[self.repeticiones * 101 + self.series]
+
+    def huella(self) -> int:
+        return Utilidades.huella_campos(
+            Utilidades.normalizar(self.nombre),
+            self.repeticiones,
+            self.series,
+            self.sec_por_rep,
+            self.descanso_entre_series,
+        )
 
     def __str__(self) -> str:
-        return (
-            f"{self.nombre} | reps: {self.repeticiones} | series: {self.series} "
-            f"| estimado: {Utilidades.minutos_a_texto(self.duracion_minutos())}"
-        )
+        # Se guarda el texto ya formateado; cambiar_nombre/actualizar lo invalidan.
+        if self._texto is None:
+            self._texto = (
+                f"{self.nombre} | reps: {self.repeticiones} | series: {self.series} "
+                f"| estimado: {Utilidades.minutos_a_texto(self.duracion_minutos())}"
+            )
+        return self._texto
 
 
 class Rutina:
     def __init__(self, nombre: str, descripcion: str, ejercicios: List[Ejercicio]):
         self.nombre: str = nombre.strip()
         self.descripcion: str = descripcion.strip()
-        self.ejercicios: List[Ejercicio] = []
+        self.ejercicios: ListaOrdenada = ListaOrdenada()
         i = 0
         while i < len(ejercicios):
             self.ejercicios.append(ejercicios[i])
             i += 1
+        # Huella guardada y generación de ejercicios con la que se calculó.
+        self._huella: Optional[int] = None
+        self._huella_gen = -1
         self._validar()
 
+    def __setstate__(self, estado: Dict[str, object]) -> None:
+        # La generación es de este proceso: al cargar se recalcula.
+        vars(self).update(estado)
+        self._huella = None
+
     def _validar(self) -> None:
-        if self.nombre == "":
-            raise ValueError("El nombre de la rutina no puede estar vacío.")
-        if self.descripcion == "":
-            raise ValueError("La descripción de la rutina no puede estar vacía.")
-        if len(self.ejercicios) == 0:
-            raise ValueError("Una rutina debe tener al menos un ejercicio.")
+        validacion.RUTINA.validar(vars(self))
 
-        vistos: List[str] = []
+        vistos: Dict[str, bool] = {}
         i = 0
         while i < len(self.ejercicios):
             key = Utilidades.normalizar(self.ejercicios[i].nombre)
-            j = 0
-            repetido = False
-            while j < len(vistos):
-                if key == vistos[j]:
-                    repetido = True
-                    break
-                j += 1
-            if repetido:
+            if key in vistos:
                 raise ValueError(
                     "Hay ejercicios duplicados por nombre dentro de la rutina."
                 )
-            vistos.append(key)
+            vistos[key] = True
             i += 1
 
     def agregar_ejercicio(self, ejercicio: Ejercicio) -> None:
@@ -140,29 +374,33 @@ class Rutina:
                 )
             i += 1
         self.ejercicios.append(ejercicio)
+        self._sumar_huella(ejercicio.huella())
 
     def eliminar_ejercicio(self, nombre_ejercicio: str) -> None:
         key = Utilidades.normalizar(nombre_ejercicio)
-        nueva: List[Ejercicio] = []
-        encontrado = False
-
+        encontrado: Optional[Ejercicio] = None
         i = 0
         while i < len(self.ejercicios):
-            ej = self.ejercicios[i]
-            if Utilidades.normalizar(ej.nombre) == key:
-                encontrado = True
-            else:
-                nueva.append(ej)
+            if Utilidades.normalizar(self.ejercicios[i].nombre) == key:
+                encontrado = self.ejercicios[i]
+                break
             i += 1
-
-        if not encontrado:
+        if encontrado is None:
             raise ValueError("No se encontró el ejercicio para eliminar.")
-        if len(nueva) == 0:
+        self.quitar_ejercicio(encontrado)
+
+    def quitar_ejercicio(self, ej: Ejercicio) -> bool:
+        """Quita el objeto `ej` si está en la rutina (O(1)). Devuelve si lo quitó."""
+        if ej not in self.ejercicios:
+            return False
+        if len(self.ejercicios) == 1:
             raise ValueError(
                 "La rutina no puede quedarse vacía; agrega otro ejercicio o cancela la eliminación."
             )
-
-        self.ejercicios = nueva
+        quitado = self.ejercicios.quitar(ej)
+        if quitado:
+            self._sumar_huella(-ej.huella())
+        return quitado
 
     def actualizar_datos(
         self, nombre: Optional[str] = None, descripcion: Optional[str] = None
@@ -185,7 +423,13 @@ class Rutina:
         series: Optional[int] = None,
     ) -> None:
         ej = self._buscar(nombre_ejercicio)
+        vigente = self._huella_vigente()
+        antes = ej.huella()
         ej.actualizar(repeticiones, series)
+        if vigente:
+            # Los demás que comparten `ej` recalcularán (cambió la generación).
+            self._huella = (self._huella - antes + ej.huella()) & _MASCARA_HUELLA
+            self._huella_gen = Ejercicio.generacion
 
     def _buscar(self, nombre_ejercicio: str) -> Ejercicio:
         key = Utilidades.normalizar(nombre_ejercicio)
@@ -204,6 +448,30 @@ class Rutina:
             i += 1
         return total
 
+    def huella(self) -> int:
+        """
+        Huella del contenido (ejercicios, reps, series y tiempos), sin importar
+        nombre, descripción ni orden: dos rutinas equivalentes dan la misma.
+        """
+        if not self._huella_vigente():
+            total = 0
+            i = 0
+            while i < len(self.ejercicios):
+                total = (total + self.ejercicios[i].huella()) & _MASCARA_HUELLA
+                i += 1
+            self._huella = total
+            self._huella_gen = Ejercicio.generacion
+        return self._huella
+
+    def _huella_vigente(self) -> bool:
+        return self._huella is not None and self._huella_gen == Ejercicio.generacion
+
+    def _sumar_huella(self, delta: int) -> None:
+        # Altas y bajas suman o restan solo ese ejercicio; si la huella ya no
+        # estaba vigente, se recalculará entera al pedirla.
+        if self._huella_vigente():
+            self._huella = (self._huella + delta) & _MASCARA_HUELLA
+
     def __str__(self) -> str:
         return (
             f"Rutina: {self.nombre}\n"
@@ -221,12 +489,7 @@ class Usuario:
         self._validar()
 
     def _validar(self) -> None:
-        if self.nombre == "":
-            raise ValueError("El nombre del usuario no puede estar vacío.")
-        if self.edad < 16:
-            raise ValueError("La edad debe ser un número mayor o igual a 16 años.")
-        if self.edad > 100:
-            raise ValueError("La edad debe ser menor o igual a 100 años.")
+        validacion.USUARIO.validar(vars(self))
 
     def cambiar_nombre(self, nuevo_nombre: str) -> None:
         nuevo = nuevo_nombre.strip()
@@ -235,10 +498,7 @@ class Usuario:
         self.nombre = nuevo
 
     def cambiar_edad(self, nueva_edad: int) -> None:
-        if nueva_edad < 16:
-            raise ValueError("La edad debe ser un número mayor o igual a 16 años.")
-        if nueva_edad > 100:
-            raise ValueError("La edad debe ser menor o igual a 100 años.")
+        validacion.USUARIO.validar({"edad": nueva_edad}, parcial=True)
         self.edad = int(nueva_edad)
 
     def asignar_rutina(self, rutina: Rutina) -> None:
@@ -252,12 +512,250 @@ class Usuario:
             i += 1
         self.rutinas.append(rutina)
 
+    def quitar_rutina(self, rutina: Rutina) -> bool:
+        nuevas: List[Rutina] = []
+        i = 0
+        while i < len(self.rutinas):
+            if self.rutinas[i] is not rutina:
+                nuevas.append(self.rutinas[i])
+            i += 1
+        if len(nuevas) == len(self.rutinas):
+            return False
+        self.rutinas = nuevas
+        return True
+
     def __str__(self) -> str:
         return (
             f"Usuario: {self.nombre} | Edad: {self.edad} | Rutinas: {len(self.rutinas)}"
         )
 
 
+class ResumenUsuario(NamedTuple):
+    nombre: str
+    edad: int
+    rutinas: Tuple[Tuple[str, float], ...]  # (nombre de rutina, minutos)
+    total_min: float
+
+
+class ResumenesUsuarios:
+    """
+    Resumen materializado por usuario (rutinas con su duración y total),
+    mantenido con los eventos del sistema. Cada cambio recalcula solo las
+    rutinas y usuarios afectados, gracias a índices inversos por identidad
+    (ejercicio -> rutinas -> usuarios), así que los renombres no los afectan.
+    Si el sistema cambió por otra vía (versión distinta), se reconstruye.
+    """
+
+    def __init__(self, sistema: "SistemaGestion"):
+        self._sistema = sistema
+        self._resumen: Dict[int, ResumenUsuario] = {}
+        self._total_rutina: Dict[int, float] = {}
+        self._ejercicios_de: Dict[int, List[int]] = {}
+        self._rutinas_de: Dict[int, Set[int]] = {}
+        self._usuarios_de: Dict[int, Set[int]] = {}
+        self._rutinas: Dict[int, Rutina] = {}
+        self._usuarios: Dict[int, Usuario] = {}
+        # Nombre normalizado -> id, para ubicar lo que ya no está en el sistema.
+        self._id_rutina: Dict[str, int] = {}
+        self._id_usuario: Dict[str, int] = {}
+        self._version = sistema.version
+        sistema.eventos.suscribir(self._al_cambiar, por_lotes=True)
+
+    # --------- Consultas ---------
+    def _al_dia(self) -> None:
+        if self._version != self._sistema.version:
+            self.reconstruir()
+
+    def de(self, u: Usuario) -> ResumenUsuario:
+        self._al_dia()
+        return self._resumen[id(u)]
+
+    def rutinas_con(self, ej: Ejercicio) -> List[Rutina]:
+        """Rutinas que contienen el objeto `ej`, según el índice inverso."""
+        self._al_dia()
+        res: List[Rutina] = []
+        for id_r in self._rutinas_de.get(id(ej), ()):
+            res.append(self._rutinas[id_r])
+        return res
+
+    def usuarios_con(self, r: Rutina) -> List[Usuario]:
+        """Usuarios que tienen asignada la rutina `r`."""
+        self._al_dia()
+        res: List[Usuario] = []
+        for id_u in self._usuarios_de.get(id(r), ()):
+            res.append(self._usuarios[id_u])
+        return res
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Los índices van por id(): en una copia no sirven, se reconstruyen.
+        return {"_sistema": self._sistema}
+
+    def __setstate__(self, estado: Dict[str, object]) -> None:
+        self._sistema = estado["_sistema"]
+        self._version = -1
+
+    def buscar(self, nombre_usuario: str) -> Optional[ResumenUsuario]:
+        u = self._sistema._buscar_usuario(nombre_usuario)
+        return None if u is None else self.de(u)
+
+    # --------- Mantenimiento ---------
+    def reconstruir(self) -> None:
+        self._resumen = {}
+        self._total_rutina = {}
+        self._ejercicios_de = {}
+        self._rutinas_de = {}
+        self._usuarios_de = {}
+        self._rutinas = {}
+        self._usuarios = {}
+        self._id_rutina = {}
+        self._id_usuario = {}
+        i = 0
+        while i < len(self._sistema.rutinas):
+            self._indexar_rutina(self._sistema.rutinas[i])
+            i += 1
+        i = 0
+        while i < len(self._sistema.usuarios):
+            u = self._sistema.usuarios[i]
+            j = 0
+            while j < len(u.rutinas):
+                self._vincular(u, u.rutinas[j])
+                j += 1
+            self._refrescar_usuario(u)
+            i += 1
+        self._version = self._sistema.version
+
+    def _indexar_rutina(self, r: Rutina) -> None:
+        self._desindexar_rutina(r)
+        ids: List[int] = []
+        total = 0.0
+        k = 0
+        while k < len(r.ejercicios):
+            ej = r.ejercicios[k]
+            ids.append(id(ej))
+            if id(ej) not in self._rutinas_de:
+                self._rutinas_de[id(ej)] = set()
+            self._rutinas_de[id(ej)].add(id(r))
+            total += ej.duracion_minutos()
+            k += 1
+        self._rutinas[id(r)] = r
+        self._id_rutina[Utilidades.normalizar(r.nombre)] = id(r)
+        self._ejercicios_de[id(r)] = ids
+        self._total_rutina[id(r)] = total
+
+    def _desindexar_rutina(self, r: Rutina) -> None:
+        ids = self._ejercicios_de.pop(id(r), [])
+        k = 0
+        while k < len(ids):
+            rutinas = self._rutinas_de.get(ids[k])
+            if rutinas is not None:
+                rutinas.discard(id(r))
+                if len(rutinas) == 0:
+                    del self._rutinas_de[ids[k]]
+            k += 1
+
+    def _recalcular_rutina(self, r: Rutina) -> None:
+        """Reindexa r y refresca a los usuarios que la tienen."""
+        self._indexar_rutina(r)
+        for id_u in self._usuarios_de.get(id(r), ()):
+            self._refrescar_usuario(self._usuarios[id_u])
+
+    def _vincular(self, u: Usuario, r: Rutina) -> None:
+        if id(r) not in self._usuarios_de:
+            self._usuarios_de[id(r)] = set()
+        self._usuarios_de[id(r)].add(id(u))
+        self._usuarios[id(u)] = u
+
+    def _refrescar_usuario(self, u: Usuario) -> None:
+        rutinas: List[Tuple[str, float]] = []
+        total = 0.0
+        j = 0
+        while j < len(u.rutinas):
+            r = u.rutinas[j]
+            mins = self._total_rutina[id(r)]
+            rutinas.append((r.nombre, mins))
+            total += mins
+            j += 1
+        self._usuarios[id(u)] = u
+        self._id_usuario[Utilidades.normalizar(u.nombre)] = id(u)
+        self._resumen[id(u)] = ResumenUsuario(u.nombre, u.edad, tuple(rutinas), total)
+
+    def _al_cambiar(self, lote: List["eventos.Evento"]) -> None:
+        # Un lote (transacción) se aplica de una vez: lo más simple y seguro
+        # es reconstruir; los cambios sueltos se aplican incrementalmente.
+        if len(lote) != 1 or self._version != self._sistema.version - 1:
+            self.reconstruir()
+            return
+        try:
+            self._aplicar(lote[0])
+        except (KeyError, AttributeError, ValueError):
+            self.reconstruir()
+            return
+        self._version = self._sistema.version
+
+    def _aplicar(self, evento: "eventos.Evento") -> None:
+        s = self._sistema
+        d = evento.datos
+        tipo = evento.tipo
+        if tipo in (
+            eventos.USUARIO_AGREGADO,
+            eventos.USUARIO_RENOMBRADO,
+            eventos.USUARIO_EDAD_CAMBIADA,
+        ):
+            if tipo == eventos.USUARIO_RENOMBRADO:
+                del self._id_usuario[Utilidades.normalizar(d["nombre"])]
+            nombre = d.get("nuevo_nombre") or d["nombre"]
+            self._refrescar_usuario(s._buscar_usuario(nombre))
+        elif tipo == eventos.USUARIO_ELIMINADO:
+            id_u = self._id_usuario.pop(Utilidades.normalizar(d["nombre"]))
+            u = self._usuarios.pop(id_u)
+            del self._resumen[id_u]
+            j = 0
+            while j < len(u.rutinas):
+                self._usuarios_de[id(u.rutinas[j])].discard(id_u)
+                j += 1
+        elif tipo == eventos.RUTINA_ASIGNADA:
+            u = s._buscar_usuario(d["usuario"])
+            self._vincular(u, s._buscar_rutina(d["rutina"]))
+            self._refrescar_usuario(u)
+        elif tipo == eventos.RUTINA_CREADA:
+            self._indexar_rutina(s._buscar_rutina(d["nombre"]))
+        elif tipo == eventos.RUTINA_EDITADA:
+            del self._id_rutina[Utilidades.normalizar(d["nombre"])]
+            self._recalcular_rutina(s._buscar_rutina(d["nuevo_nombre"] or d["nombre"]))
+        elif tipo == eventos.RUTINA_ELIMINADA:
+            id_r = self._id_rutina.pop(Utilidades.normalizar(d["nombre"]))
+            self._desindexar_rutina(self._rutinas.pop(id_r))
+            del self._total_rutina[id_r]
+            for id_u in self._usuarios_de.pop(id_r, ()):
+                self._refrescar_usuario(self._usuarios[id_u])
+        elif tipo in (
+            eventos.RUTINA_EJERCICIO_AGREGADO,
+            eventos.RUTINA_EJERCICIO_ELIMINADO,
+        ):
+            self._recalcular_rutina(s._buscar_rutina(d["rutina"]))
+        elif tipo == eventos.RUTINA_EJERCICIO_ACTUALIZADO:
+            # El ejercicio puede estar compartido con otras rutinas.
+            ej = s._buscar_rutina(d["rutina"])._buscar(d["ejercicio"])
+            self._recalcular_ejercicio(ej)
+        elif tipo == eventos.EJERCICIO_ACTUALIZADO:
+            self._recalcular_ejercicio(s._buscar_ejercicio_catalogo(d["nombre"]))
+        elif tipo == eventos.EJERCICIO_ELIMINADO:
+            nombres = d["rutinas"]
+            i = 0
+            while i < len(nombres):
+                self._recalcular_rutina(s._buscar_rutina(nombres[i]))
+                i += 1
+        elif tipo == eventos.PERFIL_TIEMPOS_CAMBIADO:
+            # Cambian las duraciones de casi todo: se recalcula en una pasada.
+            self.reconstruir()
+        elif tipo not in (eventos.EJERCICIO_CREADO, eventos.EJERCICIO_RENOMBRADO):
+            raise KeyError(tipo)
+
+    def _recalcular_ejercicio(self, ej: Ejercicio) -> None:
+        for id_r in list(self._rutinas_de.get(id(ej), ())):
+            self._recalcular_rutina(self._rutinas[id_r])
+
+
 class SistemaGestion:
     """
     Implementación 100% POO sin atajos “pythonicos”.
@@ -266,14 +764,47 @@ class SistemaGestion:
     """
 
     def __init__(self):
-        self.usuarios: List[Usuario] = []
-        self.ejercicios_catalogo: List[Ejercicio] = []
-        self.rutinas: List[Rutina] = []
+        # Orden de alta con borrado O(1) (ver ListaOrdenada).
+        self.usuarios: ListaOrdenada = ListaOrdenada()
+        self.ejercicios_catalogo: ListaOrdenada = ListaOrdenada()
+        self.rutinas: ListaOrdenada = ListaOrdenada()
 
         self.idx_usuarios: Dict[str, Usuario] = {}
         self.idx_ejercicios: Dict[str, Ejercicio] = {}
         self.idx_rutinas: Dict[str, Rutina] = {}
 
+        # Se incrementa con cada modificación; sirve para invalidar cachés.
+        self.version: int = 0
+        # Registro para deshacer de la transacción en curso (None si no hay)
+        # y objetos cuyo estado ya se guardó en ella.
+        self._deshacer: Optional[List[Callable[[], None]]] = None
+        self._anotados: Set[int] = set()
+        # Suscriptores que quieren enterarse de cada cambio.
+        self.eventos = eventos.BusEventos()
+        self.resumenes = ResumenesUsuarios(self)
+        # Tiempos con los que se crean los ejercicios nuevos.
+        self.perfil_tiempos = PerfilTiempos(
+            0, Parametros.SEC_POR_REP, Parametros.DESCANSO_ENTRE_SERIES
+        )
+        # Catálogo agrupado por duración para construir rutinas (por versión).
+        self._constructor: Optional[constructor_rutinas.ConstructorRutinas] = None
+        self._version_constructor = -1
+        # Sesiones realizadas; en memoria salvo que se adjunte una en disco.
+        self.bitacora = bitacora.BitacoraSesiones()
+        # Solo llegan eventos confirmados: una transacción revertida no
+        # renombra nada en la bitácora.
+        self._dejar_bitacora = self.bitacora.seguir(self.eventos)
+        # Volumen por día/semana/mes, alimentado por la bitácora.
+        self.acumulados = acumulados.Acumulados()
+        self._dejar_acumulados = self.acumulados.seguir(
+            self.eventos, self.bitacora.eventos
+        )
+
+    def _marcar_cambio(self, tipo: Optional[str] = None, **datos) -> None:
+        self.version += 1
+        if tipo is not None:
+            self.eventos.emitir(tipo, **datos)
+
     # --------- Helpers I/O ---------
     @staticmethod
     def _input_no_vacio(msg: str) -> str:
@@ -309,8 +840,48 @@ class SistemaGestion:
         if key in self.idx_usuarios:
             raise ValueError("Ya existe un usuario con ese nombre.")
         u = Usuario(nombre, edad)
+        self._anotar_clave(self.idx_usuarios, key)
+        self._anotar_alta(self.usuarios, u)
         self.idx_usuarios[key] = u
         self.usuarios.append(u)
+        self._marcar_cambio(eventos.USUARIO_AGREGADO, nombre=u.nombre, edad=u.edad)
+
+    def renombrar_usuario(self, nombre: str, nuevo_nombre: str) -> None:
+        u = self._buscar_usuario(nombre)
+        if u is None:
+            raise ValueError("Usuario no encontrado.")
+        old_key = Utilidades.normalizar(u.nombre)
+        new_key = Utilidades.normalizar(nuevo_nombre)
+        if (new_key != old_key) and (new_key in self.idx_usuarios):
+            raise ValueError("Ya existe un usuario con ese nombre.")
+        anterior = u.nombre
+        self._anotar(u)
+        self._anotar_clave(self.idx_usuarios, old_key)
+        self._anotar_clave(self.idx_usuarios, new_key)
+        u.cambiar_nombre(nuevo_nombre)
+        self.idx_usuarios.pop(old_key, None)
+        self.idx_usuarios[new_key] = u
+        self._marcar_cambio(
+            eventos.USUARIO_RENOMBRADO, nombre=anterior, nuevo_nombre=u.nombre
+        )
+
+    def cambiar_edad_usuario(self, nombre: str, nueva_edad: int) -> None:
+        u = self._buscar_usuario(nombre)
+        if u is None:
+            raise ValueError("Usuario no encontrado.")
+        self._anotar(u)
+        u.cambiar_edad(nueva_edad)
+        self._marcar_cambio(eventos.USUARIO_EDAD_CAMBIADA, nombre=u.nombre, edad=u.edad)
+
+    def eliminar_usuario(self, nombre: str) -> None:
+        key = Utilidades.normalizar(nombre)
+        self._anotar_clave(self.idx_usuarios, key)
+        u = self.idx_usuarios.pop(key, None)
+        if u is None:
+            raise ValueError("Usuario no encontrado.")
+        self._anotar_baja(self.usuarios, u)
+        self.usuarios.quitar(u)
+        self._marcar_cambio(eventos.USUARIO_ELIMINADO, nombre=u.nombre)
 
     def listar_usuarios(self) -> None:
         if len(self.usuarios) == 0:
@@ -326,19 +897,15 @@ class SistemaGestion:
         if u is None:
             print("Usuario no encontrado.")
             return
-        if len(u.rutinas) == 0:
+        resumen = self.resumenes.de(u)
+        if len(resumen.rutinas) == 0:
             print(f"{u.nombre} no tiene rutinas asignadas.")
             return
         print(f"Rutinas de {u.nombre}:")
         i = 0
-        while i < len(u.rutinas):
-            r = u.rutinas[i]
-            print(
-                "  - "
-                + r.nombre
-                + ": "
-                + Utilidades.minutos_a_texto(r.duracion_total_min())
-            )
+        while i < len(resumen.rutinas):
+            nombre_rutina, mins = resumen.rutinas[i]
+            print("  - " + nombre_rutina + ": " + Utilidades.minutos_a_texto(mins))
             i += 1
 
     # -------- Ejercicios (catálogo) --------
@@ -349,9 +916,23 @@ class SistemaGestion:
         key = Utilidades.normalizar(nombre)
         if key in self.idx_ejercicios:
             raise ValueError("Ya existe un ejercicio en el catálogo con ese nombre.")
-        ej = Ejercicio(nombre, repeticiones, series)
+        ej = Ejercicio(
+            nombre,
+            repeticiones,
+            series,
+            self.perfil_tiempos.sec_por_rep,
+            self.perfil_tiempos.descanso_entre_series,
+        )
+        self._anotar_clave(self.idx_ejercicios, key)
+        self._anotar_alta(self.ejercicios_catalogo, ej)
         self.idx_ejercicios[key] = ej
         self.ejercicios_catalogo.append(ej)
+        self._marcar_cambio(
+            eventos.EJERCICIO_CREADO,
+            nombre=ej.nombre,
+            repeticiones=ej.repeticiones,
+            series=ej.series,
+        )
         print(
             "Ejercicio creado. Duración estimada: "
             + Utilidades.minutos_a_texto(ej.duracion_minutos())
@@ -368,25 +949,128 @@ class SistemaGestion:
 
     def eliminar_ejercicio(self, nombre: str) -> None:
         key = Utilidades.normalizar(nombre)
+        self._anotar_clave(self.idx_ejercicios, key)
         ej = self.idx_ejercicios.pop(key, None)
         if ej is None:
             raise ValueError("No se encontró el ejercicio para eliminar.")
-
-        nueva: List[Ejercicio] = []
+        # Cascada: solo las rutinas que lo contienen (índice inverso de los
+        # resúmenes), en orden de alta. Las que se quedarían vacías conservan
+        # el ejercicio, como antes.
+        rutinas = self.resumenes.rutinas_con(ej)
+        rutinas.sort(key=self.rutinas.posicion)
+        self._anotar_baja(self.ejercicios_catalogo, ej)
+        self.ejercicios_catalogo.quitar(ej)
+
+        afectadas: List[str] = []
         i = 0
-        while i < len(self.ejercicios_catalogo):
-            if self.ejercicios_catalogo[i] is not ej:
-                nueva.append(self.ejercicios_catalogo[i])
+        while i < len(rutinas):
+            r = rutinas[i]
+            self._anotar(r)
+            try:
+                if r.quitar_ejercicio(ej):
+                    afectadas.append(r.nombre)
+            except ValueError:
+                pass
             i += 1
-        self.ejercicios_catalogo = nueva
+        self._marcar_cambio(eventos.EJERCICIO_ELIMINADO, nombre=ej.nombre, rutinas=afectadas)
 
+    def renombrar_ejercicio(self, nombre: str, nuevo_nombre: str) -> None:
+        ej = self._buscar_ejercicio_catalogo(nombre)
+        if ej is None:
+            raise ValueError("Ese ejercicio no existe en el catálogo.")
+        old_key = Utilidades.normalizar(ej.nombre)
+        new_key = Utilidades.normalizar(nuevo_nombre)
+        if (new_key != old_key) and (new_key in self.idx_ejercicios):
+            raise ValueError("Ya existe un ejercicio en el catálogo con ese nombre.")
+        anterior = ej.nombre
+        self._anotar(ej)
+        self._anotar_clave(self.idx_ejercicios, old_key)
+        self._anotar_clave(self.idx_ejercicios, new_key)
+        ej.cambiar_nombre(nuevo_nombre)
+        self.idx_ejercicios.pop(old_key, None)
+        self.idx_ejercicios[new_key] = ej
+        self._marcar_cambio(
+            eventos.EJERCICIO_RENOMBRADO, nombre=anterior, nuevo_nombre=ej.nombre
+        )
+
+    def actualizar_ejercicio(
+        self,
+        nombre: str,
+        repeticiones: Optional[int] = None,
+        series: Optional[int] = None,
+    ) -> None:
+        ej = self._buscar_ejercicio_catalogo(nombre)
+        if ej is None:
+            raise ValueError("Ese ejercicio no existe en el catálogo.")
+        self._anotar(ej)
+        ej.actualizar(repeticiones, series)
+        self._marcar_cambio(
+            eventos.EJERCICIO_ACTUALIZADO,
+            nombre=ej.nombre,
+            repeticiones=repeticiones,
+            series=series,
+        )
+
+    def aplicar_perfil_tiempos(
+        self, sec_por_rep: int, descanso_entre_series: int, todos: bool = False
+    ) -> int:
+        """
+        Nueva versión del perfil de tiempos. En una sola pasada reescribe los
+        tiempos de los ejercicios (catálogo y los que solo viven en rutinas)
+        que seguían el perfil anterior, o de todos si `todos`; los que tenían
+        tiempos propios se respetan. Todos comparten la misma tabla de
+        duraciones y las duraciones mantenidas (resúmenes, constructor) se
+        refrescan con el evento. Devuelve cuántos ejercicios cambiaron.
+        """
+        validacion.PERFIL.validar(
+            {
+                "sec_por_rep": int(sec_por_rep),
+                "descanso_entre_series": int(descanso_entre_series),
+            }
+        )
+        anterior = self.perfil_tiempos
+        tabla = Parametros.tabla_duraciones(sec_por_rep, descanso_entre_series)
+
+        pendientes: List[Ejercicio] = []
+        pendientes.extend(self.ejercicios_catalogo)
         i = 0
         while i < len(self.rutinas):
-            try:
-                self.rutinas[i].eliminar_ejercicio(ej.nombre)
-            except ValueError:
-                pass
+            pendientes.extend(self.rutinas[i].ejercicios)
             i += 1
+        vistos: Set[int] = set()
+        cambiados = 0
+        i = 0
+        while i < len(pendientes):
+            ej = pendientes[i]
+            i += 1
+            if id(ej) in vistos:
+                continue
+            vistos.add(id(ej))
+            if not todos and (
+                ej.sec_por_rep != anterior.sec_por_rep
+                or ej.descanso_entre_series != anterior.descanso_entre_series
+            ):
+                continue
+            self._anotar(ej)
+            ej.sec_por_rep = int(sec_por_rep)
+            ej.descanso_entre_series = int(descanso_entre_series)
+            ej._tabla = tabla
+            ej._invalidar()
+            cambiados += 1
+
+        self._anotar_perfil()
+        self.perfil_tiempos = PerfilTiempos(
+            anterior.version + 1, int(sec_por_rep), int(descanso_entre_series)
+        )
+        self._marcar_cambio(
+            eventos.PERFIL_TIEMPOS_CAMBIADO,
+            version=self.perfil_tiempos.version,
+            sec_por_rep=self.perfil_tiempos.sec_por_rep,
+            descanso_entre_series=self.perfil_tiempos.descanso_entre_series,
+            todos=todos,
+            ejercicios=cambiados,
+        )
+        return cambiados
 
     def obtener_ejercicios_por_nombres(self, nombres: List[str]) -> List[Ejercicio]:
         res: List[Ejercicio] = []
@@ -435,8 +1119,58 @@ class SistemaGestion:
 
         ejercicios = self.obtener_ejercicios_por_nombres(nombres_ejercicios)
         r = Rutina(nombre, descripcion, ejercicios)
+        self._anotar_clave(self.idx_rutinas, key)
+        self._anotar_alta(self.rutinas, r)
         self.idx_rutinas[key] = r
         self.rutinas.append(r)
+        self._marcar_cambio(
+            eventos.RUTINA_CREADA,
+            nombre=r.nombre,
+            descripcion=r.descripcion,
+            ejercicios=[ej.nombre for ej in r.ejercicios],
+        )
+
+    def proponer_rutina(
+        self,
+        minutos: float,
+        incluir: Optional[List[str]] = None,
+        max_ejercicios: Optional[int] = None,
+        tolerancia_seg: int = constructor_rutinas.TOLERANCIA_SEG,
+    ) -> constructor_rutinas.RutinaPropuesta:
+        """Ejercicios del catálogo que suman `minutos` (ver constructor_rutinas)."""
+        if len(self.ejercicios_catalogo) == 0:
+            raise ValueError("Primero crea ejercicios en el catálogo.")
+        if self._constructor is None or self._version_constructor != self.version:
+            self._constructor = constructor_rutinas.ConstructorRutinas(
+                self.ejercicios_catalogo
+            )
+            self._version_constructor = self.version
+        return self._constructor.proponer(
+            int(round(minutos * 60)),
+            tolerancia_seg,
+            incluir if incluir is not None else [],
+            (),
+            max_ejercicios,
+        )
+
+    def construir_rutina(
+        self,
+        nombre: str,
+        descripcion: str,
+        minutos: float,
+        incluir: Optional[List[str]] = None,
+        max_ejercicios: Optional[int] = None,
+        tolerancia_seg: int = constructor_rutinas.TOLERANCIA_SEG,
+    ) -> constructor_rutinas.RutinaPropuesta:
+        """Crea la rutina con los ejercicios de `proponer_rutina`."""
+        propuesta = self.proponer_rutina(minutos, incluir, max_ejercicios, tolerancia_seg)
+        nombres: List[str] = []
+        i = 0
+        while i < len(propuesta.ejercicios):
+            nombres.append(propuesta.ejercicios[i].nombre)
+            i += 1
+        self.crear_rutina(nombre, descripcion, nombres)
+        return propuesta
 
     def listar_rutinas(self) -> None:
         if len(self.rutinas) == 0:
@@ -454,6 +1188,38 @@ class SistemaGestion:
             print("-" * 60)
             i += 1
 
+    @staticmethod
+    def _texto_rutinas(rutinas: Sequence[Rutina], inicio: int, fin: int) -> str:
+        # El mismo texto que listar_rutinas para rutinas[inicio:fin].
+        lineas: List[str] = []
+        i = inicio
+        while i < fin:
+            r = rutinas[i]
+            lineas.append(str(r))
+            k = 0
+            while k < len(r.ejercicios):
+                lineas.append("  • " + str(r.ejercicios[k]))
+                k += 1
+            lineas.append("-" * 60)
+            i += 1
+        return "\n".join(lineas) + "\n"
+
+    def listar_rutinas_paralelo(
+        self,
+        salida: Optional[TextIO] = None,
+        procesos: Optional[int] = None,
+        tam_bloque: int = 500,
+    ) -> None:
+        """listar_rutinas repartido entre varios procesos (misma salida)."""
+        if len(self.rutinas) == 0:
+            print("No hay rutinas.", file=salida)
+            return
+        salida = sys.stdout if salida is None else salida
+        salida.write("-" * 60 + "\n")
+        reportes.escribir_paralelo(
+            self.rutinas, SistemaGestion._texto_rutinas, salida, procesos, tam_bloque
+        )
+
     def editar_rutina(
         self,
         nombre: str,
@@ -465,18 +1231,70 @@ class SistemaGestion:
             raise ValueError("Rutina no encontrada.")
 
         old_key = Utilidades.normalizar(r.nombre)
+        anterior = r.nombre
 
         if nuevo_nombre is not None:
             propuesto_key = Utilidades.normalizar(nuevo_nombre)
             if (propuesto_key != old_key) and (propuesto_key in self.idx_rutinas):
                 raise ValueError("Ya existe otra rutina con ese nombre.")
 
+        self._anotar(r)
         r.actualizar_datos(nuevo_nombre, nueva_desc)
 
         new_key = Utilidades.normalizar(r.nombre)
         if new_key != old_key:
+            self._anotar_clave(self.idx_rutinas, old_key)
+            self._anotar_clave(self.idx_rutinas, new_key)
             self.idx_rutinas.pop(old_key, None)
             self.idx_rutinas[new_key] = r
+        self._marcar_cambio(
+            eventos.RUTINA_EDITADA,
+            nombre=anterior,
+            nuevo_nombre=r.nombre,
+            descripcion=r.descripcion,
+        )
+
+    def eliminar_rutina(self, nombre: str) -> None:
+        key = Utilidades.normalizar(nombre)
+        self._anotar_clave(self.idx_rutinas, key)
+        r = self.idx_rutinas.pop(key, None)
+        if r is None:
+            raise ValueError("Rutina no encontrada.")
+        # Cascada: se desasigna solo de los usuarios que la tenían (índice
+        # inverso de los resúmenes), en orden de alta.
+        usuarios = self.resumenes.usuarios_con(r)
+        usuarios.sort(key=self.usuarios.posicion)
+        self._anotar_baja(self.rutinas, r)
+        self.rutinas.quitar(r)
+        afectados: List[str] = []
+        i = 0
+        while i < len(usuarios):
+            self._anotar(usuarios[i])
+            if usuarios[i].quitar_rutina(r):
+                afectados.append(usuarios[i].nombre)
+            i += 1
+        self._marcar_cambio(eventos.RUTINA_ELIMINADA, nombre=r.nombre, usuarios=afectados)
+
+    def rutinas_duplicadas(self) -> List[List[Rutina]]:
+        """Grupos de rutinas con el mismo contenido, en orden de alta."""
+        grupos: Dict[int, List[Rutina]] = {}
+        orden: List[int] = []
+        i = 0
+        while i < len(self.rutinas):
+            r = self.rutinas[i]
+            h = r.huella()
+            if h not in grupos:
+                grupos[h] = []
+                orden.append(h)
+            grupos[h].append(r)
+            i += 1
+        res: List[List[Rutina]] = []
+        i = 0
+        while i < len(orden):
+            if len(grupos[orden[i]]) > 1:
+                res.append(grupos[orden[i]])
+            i += 1
+        return res
 
     def rutina_agregar_ejercicio(
         self, nombre_rutina: str, nombre_ejercicio: str
@@ -487,7 +1305,11 @@ class SistemaGestion:
         ej = self._buscar_ejercicio_catalogo(nombre_ejercicio)
         if ej is None:
             raise ValueError("Ese ejercicio no existe en el catálogo.")
+        self._anotar(r)
         r.agregar_ejercicio(ej)
+        self._marcar_cambio(
+            eventos.RUTINA_EJERCICIO_AGREGADO, rutina=r.nombre, ejercicio=ej.nombre
+        )
 
     def rutina_eliminar_ejercicio(
         self, nombre_rutina: str, nombre_ejercicio: str
@@ -495,7 +1317,11 @@ class SistemaGestion:
         r = self._buscar_rutina(nombre_rutina)
         if r is None:
             raise ValueError("Rutina no encontrada.")
+        self._anotar(r)
         r.eliminar_ejercicio(nombre_ejercicio)
+        self._marcar_cambio(
+            eventos.RUTINA_EJERCICIO_ELIMINADO, rutina=r.nombre, ejercicio=nombre_ejercicio
+        )
 
     def rutina_actualizar_ejercicio(
         self,
@@ -507,7 +1333,114 @@ class SistemaGestion:
         r = self._buscar_rutina(nombre_rutina)
         if r is None:
             raise ValueError("Rutina no encontrada.")
+        self._anotar(r._buscar(nombre_ejercicio))
         r.actualizar_ejercicio(nombre_ejercicio, repeticiones, series)
+        self._marcar_cambio(
+            eventos.RUTINA_EJERCICIO_ACTUALIZADO,
+            rutina=r.nombre,
+            ejercicio=nombre_ejercicio,
+            repeticiones=repeticiones,
+            series=series,
+        )
+
+    # -------- Bitácora de sesiones --------
+    def adjuntar_bitacora(self, b: bitacora.BitacoraSesiones) -> None:
+        """
+        Reemplaza la bitácora en memoria (p. ej. por una en disco). Los
+        acumulados se rehacen con lo que ya tenga, usando la composición
+        actual de cada rutina.
+        """
+        self._dejar_bitacora()
+        self._dejar_acumulados()
+        self.bitacora = b
+        self._dejar_bitacora = b.seguir(self.eventos)
+        self.acumulados = acumulados.Acumulados()
+        self.acumulados.cargar(b, self._plan_de_rutina)
+        self._dejar_acumulados = self.acumulados.seguir(self.eventos, b.eventos)
+
+    def _plan_de_rutina(self, nombre_rutina: str) -> acumulados.Plan:
+        r = self._buscar_rutina(nombre_rutina)
+        return () if r is None else acumulados.plan_de_rutina(r.ejercicios)
+
+    def registrar_sesion(
+        self,
+        nombre_usuario: str,
+        nombre_rutina: str,
+        fecha: Optional[bitacora.Fecha] = None,
+        series: Optional[int] = None,
+        repeticiones: Optional[int] = None,
+        duracion_seg: Optional[int] = None,
+    ) -> None:
+        """
+        Anota una sesión de una rutina asignada al usuario. Lo que no se
+        indique se toma de lo planificado en la rutina. Las filas de la
+        bitácora no se deshacen con una transacción revertida.
+        """
+        u = self._buscar_usuario(nombre_usuario)
+        if u is None:
+            raise ValueError("Usuario no encontrado.")
+        key = Utilidades.normalizar(nombre_rutina)
+        r: Optional[Rutina] = None
+        i = 0
+        while i < len(u.rutinas):
+            if Utilidades.normalizar(u.rutinas[i].nombre) == key:
+                r = u.rutinas[i]
+                break
+            i += 1
+        if r is None:
+            raise ValueError("El usuario no tiene asignada esa rutina.")
+        plan = acumulados.plan_de_rutina(r.ejercicios)
+        total_series = 0
+        total_reps = 0
+        total_seg = 0
+        i = 0
+        while i < len(plan):
+            _, ser, reps, seg = plan[i]
+            total_series += ser
+            total_reps += reps
+            total_seg += seg
+            i += 1
+        self.bitacora.registrar(
+            u.nombre,
+            r.nombre,
+            datetime.now() if fecha is None else fecha,
+            total_series if series is None else series,
+            total_reps if repeticiones is None else repeticiones,
+            total_seg if duracion_seg is None else duracion_seg,
+            plan,
+        )
+
+    def sesiones_de_usuario(
+        self, nombre_usuario: str, dias: int = 30
+    ) -> List[bitacora.Sesion]:
+        u = self._buscar_usuario(nombre_usuario)
+        if u is None:
+            raise ValueError("Usuario no encontrado.")
+        return self.bitacora.ultimos_dias(u.nombre, dias)
+
+    def volumen_usuario(
+        self,
+        nombre_usuario: str,
+        granularidad: str = "semana",
+        desde: Optional[bitacora.Fecha] = None,
+        hasta: Optional[bitacora.Fecha] = None,
+    ) -> List[Tuple[object, acumulados.Volumen]]:
+        u = self._buscar_usuario(nombre_usuario)
+        if u is None:
+            raise ValueError("Usuario no encontrado.")
+        return self.acumulados.de_usuario(u.nombre, granularidad, desde, hasta)
+
+    def volumen_ejercicio(
+        self,
+        nombre_ejercicio: str,
+        granularidad: str = "semana",
+        desde: Optional[bitacora.Fecha] = None,
+        hasta: Optional[bitacora.Fecha] = None,
+    ) -> List[Tuple[object, acumulados.Volumen]]:
+        ej = self._buscar_ejercicio_catalogo(nombre_ejercicio)
+        if ej is None:
+            raise ValueError("Ese ejercicio no existe en el catálogo.")
+        return self.acumulados.de_ejercicio(ej.nombre, granularidad, desde, hasta)
 
     # -------- Asignación y Reporte --------
     def asignar_rutina_a_usuario(self, nombre_usuario: str, nombre_rutina: str) -> None:
@@ -517,32 +1450,203 @@ class SistemaGestion:
         r = self._buscar_rutina(nombre_rutina)
         if r is None:
             raise ValueError("Rutina no encontrada.")
+        self._anotar(u)
         u.asignar_rutina(r)
+        self._marcar_cambio(eventos.RUTINA_ASIGNADA, usuario=u.nombre, rutina=r.nombre)
 
-    def reporte_por_usuario(self) -> None:
+    @staticmethod
+    def _filas_de_resumen(
+        resumen: ResumenUsuario,
+    ) -> Iterator[Tuple[str, int, Optional[str], Optional[float]]]:
+        if len(resumen.rutinas) == 0:
+            yield (resumen.nombre, resumen.edad, None, None)
+        else:
+            j = 0
+            while j < len(resumen.rutinas):
+                nombre_rutina, mins = resumen.rutinas[j]
+                yield (resumen.nombre, resumen.edad, nombre_rutina, mins)
+                j += 1
+
+    def filas_reporte(self) -> Iterator[Tuple[str, int, Optional[str], Optional[float]]]:
+        """Genera perezosamente (usuario, edad, rutina, duracion_min) por rutina asignada."""
+        i = 0
+        while i < len(self.usuarios):
+            yield from SistemaGestion._filas_de_resumen(self.resumenes.de(self.usuarios[i]))
+            i += 1
+
+    def reporte_por_usuario(self, salida: Optional[TextIO] = None) -> None:
         if len(self.usuarios) == 0:
-            print("No hay usuarios.")
+            print("No hay usuarios.", file=salida)
+            return
+        reportes.escribir_texto(
+            self.filas_reporte(),
+            sys.stdout if salida is None else salida,
+            Utilidades.minutos_a_texto,
+        )
+
+    @staticmethod
+    def _filas_de_usuario(
+        u: Usuario,
+    ) -> Iterator[Tuple[str, int, Optional[str], Optional[float]]]:
+        # Mismas filas que _filas_de_resumen, pero calculadas desde las rutinas.
+        if len(u.rutinas) == 0:
+            yield (u.nombre, u.edad, None, None)
+        else:
+            j = 0
+            while j < len(u.rutinas):
+                yield (u.nombre, u.edad, u.rutinas[j].nombre, u.rutinas[j].duracion_total_min())
+                j += 1
+
+    def reporte_paralelo(
+        self,
+        salida: Optional[TextIO] = None,
+        procesos: Optional[int] = None,
+        tam_bloque: int = 2000,
+    ) -> None:
+        """
+        reporte_por_usuario repartido entre varios procesos (misma salida).
+        Cada trabajador calcula las duraciones de sus usuarios; no se usan
+        los resúmenes materializados, que viven en este proceso.
+        """
+        if len(self.usuarios) == 0:
+            print("No hay usuarios.", file=salida)
+            return
+        reportes.reporte_paralelo(
+            self.usuarios,
+            SistemaGestion._filas_de_usuario,
+            Utilidades.minutos_a_texto,
+            sys.stdout if salida is None else salida,
+            procesos,
+            tam_bloque,
+        )
+
+    def exportar_reporte(self, ruta: str, formato: str = "csv") -> int:
+        """Escribe el reporte por usuario en un archivo (csv, jsonl o texto)."""
+        return reportes.exportar_reporte(
+            self.filas_reporte(), ruta, formato, Utilidades.minutos_a_texto
+        )
+
+    # -------- Transacciones --------
+    # Dentro de una transacción cada operación anota, antes de cambiar algo,
+    # cómo deshacerlo: los atributos de las entidades que toca (una vez por
+    # transacción), las claves de índice y las altas/bajas en las listas.
+    # Revertir cuesta lo que se tocó, no el tamaño del sistema.
+    def _anotar(self, *objetos: object) -> None:
+        if self._deshacer is None:
             return
-        print("=" * 60)
+        for obj in objetos:
+            if id(obj) in self._anotados:
+                continue
+            self._anotados.add(id(obj))
+            atributos: Dict[str, object] = {}
+            caches = getattr(obj, "_CACHES", ())
+            for nombre_attr, valor in vars(obj).items():
+                if isinstance(valor, ListaOrdenada):
+                    atributos[nombre_attr] = valor.copia()
+                elif isinstance(valor, list) and nombre_attr not in caches:
+                    atributos[nombre_attr] = list(valor)
+                else:
+                    atributos[nombre_attr] = valor
+            self._deshacer.append(
+                lambda obj=obj, atributos=atributos: (
+                    vars(obj).clear(),
+                    vars(obj).update(atributos),
+                )
+            )
+
+    def _anotar_clave(self, indice: Dict[str, object], clave: str) -> None:
+        if self._deshacer is None:
+            return
+        if clave in indice:
+            valor = indice[clave]
+            self._deshacer.append(lambda: indice.__setitem__(clave, valor))
+        else:
+            self._deshacer.append(lambda: indice.pop(clave, None))
+
+    def _anotar_alta(self, lista: ListaOrdenada, x: object) -> None:
+        if self._deshacer is not None:
+            self._deshacer.append(lambda: lista.deshacer_alta(x))
+
+    def _anotar_baja(self, lista: ListaOrdenada, x: object) -> None:
+        if self._deshacer is not None and x in lista:
+            pos = lista.posicion(x)
+            self._deshacer.append(lambda: lista.reponer(x, pos))
+
+    def _anotar_perfil(self) -> None:
+        if self._deshacer is not None:
+            anterior = self.perfil_tiempos
+            self._deshacer.append(lambda: setattr(self, "perfil_tiempos", anterior))
+
+    @contextmanager
+    def transaccion(self) -> Iterator["SistemaGestion"]:
+        """
+        Agrupa varias operaciones: si alguna lanza una excepción, el sistema
+        vuelve exactamente al estado previo (listas, índices y entidades).
+        Los eventos del bloque se entregan juntos al confirmar y se descartan
+        si se revierte. Se pueden anidar: revertir la interna solo deshace lo
+        suyo.
+        """
+        externa = self._deshacer
+        anotados = self._anotados
+        registro: List[Callable[[], None]] = []
+        self._deshacer = registro
+        self._anotados = set()
+        listas = (self.usuarios, self.ejercicios_catalogo, self.rutinas)
         i = 0
-        while i < len(self.usuarios):
-            u = self.usuarios[i]
-            print("Usuario: " + u.nombre + " | Edad: " + str(u.edad))
-            if len(u.rutinas) == 0:
-                print("  (Sin rutinas asignadas)")
-            else:
-                j = 0
-                while j < len(u.rutinas):
-                    r = u.rutinas[j]
-                    print(
-                        "  - "
-                        + r.nombre
-                        + ": "
-                        + Utilidades.minutos_a_texto(r.duracion_total_min())
-                    )
-                    j += 1
-            print("=" * 60)
+        while i < len(listas):
+            listas[i].congelar()
             i += 1
+        try:
+            with self.eventos.lote():
+                try:
+                    yield self
+                except BaseException:
+                    k = len(registro) - 1
+                    while k >= 0:
+                        registro[k]()
+                        k -= 1
+                    registro.clear()
+                    self._anotados = set()
+                    # Los ejercicios restaurados invalidan las huellas guardadas.
+                    Ejercicio.generacion += 1
+                    self._marcar_cambio()
+                    raise
+        finally:
+            self._deshacer = externa
+            if externa is not None:
+                # Lo confirmado aquí se deshace con la externa, si falla.
+                externa.extend(registro)
+                anotados.update(self._anotados)
+            self._anotados = anotados
+            i = 0
+            while i < len(listas):
+                listas[i].descongelar()
+                i += 1
+
+    def ejecutar_lote(
+        self, operaciones: List[Tuple[Callable[..., None], tuple]]
+    ) -> None:
+        """
+        Ejecuta una lista de (método, argumentos) de forma atómica.
+        Ejemplo: [(s.crear_rutina, ("Pierna", "Día 1", ["Sentadilla"])), ...]
+        """
+        with self.transaccion():
+            i = 0
+            while i < len(operaciones):
+                metodo, args = operaciones[i]
+                try:
+                    metodo(*args)
+                except ValueError as e:
+                    raise ValueError(
+                        "Operación "
+                        + str(i + 1)
+                        + " ("
+                        + metodo.__name__
+                        + "): "
+                        + str(e)
+                        + " Se revirtió todo el lote."
+                    ) from e
+                i += 1
 
     # -------- Menús de terminal --------
     def menu(self) -> None:
@@ -606,13 +1710,33 @@ class SistemaGestion:
             except ValueError as e:
                 print("[Error] " + str(e))
 
+    def _mostrar_volumen_semanas(self, nombre: str) -> None:
+        u = self._buscar_usuario(nombre)
+        if u is None:
+            print("Usuario no encontrado.")
+            return
+        semanas = self.acumulados.ultimas_semanas(u.nombre, 4)
+        i = 0
+        while i < len(semanas):
+            inicio, vol = semanas[i]
+            texto = f"  Semana del {inicio:%Y-%m-%d}: {int(vol.sesiones)} sesiones | "
+            texto += Utilidades.minutos_a_texto(vol.minutos)
+            if vol.adherencia is not None:
+                texto += f" | adherencia {vol.adherencia * 100:.0f}%"
+            print(texto)
+            i += 1
+
     def menu_usuarios(self) -> None:
         while True:
             print("\n--- Usuarios ---")
             print("1) Agregar")
             print("2) Listar")
             print("3) Editar usuario")
-            print("4) Volver")
+            print("4) Eliminar usuario")
+            print("5) Registrar sesión realizada")
+            print("6) Ver sesiones de los últimos 30 días")
+            print("7) Ver volumen de las últimas 4 semanas")
+            print("8) Volver")
             op = input("Opción: ").strip()
             if op == "1":
                 while True:
@@ -646,23 +1770,18 @@ class SistemaGestion:
                         if self._buscar_usuario(nuevo) is not None:
                             print("Ya existe un usuario con ese nombre.")
                             continue
-                        old_key = Utilidades.normalizar(usuario.nombre)
                         try:
-                            usuario.cambiar_nombre(nuevo)
+                            self.renombrar_usuario(usuario.nombre, nuevo)
                         except ValueError as e:
                             print("[Error] " + str(e))
                             continue
-                        self.idx_usuarios.pop(old_key, None)
-                        self.idx_usuarios[Utilidades.normalizar(usuario.nombre)] = (
-                            usuario
-                        )
                         print("Nombre actualizado.")
                     elif subop == "2":
                         try:
                             nueva_edad = self._input_int(
                                 "Nueva edad: ", minimo=16, maximo=100
                             )
-                            usuario.cambiar_edad(nueva_edad)
+                            self.cambiar_edad_usuario(usuario.nombre, nueva_edad)
                             print("Edad actualizada.")
                         except ValueError as e:
                             print("[Error] " + str(e))
@@ -671,6 +1790,45 @@ class SistemaGestion:
                     else:
                         print("Opción no válida.")
             elif op == "4":
+                nombre = self._input_no_vacio("Nombre a eliminar: ")
+                try:
+                    self.eliminar_usuario(nombre)
+                    print("Usuario eliminado.")
+                except ValueError as e:
+                    print("[Error] " + str(e))
+            elif op == "5":
+                nombre = self._input_no_vacio("Usuario: ")
+                nombre_r = self._input_no_vacio("Rutina realizada: ")
+                dur = self._input_int("Duración en minutos (0 = la planificada): ", minimo=0)
+                try:
+                    self.registrar_sesion(
+                        nombre, nombre_r, duracion_seg=(dur * 60) if dur > 0 else None
+                    )
+                    print("Sesión registrada.")
+                except ValueError as e:
+                    print("[Error] " + str(e))
+            elif op == "6":
+                nombre = self._input_no_vacio("Usuario: ")
+                try:
+                    sesiones = self.sesiones_de_usuario(nombre)
+                except ValueError as e:
+                    print("[Error] " + str(e))
+                    continue
+                if len(sesiones) == 0:
+                    print("Sin sesiones en los últimos 30 días.")
+                    continue
+                i = 0
+                while i < len(sesiones):
+                    ses = sesiones[i]
+                    print(
+                        f"  {ses.fecha:%Y-%m-%d %H:%M} | {ses.rutina} | "
+                        f"{ses.series} series, {ses.repeticiones} reps | "
+                        + Utilidades.minutos_a_texto(ses.duracion_seg / 60)
+                    )
+                    i += 1
+            elif op == "7":
+                self._mostrar_volumen_semanas(self._input_no_vacio("Usuario: "))
+            elif op == "8":
                 return
             else:
                 print("Opción no válida.")
@@ -682,7 +1840,8 @@ class SistemaGestion:
             print("2) Listar ejercicios")
             print("3) Editar ejercicio")
             print("4) Eliminar ejercicio")
-            print("5) Volver")
+            print("5) Cambiar perfil de tiempos")
+            print("6) Volver")
             op = input("Opción: ").strip()
             if op == "1":
                 while True:
@@ -717,23 +1876,20 @@ class SistemaGestion:
                         if self._buscar_ejercicio_catalogo(nuevo) is not None:
                             print("Ya existe un ejercicio con ese nombre.")
                             continue
-                        old_key = Utilidades.normalizar(ejercicio.nombre)
                         try:
-                            ejercicio.cambiar_nombre(nuevo)
+                            self.renombrar_ejercicio(ejercicio.nombre, nuevo)
                         except ValueError as e:
                             print("[Error] " + str(e))
                             continue
-                        self.idx_ejercicios.pop(old_key, None)
-                        self.idx_ejercicios[Utilidades.normalizar(ejercicio.nombre)] = (
-                            ejercicio
-                        )
                         print("Nombre actualizado.")
                     elif subop == "2":
                         try:
                             nuevas_reps = self._input_int(
                                 "Nuevas repeticiones: ", minimo=1, maximo=100
                             )
-                            ejercicio.actualizar(repeticiones=nuevas_reps)
+                            self.actualizar_ejercicio(
+                                ejercicio.nombre, repeticiones=nuevas_reps
+                            )
                             print("Repeticiones actualizadas.")
                         except ValueError as e:
                             print("[Error] " + str(e))
@@ -742,7 +1898,9 @@ class SistemaGestion:
                             nuevas_series = self._input_int(
                                 "Nuevas series: ", minimo=1, maximo=100
                             )
-                            ejercicio.actualizar(series=nuevas_series)
+                            self.actualizar_ejercicio(
+                                ejercicio.nombre, series=nuevas_series
+                            )
                             print("Series actualizadas.")
                         except ValueError as e:
                             print("[Error] " + str(e))
@@ -758,6 +1916,24 @@ class SistemaGestion:
                 except ValueError as e:
                     print("[Error] " + str(e))
             elif op == "5":
+                p = self.perfil_tiempos
+                print(
+                    "Perfil actual (v"
+                    + str(p.version)
+                    + "): "
+                    + str(p.sec_por_rep)
+                    + " s por repetición, "
+                    + str(p.descanso_entre_series)
+                    + " s de descanso entre series."
+                )
+                sec = self._input_int("Segundos por repetición: ", minimo=1)
+                descanso = self._input_int("Descanso entre series (s): ", minimo=0)
+                todos = input("¿Aplicar también a ejercicios con tiempos propios? (s/n): ")
+                n = self.aplicar_perfil_tiempos(
+                    sec, descanso, todos.strip().lower() == "s"
+                )
+                print("Perfil actualizado; " + str(n) + " ejercicios recalculados.")
+            elif op == "6":
                 return
             else:
                 print("Opción no válida.")
@@ -768,7 +1944,10 @@ class SistemaGestion:
             print("1) Crear rutina (seleccionando ejercicios del catálogo)")
             print("2) Listar rutinas")
             print("3) Editar rutina")
-            print("4) Volver")
+            print("4) Eliminar rutina")
+            print("5) Construir rutina por duración objetivo")
+            print("6) Ver rutinas duplicadas")
+            print("7) Volver")
             op = input("Opción: ").strip()
             if op == "1":
                 if len(self.ejercicios_catalogo) == 0:
@@ -812,6 +1991,61 @@ class SistemaGestion:
                     continue
                 self.submenu_editar_rutina(r)
             elif op == "4":
+                nombre = self._input_no_vacio("Nombre a eliminar: ")
+                try:
+                    self.eliminar_rutina(nombre)
+                    print("Rutina eliminada; se quitó de los usuarios que la tenían.")
+                except ValueError as e:
+                    print("[Error] " + str(e))
+            elif op == "5":
+                if len(self.ejercicios_catalogo) == 0:
+                    print("Primero crea ejercicios en el catálogo.")
+                    continue
+                while True:
+                    nombre = self._input_no_vacio("Nombre de la rutina: ")
+                    if self._buscar_rutina(nombre) is not None:
+                        print("Ya existe una rutina con ese nombre. Intenta otro.")
+                    else:
+                        break
+                desc = self._input_no_vacio("Descripción: ")
+                minutos = self._input_int("Duración objetivo (min): ", 1)
+                sel = input("Obligatorios (separados por coma, vacío = ninguno): ").strip()
+                tmp = sel.split(",")
+                incluir: List[str] = []
+                i = 0
+                while i < len(tmp):
+                    n = tmp[i].strip()
+                    if n != "":
+                        incluir.append(n)
+                    i += 1
+                maximo = self._input_int("Máximo de ejercicios (0 = sin límite): ", 0)
+                try:
+                    propuesta = self.construir_rutina(
+                        nombre, desc, minutos, incluir, maximo if maximo > 0 else None
+                    )
+                    print(
+                        "Rutina creada con "
+                        + str(len(propuesta.ejercicios))
+                        + " ejercicios. Duración: "
+                        + Utilidades.minutos_a_texto(propuesta.segundos / 60.0)
+                    )
+                except ValueError as e:
+                    print("[Error] " + str(e))
+            elif op == "6":
+                grupos = self.rutinas_duplicadas()
+                if len(grupos) == 0:
+                    print("No hay rutinas duplicadas.")
+                    continue
+                i = 0
+                while i < len(grupos):
+                    nombres = grupos[i][0].nombre
+                    j = 1
+                    while j < len(grupos[i]):
+                        nombres = nombres + " = " + grupos[i][j].nombre
+                        j += 1
+                    print("- " + nombres)
+                    i += 1
+            elif op == "7":
                 return
             else:
                 print("Opción no válida.")
@@ -1,6 +1,18 @@
 from __future__ import annotations
-from typing import Optional, Dict, List, Tuple
-from functools import reduce
+import hashlib
+import sys
+import weakref
+from datetime import datetime
+from typing import Optional, Dict, Iterator, List, TextIO, Tuple
+from functools import lru_cache, reduce
+from itertools import accumulate, chain, groupby, takewhile
+
+import acumulados
+import bitacora
+import constructor_rutinas
+import eventos
+import reportes
+import validacion
 
 # -------------------- Constantes y utilidades --------------------
 
@@ -8,6 +20,7 @@ SEC_POR_REP = 5
 DESCANSO_ENTRE_SERIES = 30
 
 
+@lru_cache(maxsize=4096)
 def minutos_a_texto(mins: float) -> str:
     total = int(round(mins * 60))
     m, s = divmod(total, 60)
@@ -18,6 +31,12 @@ def _norm(s: str) -> str:
     return s.strip().lower()
 
 
+def _sin(lst: List, x) -> List:
+    # Copia de `lst` sin `x` en una sola pasada de bajo nivel (index + rebanadas).
+    i = lst.index(x)
+    return lst[:i] + lst[i + 1:]
+
+
 # -------------------- Tipos de datos inmutables (dicts) --------------------
 
 def mk_ejercicio(
@@ -39,29 +58,56 @@ def mk_ejercicio(
 
 
 def validar_ejercicio(e: Dict) -> None:
-    if not e["nombre"]:
-        raise ValueError("El nombre del ejercicio no puede estar vacío.")
-    if e["repeticiones"] <= 0:
-        raise ValueError("Las repeticiones deben ser mayores a 0.")
-    if e["repeticiones"] > 100:
-        raise ValueError("Las repeticiones no pueden ser mayores a 100.")
-    if e["series"] <= 0:
-        raise ValueError("Las series deben ser mayores a 0.")
-    if e["series"] > 100:
-        raise ValueError("Las series no pueden ser mayores a 100.")
-    if e["sec_por_rep"] <= 0 or e["descanso_entre_series"] < 0:
-        raise ValueError("Tiempos inválidos para el ejercicio.")
+    validacion.EJERCICIO.validar(e)
+
+
+# Repeticiones y series están acotadas a 1..100: para cada par
+# (sec_por_rep, descanso) se precalculan las 101 x 101 duraciones una sola vez.
+# Solo se retienen los pares más recientes (cada tabla ocupa ~300 KB).
+TABLAS_EN_CACHE = 16
+
+
+@lru_cache(maxsize=TABLAS_EN_CACHE)
+def tabla_duraciones(sec_por_rep: int, descanso_entre_series: int) -> List[float]:
+    return [
+        (rep * sec_por_rep * ser + descanso_entre_series * max(0, ser - 1)) / 60.0
+        for rep in range(101)
+        for ser in range(101)
+    ]
 
 
 def duracion_ejercicio_min(e: Dict) -> float:
-    movimiento = e["repeticiones"] * e["sec_por_rep"] * e["series"]
-    descanso = e["descanso_entre_series"] * max(0, e["series"] - 1)
-    return (movimiento + descanso) / 60.0
+    tabla = tabla_duraciones(e["sec_por_rep"], e["descanso_entre_series"])
+    return tabla[e["repeticiones"] * 101 + e["series"]]
+
+
+def duracion_ejercicio_seg(e: Dict) -> int:
+    # En segundos enteros: los totales mantenidos por suma y resta no acumulan error.
+    return e["repeticiones"] * e["sec_por_rep"] * e["series"] + e[
+        "descanso_entre_series"
+    ] * max(0, e["series"] - 1)
 
 
 def str_ejercicio(e: Dict) -> str:
+    return _texto_ejercicio(
+        e["nombre"],
+        e["repeticiones"],
+        e["series"],
+        e["sec_por_rep"],
+        e["descanso_entre_series"],
+    )
+
+
+@lru_cache(maxsize=8192)
+def _texto_ejercicio(nombre: str, rep: int, ser: int, sec: int, descanso: int) -> str:
+    e = {
+        "repeticiones": rep,
+        "series": ser,
+        "sec_por_rep": sec,
+        "descanso_entre_series": descanso,
+    }
     return (
-        f'{e["nombre"]} | reps: {e["repeticiones"]} | series: {e["series"]} '
+        f"{nombre} | reps: {rep} | series: {ser} "
         f"| estimado: {minutos_a_texto(duracion_ejercicio_min(e))}"
     )
 
@@ -69,17 +115,73 @@ def str_ejercicio(e: Dict) -> str:
 def actualizar_ejercicio(
     e: Dict, rep: Optional[int] = None, ser: Optional[int] = None
 ) -> Dict:
-    nuevo = dict(e)
-    if rep is not None:
-        if rep <= 0:
-            raise ValueError("Las repeticiones deben ser mayores a 0.")
-        nuevo["repeticiones"] = rep
-    if ser is not None:
-        if ser <= 0:
-            raise ValueError("Las series deben ser mayores a 0.")
-        nuevo["series"] = ser
-    validar_ejercicio(nuevo)
-    return nuevo
+    cambios = {
+        **({} if rep is None else {"repeticiones": rep}),
+        **({} if ser is None else {"series": ser}),
+    }
+    validacion.EJERCICIO.validar(cambios, parcial=True)
+    return {**e, **dict(map(lambda kv: (kv[0], int(kv[1])), cambios.items()))}
+
+_MASCARA_HUELLA = (1 << 64) - 1
+
+
+@lru_cache(maxsize=8192)
+def _huella_campos(nombre_norm: str, rep: int, ser: int, sec: int, descanso: int) -> int:
+    datos = f"{nombre_norm}\x1f{rep}\x1f{ser}\x1f{sec}\x1f{descanso}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(datos, digest_size=8).digest(), "little")
+
+
+def _huella_ejercicio(e: Dict) -> int:
+    return _huella_campos(
+        _norm(e["nombre"]),
+        e["repeticiones"],
+        e["series"],
+        e["sec_por_rep"],
+        e["descanso_entre_series"],
+    )
+
+
+def _huella_rutina(r: Dict) -> int:
+    # Suma (mod 2^64) de las huellas de sus ejercicios: no depende del orden
+    # y se mantiene sumando/restando solo el ejercicio que cambia.
+    huella = r.get("huella")
+    if huella is None:
+        huella = sum(map(_huella_ejercicio, r["ejercicios"])) & _MASCARA_HUELLA
+    return huella
+
+
+class _Cuerpo(list):
+    """Lista de ejercicios internada; subclase solo para admitir weakref."""
+
+    __slots__ = ("__weakref__",)
+
+
+# (huella de la rutina, cantidad de ejercicios) -> lista compartida por todas
+# las rutinas con ese mismo cuerpo. Se libera sola cuando ninguna la usa.
+_CUERPOS: "weakref.WeakValueDictionary[Tuple[int, int], _Cuerpo]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _internar(ejercicios: List[Dict], huella: int) -> List[Dict]:
+    # La huella ya se mantiene por delta, así que no se rehashea cada
+    # ejercicio; como no depende del orden, se confirma con ==.
+    clave = (huella, len(ejercicios))
+    previo = _CUERPOS.get(clave)
+    if previo is ejercicios:
+        return previo
+    if previo is not None and previo == ejercicios:
+        return previo
+    cuerpo = _Cuerpo(ejercicios)
+    if previo is None:
+        _CUERPOS[clave] = cuerpo
+    return cuerpo
+
+
+def rutinas_equivalentes(a: Dict, b: Dict) -> bool:
+    """Mismos ejercicios con los mismos tiempos (sin importar nombre ni orden)."""
+    return _huella_rutina(a) == _huella_rutina(b)
+
 
 def mk_rutina(nombre: str, descripcion: str, ejercicios: List[Dict]) -> Dict:
     r = {
@@ -88,50 +190,92 @@ def mk_rutina(nombre: str, descripcion: str, ejercicios: List[Dict]) -> Dict:
         "ejercicios": list(ejercicios),
     }
     validar_rutina(r)
+    r["claves"] = frozenset(map(lambda ej: _norm(ej["nombre"]), r["ejercicios"]))
+    r["duracion_seg"] = sum(map(duracion_ejercicio_seg, r["ejercicios"]))
+    r["huella"] = _huella_rutina(r)
+    r["ejercicios"] = _internar(r["ejercicios"], r["huella"])
     return r
 
 
 def validar_rutina(r: Dict) -> None:
-    if not r["nombre"]:
-        raise ValueError("El nombre de la rutina no puede estar vacío.")
-    if not r["descripcion"]:
-        raise ValueError("La descripción de la rutina no puede estar vacía.")
-    if not r["ejercicios"]:
-        raise ValueError("Una rutina debe tener al menos un ejercicio.")
+    validacion.RUTINA.validar(r)
     nombres = list(map(lambda ej: _norm(ej["nombre"]), r["ejercicios"]))
+    if len(set(nombres)) != len(nombres):
+        raise ValueError("Hay ejercicios duplicados por nombre dentro de la rutina.")
 
-    def acum_dups(acc: Tuple[set, bool], nom: str) -> Tuple[set, bool]:
-        vistos, dup = acc
-        return (vistos | {nom}, dup or (nom in vistos))
 
-    _, hay_dup = reduce(acum_dups, nombres, (set(), False))
-    if hay_dup:
-        raise ValueError("Hay ejercicios duplicados por nombre dentro de la rutina.")
+def _claves_rutina(r: Dict) -> frozenset:
+    # Nombres normalizados de la rutina; se mantienen en cada cambio para
+    # validar solo la diferencia en vez de recorrer toda la lista.
+    claves = r.get("claves")
+    if claves is None:
+        claves = frozenset(map(lambda ej: _norm(ej["nombre"]), r["ejercicios"]))
+    return claves
+
+
+def _segundos_rutina(r: Dict) -> int:
+    seg = r.get("duracion_seg")
+    if seg is None:
+        seg = sum(map(duracion_ejercicio_seg, r["ejercicios"]))
+    return seg
+
+
+def _rutina_con(
+    r: Dict,
+    ejercicios: List[Dict],
+    claves: frozenset,
+    duracion_seg: int,
+    huella: int,
+    nombre: Optional[str] = None,
+    descripcion: Optional[str] = None,
+) -> Dict:
+    # Copia de `r` ya validada por quien llama; no vuelve a pasar por mk_rutina.
+    # Lo que se evita es revalidar toda la rutina y recalcular su duración y
+    # huella; la edición sigue copiando la lista de ejercicios y el conjunto
+    # de claves (estado inmutable), así que cuesta O(n) en el tamaño de la
+    # rutina, aunque con copias hechas en C.
+    return {
+        "nombre": r["nombre"] if nombre is None else nombre,
+        "descripcion": r["descripcion"] if descripcion is None else descripcion,
+        "ejercicios": _internar(ejercicios, huella),
+        "claves": claves,
+        "duracion_seg": duracion_seg,
+        "huella": huella,
+    }
 
 
 def rutina_agregar_ejercicio(r: Dict, e: Dict) -> Dict:
     key = _norm(e["nombre"])
-    existe = reduce(
-        lambda acc, ej: acc or (_norm(ej["nombre"]) == key),
-        r["ejercicios"],
-        False,
-    )
-    if existe:
+    claves = _claves_rutina(r)
+    if key in claves:
         raise ValueError(f"Ya existe un ejercicio '{e['nombre']}' en la rutina.")
-    nueva_lista = r["ejercicios"] + [e]
-    return mk_rutina(r["nombre"], r["descripcion"], nueva_lista)
+    return _rutina_con(
+        r,
+        r["ejercicios"] + [e],
+        claves | {key},
+        _segundos_rutina(r) + duracion_ejercicio_seg(e),
+        (_huella_rutina(r) + _huella_ejercicio(e)) & _MASCARA_HUELLA,
+    )
 
 
 def rutina_eliminar_ejercicio(r: Dict, nombre_ejercicio: str) -> Dict:
     key = _norm(nombre_ejercicio)
-    nueva = list(filter(lambda ej: _norm(ej["nombre"]) != key, r["ejercicios"]))
-    if len(nueva) == len(r["ejercicios"]):
+    claves = _claves_rutina(r)
+    if key not in claves:
         raise ValueError("No se encontró el ejercicio para eliminar.")
-    if not nueva:
+    if len(claves) == 1:
         raise ValueError(
             "La rutina no puede quedarse vacía; agrega otro ejercicio o cancela la eliminación."
         )
-    return mk_rutina(r["nombre"], r["descripcion"], nueva)
+    quitado = next(filter(lambda ej: _norm(ej["nombre"]) == key, r["ejercicios"]))
+    nueva = _sin(r["ejercicios"], quitado)
+    return _rutina_con(
+        r,
+        nueva,
+        claves - {key},
+        _segundos_rutina(r) - duracion_ejercicio_seg(quitado),
+        (_huella_rutina(r) - _huella_ejercicio(quitado)) & _MASCARA_HUELLA,
+    )
 
 
 def rutina_buscar_ejercicio(r: Dict, nombre_ejercicio: str) -> Dict:
@@ -151,23 +295,25 @@ def rutina_actualizar_ejercicio(
     r: Dict, nombre_ejercicio: str, rep: Optional[int] = None, ser: Optional[int] = None
 ) -> Dict:
     key = _norm(nombre_ejercicio)
+    claves = _claves_rutina(r)
+    if key not in claves:
+        raise ValueError("Ejercicio no encontrado en la rutina.")
 
-    def rep_o_mismo(ej: Dict) -> Dict:
-        return actualizar_ejercicio(ej, rep, ser) if _norm(ej["nombre"]) == key else ej
-
-    nueva = list(map(rep_o_mismo, r["ejercicios"]))
-    igual = reduce(
-        lambda acc, ej: acc and (_norm(ej["nombre"]) != key), r["ejercicios"], True
+    viejo = next(filter(lambda ej: _norm(ej["nombre"]) == key, r["ejercicios"]))
+    nuevo = actualizar_ejercicio(viejo, rep, ser)
+    # Los nombres no cambian: el conjunto de claves sigue siendo válido.
+    return _rutina_con(
+        r,
+        list(map(lambda ej: nuevo if ej is viejo else ej, r["ejercicios"])),
+        claves,
+        _segundos_rutina(r) - duracion_ejercicio_seg(viejo) + duracion_ejercicio_seg(nuevo),
+        (_huella_rutina(r) - _huella_ejercicio(viejo) + _huella_ejercicio(nuevo))
+        & _MASCARA_HUELLA,
     )
-    if igual:
-        raise ValueError("Ejercicio no encontrado en la rutina.")
-    return mk_rutina(r["nombre"], r["descripcion"], nueva)
 
 
 def rutina_duracion_total_min(r: Dict) -> float:
-    return reduce(
-        lambda acc, ej: acc + duracion_ejercicio_min(ej), r["ejercicios"], 0.0
-    )
+    return _segundos_rutina(r) / 60.0
 
 
 def str_rutina(r: Dict) -> str:
@@ -188,21 +334,24 @@ def rutina_actualizar_datos(
         raise ValueError("El nombre de la rutina no puede quedar vacío.")
     if descripcion is not None and not nueva_desc:
         raise ValueError("La descripción de la rutina no puede quedar vacía.")
-    return mk_rutina(nuevo_nombre, nueva_desc, r["ejercicios"])
+    return _rutina_con(
+        r,
+        r["ejercicios"],
+        _claves_rutina(r),
+        _segundos_rutina(r),
+        _huella_rutina(r),
+        nuevo_nombre,
+        nueva_desc,
+    )
 
 def mk_usuario(nombre: str, edad: int) -> Dict:
-    u = {"nombre": nombre.strip(), "edad": int(edad), "rutinas": []}
+    u = {"nombre": nombre.strip(), "edad": int(edad), "rutinas": [], "total_seg": 0}
     validar_usuario(u)
     return u
 
 
 def validar_usuario(u: Dict) -> None:
-    if not u["nombre"]:
-        raise ValueError("El nombre del usuario no puede estar vacío.")
-    if u["edad"] < 16:
-        raise ValueError("La edad debe ser un número mayor o igual a 16 años.")
-    if u["edad"] > 100:
-        raise ValueError("La edad debe ser menor o igual a 100 años.")
+    validacion.USUARIO.validar(u)
 
 
 def usuario_asignar_rutina(u: Dict, r: Dict) -> Dict:
@@ -212,12 +361,68 @@ def usuario_asignar_rutina(u: Dict, r: Dict) -> Dict:
     )
     if ya:
         raise ValueError(f"El usuario ya tiene una rutina llamada '{r['nombre']}'.")
-    return {"nombre": u["nombre"], "edad": u["edad"], "rutinas": u["rutinas"] + [r]}
+    return {
+        **u,
+        "rutinas": u["rutinas"] + [r],
+        "total_seg": _segundos_usuario(u) + _segundos_rutina(r),
+    }
+
+
+def usuario_quitar_rutina(u: Dict, nombre_rutina: str) -> Dict:
+    """Copia de `u` sin la rutina (por nombre); si no la tiene, devuelve `u`."""
+    key = _norm(nombre_rutina)
+    quitadas = list(filter(lambda r: _norm(r["nombre"]) == key, u["rutinas"]))
+    if not quitadas:
+        return u
+    return {
+        **u,
+        "rutinas": list(filter(lambda r: _norm(r["nombre"]) != key, u["rutinas"])),
+        "total_seg": _segundos_usuario(u) - sum(map(_segundos_rutina, quitadas)),
+    }
+
+
+def _segundos_usuario(u: Dict) -> int:
+    seg = u.get("total_seg")
+    if seg is None:
+        seg = sum(map(_segundos_rutina, u["rutinas"]))
+    return seg
+
+
+def _resumen(u: Dict) -> Dict:
+    return {
+        "nombre": u["nombre"],
+        "edad": u["edad"],
+        "rutinas": list(
+            map(lambda r: (r["nombre"], rutina_duracion_total_min(r)), u["rutinas"])
+        ),
+        "total_min": _segundos_usuario(u) / 60.0,
+    }
 
 
 def str_usuario(u: Dict) -> str:
     return f"Usuario: {u['nombre']} | Edad: {u['edad']} | Rutinas: {len(u['rutinas'])}"
 
+def mk_perfil_tiempos(version: int, sec_por_rep: int, descanso_entre_series: int) -> Dict:
+    validacion.PERFIL.validar(
+        {
+            "sec_por_rep": int(sec_por_rep),
+            "descanso_entre_series": int(descanso_entre_series),
+        }
+    )
+    return {
+        "version": int(version),
+        "sec_por_rep": int(sec_por_rep),
+        "descanso_entre_series": int(descanso_entre_series),
+    }
+
+
+def _perfil_tiempos(st: Dict) -> Dict:
+    perfil = st.get("perfil_tiempos")
+    if perfil is None:
+        perfil = mk_perfil_tiempos(0, SEC_POR_REP, DESCANSO_ENTRE_SERIES)
+    return perfil
+
+
 def estado_vacio() -> Dict:
     return {
         "usuarios": [],
@@ -226,6 +431,7 @@ def estado_vacio() -> Dict:
         "idx_usuarios": {},
         "idx_ejercicios": {},
         "idx_rutinas": {},
+        "perfil_tiempos": mk_perfil_tiempos(0, SEC_POR_REP, DESCANSO_ENTRE_SERIES),
     }
 
 def _input_no_vacio(msg: str) -> str:
@@ -301,6 +507,44 @@ def agregar_usuario(st: Dict, nombre: str, edad: int) -> Dict:
     return {**st, "usuarios": st["usuarios"] + [u], "idx_usuarios": nuevos_idx}
 
 
+def _reemplazar_usuario(st: Dict, u: Dict, u2: Dict) -> Dict:
+    idx = dict(st["idx_usuarios"])
+    idx.pop(_norm(u["nombre"]), None)
+    idx[_norm(u2["nombre"])] = u2
+    nuevos = list(map(lambda x: u2 if x is u else x, st["usuarios"]))
+    return {**st, "usuarios": nuevos, "idx_usuarios": idx}
+
+
+def renombrar_usuario(st: Dict, nombre: str, nuevo_nombre: str) -> Dict:
+    u = buscar_usuario(st, nombre)
+    if u is None:
+        raise ValueError("Usuario no encontrado.")
+    new_key = _norm(nuevo_nombre)
+    if new_key != _norm(u["nombre"]) and new_key in st["idx_usuarios"]:
+        raise ValueError("Ya existe un usuario con ese nombre.")
+    u2 = {**u, "nombre": nuevo_nombre.strip()}
+    validar_usuario(u2)
+    return _reemplazar_usuario(st, u, u2)
+
+
+def eliminar_usuario(st: Dict, nombre: str) -> Dict:
+    u = buscar_usuario(st, nombre)
+    if u is None:
+        raise ValueError("Usuario no encontrado.")
+    idx = dict(st["idx_usuarios"])
+    del idx[_norm(nombre)]
+    return {**st, "usuarios": _sin(st["usuarios"], u), "idx_usuarios": idx}
+
+
+def cambiar_edad_usuario(st: Dict, nombre: str, nueva_edad: int) -> Dict:
+    u = buscar_usuario(st, nombre)
+    if u is None:
+        raise ValueError("Usuario no encontrado.")
+    validacion.USUARIO.validar({"edad": nueva_edad}, parcial=True)
+    u2 = {**u, "edad": int(nueva_edad)}
+    return _reemplazar_usuario(st, u, u2)
+
+
 def listar_usuarios(st: Dict) -> None:
     if not st["usuarios"]:
         _print("No hay usuarios.")
@@ -341,7 +585,10 @@ def crear_ejercicio(st: Dict, nombre: str, rep: int, ser: int) -> Dict:
     key = _norm(nombre)
     if key in st["idx_ejercicios"]:
         raise ValueError("Ya existe un ejercicio en el catálogo con ese nombre.")
-    ej = mk_ejercicio(nombre, rep, ser)
+    perfil = _perfil_tiempos(st)
+    ej = mk_ejercicio(
+        nombre, rep, ser, perfil["sec_por_rep"], perfil["descanso_entre_series"]
+    )
     idx = dict(st["idx_ejercicios"])
     idx[key] = ej
     _print(
@@ -354,6 +601,35 @@ def crear_ejercicio(st: Dict, nombre: str, rep: int, ser: int) -> Dict:
     }
 
 
+def _reemplazar_ejercicio(st: Dict, ej: Dict, ej2: Dict) -> Dict:
+    idx = dict(st["idx_ejercicios"])
+    idx.pop(_norm(ej["nombre"]), None)
+    idx[_norm(ej2["nombre"])] = ej2
+    catalogo = list(map(lambda x: ej2 if x is ej else x, st["ejercicios_catalogo"]))
+    return {**st, "idx_ejercicios": idx, "ejercicios_catalogo": catalogo}
+
+
+def renombrar_ejercicio(st: Dict, nombre: str, nuevo_nombre: str) -> Dict:
+    ej = buscar_ejercicio(st, nombre)
+    if ej is None:
+        raise ValueError("Ese ejercicio no existe en el catálogo.")
+    new_key = _norm(nuevo_nombre)
+    if new_key != _norm(ej["nombre"]) and new_key in st["idx_ejercicios"]:
+        raise ValueError("Ya existe un ejercicio en el catálogo con ese nombre.")
+    ej2 = {**ej, "nombre": nuevo_nombre.strip()}
+    validar_ejercicio(ej2)
+    return _reemplazar_ejercicio(st, ej, ej2)
+
+
+def actualizar_ejercicio_catalogo(
+    st: Dict, nombre: str, rep: Optional[int] = None, ser: Optional[int] = None
+) -> Dict:
+    ej = buscar_ejercicio(st, nombre)
+    if ej is None:
+        raise ValueError("Ese ejercicio no existe en el catálogo.")
+    return _reemplazar_ejercicio(st, ej, actualizar_ejercicio(ej, rep, ser))
+
+
 def listar_ejercicios(st: Dict) -> None:
     if not st["ejercicios_catalogo"]:
         _print("(Catálogo vacío)")
@@ -375,7 +651,7 @@ def eliminar_ejercicio(st: Dict, nombre: str) -> Dict:
     if ej is None:
         raise ValueError("No se encontró el ejercicio para eliminar.")
     
-    nueva_lista = list(filter(lambda e: e is not ej, st["ejercicios_catalogo"]))
+    nueva_lista = _sin(st["ejercicios_catalogo"], ej)
 
     def quitar_en_rutina(r: Dict) -> Dict:
         try:
@@ -384,16 +660,91 @@ def eliminar_ejercicio(st: Dict, nombre: str) -> Dict:
             return r
 
     nuevas_rutinas = list(map(quitar_en_rutina, st["rutinas"]))
+    # El índice debe apuntar a las rutinas nuevas, no a las que aún lo tienen.
+    cambiadas = map(
+        lambda par: par[1],
+        filter(lambda par: par[0] is not par[1], zip(st["rutinas"], nuevas_rutinas)),
+    )
+    idx_rutinas = {
+        **st["idx_rutinas"],
+        **dict(map(lambda r: (_norm(r["nombre"]), r), cambiadas)),
+    }
     nuevo_idx = dict(st["idx_ejercicios"])
     nuevo_idx.pop(key, None)
     return {
         **st,
         "ejercicios_catalogo": nueva_lista,
         "rutinas": nuevas_rutinas,
+        "idx_rutinas": idx_rutinas,
         "idx_ejercicios": nuevo_idx,
     }
 
 
+def aplicar_perfil_tiempos(
+    st: Dict, sec_por_rep: int, descanso_entre_series: int, todos: bool = False
+) -> Dict:
+    """
+    Nueva versión del perfil de tiempos. En una pasada reescribe los
+    ejercicios que seguían el perfil anterior (o todos si `todos`) en el
+    catálogo, las rutinas y las rutinas de cada usuario, y recalcula
+    duracion_seg, huella y total_seg. Un ejercicio o rutina compartido se
+    reescribe una sola vez y sigue compartido.
+    """
+    anterior = _perfil_tiempos(st)
+    perfil = mk_perfil_tiempos(anterior["version"] + 1, sec_por_rep, descanso_entre_series)
+    tiempos_previos = (anterior["sec_por_rep"], anterior["descanso_entre_series"])
+    nuevos_tiempos = {
+        "sec_por_rep": perfil["sec_por_rep"],
+        "descanso_entre_series": perfil["descanso_entre_series"],
+    }
+    # id del dict original -> reemplazo (los originales siguen vivos en `st`).
+    ejercicios: Dict[int, Dict] = {}
+    rutinas: Dict[int, Dict] = {}
+
+    def ej_nuevo(e: Dict) -> Dict:
+        if id(e) not in ejercicios:
+            sigue = (e["sec_por_rep"], e["descanso_entre_series"]) == tiempos_previos
+            ejercicios[id(e)] = {**e, **nuevos_tiempos} if todos or sigue else e
+        return ejercicios[id(e)]
+
+    def rutina_nueva(r: Dict) -> Dict:
+        if id(r) not in rutinas:
+            lista = list(map(ej_nuevo, r["ejercicios"]))
+            igual = all(map(lambda par: par[0] is par[1], zip(lista, r["ejercicios"])))
+            rutinas[id(r)] = (
+                r
+                if igual
+                else _rutina_con(
+                    r,
+                    lista,
+                    _claves_rutina(r),
+                    sum(map(duracion_ejercicio_seg, lista)),
+                    sum(map(_huella_ejercicio, lista)) & _MASCARA_HUELLA,
+                )
+            )
+        return rutinas[id(r)]
+
+    def usuario_nuevo(u: Dict) -> Dict:
+        lista = list(map(rutina_nueva, u["rutinas"]))
+        if all(map(lambda par: par[0] is par[1], zip(lista, u["rutinas"]))):
+            return u
+        return {**u, "rutinas": lista, "total_seg": sum(map(_segundos_rutina, lista))}
+
+    catalogo = list(map(ej_nuevo, st["ejercicios_catalogo"]))
+    lista_rutinas = list(map(rutina_nueva, st["rutinas"]))
+    usuarios = list(map(usuario_nuevo, st["usuarios"]))
+    return {
+        **st,
+        "ejercicios_catalogo": catalogo,
+        "rutinas": lista_rutinas,
+        "usuarios": usuarios,
+        "idx_ejercicios": dict(map(lambda e: (_norm(e["nombre"]), e), catalogo)),
+        "idx_rutinas": dict(map(lambda r: (_norm(r["nombre"]), r), lista_rutinas)),
+        "idx_usuarios": dict(map(lambda u: (_norm(u["nombre"]), u), usuarios)),
+        "perfil_tiempos": perfil,
+    }
+
+
 def obtener_ejercicios_por_nombres(st: Dict, nombres: List[str]) -> List[Dict]:
     def go(pend: List[str], vistos: set, acc: List[Dict]) -> List[Dict]:
         if not pend:
@@ -427,6 +778,49 @@ def crear_rutina(
     return {**st, "rutinas": st["rutinas"] + [r], "idx_rutinas": idx}
 
 
+def proponer_rutina(
+    st: Dict,
+    minutos: float,
+    incluir: Tuple[str, ...] = (),
+    max_ejercicios: Optional[int] = None,
+    tolerancia_seg: int = constructor_rutinas.TOLERANCIA_SEG,
+    cache: Optional[Dict] = None,
+) -> constructor_rutinas.RutinaPropuesta:
+    """Ejercicios del catálogo que suman `minutos` (ver constructor_rutinas).
+
+    `cache` (opcional) guarda el constructor entre llamadas mientras el
+    catálogo no cambie; sin él se arma uno nuevo cada vez.
+    """
+    catalogo = st["ejercicios_catalogo"]
+    if not catalogo:
+        raise ValueError("Primero crea ejercicios en el catálogo.")
+    cache = {} if cache is None else cache
+    # Cada cambio al catálogo crea otra lista: basta comparar identidad.
+    previo = cache.get("catalogo")
+    if previo is None or previo[0] is not catalogo:
+        previo = (catalogo, constructor_rutinas.ConstructorRutinas(catalogo))
+        cache["catalogo"] = previo
+    return previo[1].proponer(
+        int(round(minutos * 60)), tolerancia_seg, incluir, (), max_ejercicios
+    )
+
+
+def construir_rutina(
+    st: Dict,
+    nombre: str,
+    descripcion: str,
+    minutos: float,
+    incluir: Tuple[str, ...] = (),
+    max_ejercicios: Optional[int] = None,
+    tolerancia_seg: int = constructor_rutinas.TOLERANCIA_SEG,
+    cache: Optional[Dict] = None,
+) -> Dict:
+    propuesta = proponer_rutina(st, minutos, incluir, max_ejercicios, tolerancia_seg, cache)
+    return crear_rutina(
+        st, nombre, descripcion, list(map(lambda e: e["nombre"], propuesta.ejercicios))
+    )
+
+
 def listar_rutinas(st: Dict) -> None:
     if not st["rutinas"]:
         _print("No hay rutinas.")
@@ -456,6 +850,34 @@ def listar_rutinas(st: Dict) -> None:
     go(st["rutinas"])
 
 
+def _texto_rutinas(rutinas: List[Dict], inicio: int, fin: int) -> str:
+    # El mismo texto que listar_rutinas (sin la línea inicial) para rutinas[inicio:fin].
+    def bloque(r: Dict) -> List[str]:
+        return (
+            [str_rutina(r)]
+            + list(map(lambda e: f"  • {str_ejercicio(e)}", r["ejercicios"]))
+            + ["-" * 60]
+        )
+
+    lineas = chain.from_iterable(map(bloque, rutinas[inicio:fin]))
+    return "".join(map(lambda linea: linea + "\n", lineas))
+
+
+def listar_rutinas_paralelo(
+    st: Dict,
+    salida: Optional[TextIO] = None,
+    procesos: Optional[int] = None,
+    tam_bloque: int = 500,
+) -> None:
+    """listar_rutinas repartido entre varios procesos (misma salida)."""
+    if not st["rutinas"]:
+        print("No hay rutinas.", file=salida)
+        return
+    salida = sys.stdout if salida is None else salida
+    salida.write("-" * 60 + "\n")
+    reportes.escribir_paralelo(st["rutinas"], _texto_rutinas, salida, procesos, tam_bloque)
+
+
 def editar_rutina(
     st: Dict,
     nombre: str,
@@ -478,6 +900,50 @@ def editar_rutina(
     return {**st, "rutinas": nuevas_rutinas, "idx_rutinas": idx}
 
 
+def eliminar_rutina(st: Dict, nombre: str) -> Dict:
+    """Quita la rutina y, en cascada, la desasigna de los usuarios que la tenían."""
+    r = buscar_rutina(st, nombre)
+    if r is None:
+        raise ValueError("Rutina no encontrada.")
+    idx = dict(st["idx_rutinas"])
+    del idx[_norm(nombre)]
+    usuarios = list(
+        map(lambda u: usuario_quitar_rutina(u, r["nombre"]), st["usuarios"])
+    )
+    cambiados = map(
+        lambda par: par[1],
+        filter(lambda par: par[0] is not par[1], zip(st["usuarios"], usuarios)),
+    )
+    idx_usuarios = {
+        **st["idx_usuarios"],
+        **dict(map(lambda u: (_norm(u["nombre"]), u), cambiados)),
+    }
+    return {
+        **st,
+        "rutinas": _sin(st["rutinas"], r),
+        "idx_rutinas": idx,
+        "usuarios": usuarios,
+        "idx_usuarios": idx_usuarios,
+    }
+
+
+def rutinas_duplicadas(st: Dict) -> List[List[Dict]]:
+    """Grupos de rutinas con el mismo contenido, en orden de alta."""
+    pares = sorted(
+        enumerate(st["rutinas"]), key=lambda par: (_huella_rutina(par[1]), par[0])
+    )
+    grupos = filter(
+        lambda g: len(g) > 1,
+        map(lambda hg: list(hg[1]), groupby(pares, key=lambda par: _huella_rutina(par[1]))),
+    )
+    return list(
+        map(
+            lambda g: list(map(lambda par: par[1], g)),
+            sorted(grupos, key=lambda g: g[0][0]),
+        )
+    )
+
+
 def rutina_agregar_ejercicio_st(
     st: Dict, nombre_rutina: str, nombre_ejercicio: str
 ) -> Dict:
@@ -538,40 +1004,483 @@ def asignar_rutina_a_usuario(st: Dict, nombre_usuario: str, nombre_rutina: str)
     return {**st, "usuarios": nuevos_usuarios, "idx_usuarios": idx}
 
 
-def reporte_por_usuario(st: Dict) -> None:
+# -------------------- Bitácora de sesiones --------------------
+
+def registrar_sesion(
+    b: bitacora.BitacoraSesiones,
+    st: Dict,
+    nombre_usuario: str,
+    nombre_rutina: str,
+    fecha: Optional[bitacora.Fecha] = None,
+    series: Optional[int] = None,
+    repeticiones: Optional[int] = None,
+    duracion_seg: Optional[int] = None,
+) -> None:
+    """Anota en `b` una sesión de una rutina asignada; lo omitido sale del plan."""
+    u = buscar_usuario(st, nombre_usuario)
+    if u is None:
+        raise ValueError("Usuario no encontrado.")
+    key = _norm(nombre_rutina)
+    r = next(filter(lambda x: _norm(x["nombre"]) == key, u["rutinas"]), None)
+    if r is None:
+        raise ValueError("El usuario no tiene asignada esa rutina.")
+    plan = acumulados.plan_de_rutina(r["ejercicios"])
+    b.registrar(
+        u["nombre"],
+        r["nombre"],
+        datetime.now() if fecha is None else fecha,
+        sum(map(lambda p: p[1], plan)) if series is None else series,
+        sum(map(lambda p: p[2], plan)) if repeticiones is None else repeticiones,
+        _segundos_rutina(r) if duracion_seg is None else duracion_seg,
+        plan,
+    )
+
+
+def sesiones_de_usuario(
+    b: bitacora.BitacoraSesiones, st: Dict, nombre_usuario: str, dias: int = 30
+) -> List[bitacora.Sesion]:
+    u = buscar_usuario(st, nombre_usuario)
+    if u is None:
+        raise ValueError("Usuario no encontrado.")
+    return b.ultimos_dias(u["nombre"], dias)
+
+
+def volumen_usuario(
+    a: acumulados.Acumulados,
+    st: Dict,
+    nombre_usuario: str,
+    granularidad: str = "semana",
+    desde: Optional[bitacora.Fecha] = None,
+    hasta: Optional[bitacora.Fecha] = None,
+) -> List[Tuple]:
+    u = buscar_usuario(st, nombre_usuario)
+    if u is None:
+        raise ValueError("Usuario no encontrado.")
+    return a.de_usuario(u["nombre"], granularidad, desde, hasta)
+
+
+def volumen_ejercicio(
+    a: acumulados.Acumulados,
+    st: Dict,
+    nombre_ejercicio: str,
+    granularidad: str = "semana",
+    desde: Optional[bitacora.Fecha] = None,
+    hasta: Optional[bitacora.Fecha] = None,
+) -> List[Tuple]:
+    ej = buscar_ejercicio(st, nombre_ejercicio)
+    if ej is None:
+        raise ValueError("Ese ejercicio no existe en el catálogo.")
+    return a.de_ejercicio(ej["nombre"], granularidad, desde, hasta)
+
+
+def _filas_de_usuario(u: Dict) -> Iterator[Tuple]:
+    if not u["rutinas"]:
+        return iter([(u["nombre"], u["edad"], None, None)])
+    return map(
+        lambda r: (u["nombre"], u["edad"], r["nombre"], rutina_duracion_total_min(r)),
+        u["rutinas"],
+    )
+
+
+def filas_reporte(st: Dict) -> Iterator[Tuple[str, int, Optional[str], Optional[float]]]:
+    """Genera perezosamente (usuario, edad, rutina, duracion_min) por rutina asignada."""
+    return chain.from_iterable(map(_filas_de_usuario, st["usuarios"]))
+
+
+def reporte_por_usuario(st: Dict, salida: Optional[TextIO] = None) -> None:
     if not st["usuarios"]:
-        _print("No hay usuarios.")
+        print("No hay usuarios.", file=salida)
+        return
+    reportes.escribir_texto(
+        filas_reporte(st), sys.stdout if salida is None else salida, minutos_a_texto
+    )
+
+
+def reporte_paralelo(
+    st: Dict,
+    salida: Optional[TextIO] = None,
+    procesos: Optional[int] = None,
+    tam_bloque: int = 2000,
+) -> None:
+    """
+    reporte_por_usuario repartido entre varios procesos (misma salida). Las
+    duraciones ya viven en cada rutina del estado: los trabajadores solo
+    arman y formatean las filas.
+    """
+    if not st["usuarios"]:
+        print("No hay usuarios.", file=salida)
         return
+    reportes.reporte_paralelo(
+        st["usuarios"],
+        _filas_de_usuario,
+        minutos_a_texto,
+        sys.stdout if salida is None else salida,
+        procesos,
+        tam_bloque,
+    )
+
+
+def exportar_reporte(st: Dict, ruta: str, formato: str = "csv") -> int:
+    """Escribe el reporte por usuario en un archivo (csv, jsonl o texto)."""
+    return reportes.exportar_reporte(filas_reporte(st), ruta, formato, minutos_a_texto)
+
+
+# -------------------- Lotes atómicos --------------------
+
+
+def ejecutar_lote(st: Dict, operaciones: List[Tuple]) -> Dict:
+    """
+    Aplica en orden una lista de (operación, *args) donde cada operación recibe
+    el estado y devuelve uno nuevo. Si alguna falla, se lanza ValueError y el
+    estado original `st` queda intacto (no hay nada que revertir).
+    Ejemplo: [(crear_rutina, "Pierna", "Día 1", ["Sentadilla"]), ...]
+    """
+
+    def paso(acc: Dict, par: Tuple[int, Tuple]) -> Dict:
+        i, (op, *args) = par
+        try:
+            return op(acc, *args)
+        except ValueError as e:
+            raise ValueError(
+                f"Operación {i + 1} ({op.__name__}): {e} Se revirtió todo el lote."
+            ) from e
+
+    return reduce(paso, enumerate(operaciones), st)
+
+
+# -------------------- Eventos de cambio --------------------
+
+
+def _datos_de(*campos: str):
+    # Los argumentos opcionales omitidos quedan en None.
+    return lambda st, st2, args: dict(
+        zip(campos, tuple(args) + (None,) * (len(campos) - len(args)))
+    )
+
+
+def _datos_construir_rutina(st: Dict, st2: Dict, args: Tuple) -> Dict:
+    r = st2["rutinas"][-1]
+    return {
+        "nombre": r["nombre"],
+        "descripcion": r["descripcion"],
+        "ejercicios": list(map(lambda e: e["nombre"], r["ejercicios"])),
+    }
+
+
+def _datos_eliminar_rutina(st: Dict, st2: Dict, args: Tuple) -> Dict:
+    afectados = list(
+        map(
+            lambda par: par[1]["nombre"],
+            filter(lambda par: par[0] is not par[1], zip(st["usuarios"], st2["usuarios"])),
+        )
+    )
+    return {"nombre": args[0], "usuarios": afectados}
+
+
+def _datos_eliminar_ejercicio(st: Dict, st2: Dict, args: Tuple) -> Dict:
+    afectadas = list(
+        map(
+            lambda par: par[1]["nombre"],
+            filter(lambda par: par[0] is not par[1], zip(st["rutinas"], st2["rutinas"])),
+        )
+    )
+    return {"nombre": args[0], "rutinas": afectadas}
+
+
+def _datos_perfil_tiempos(st: Dict, st2: Dict, args: Tuple) -> Dict:
+    def ids(s: Dict) -> set:
+        return set(
+            map(
+                id,
+                chain(
+                    s["ejercicios_catalogo"],
+                    chain.from_iterable(map(lambda r: r["ejercicios"], s["rutinas"])),
+                ),
+            )
+        )
 
-    def imprimir_u(u: Dict) -> None:
-        _print("=" * 60)
-        _print(f"Usuario: {u['nombre']} | Edad: {u['edad']}")
-        if not u["rutinas"]:
-            _print("  (Sin rutinas asignadas)")
+    perfil = _perfil_tiempos(st2)
+    return {
+        "version": perfil["version"],
+        "sec_por_rep": perfil["sec_por_rep"],
+        "descanso_entre_series": perfil["descanso_entre_series"],
+        "todos": bool(args[2]) if len(args) > 2 else False,
+        "ejercicios": len(ids(st2) - ids(st)),
+    }
+
+
+# Operación -> (tipo de evento, datos a partir de estado previo, nuevo y args).
+EVENTOS_POR_OPERACION = {
+    agregar_usuario: (eventos.USUARIO_AGREGADO, _datos_de("nombre", "edad")),
+    renombrar_usuario: (eventos.USUARIO_RENOMBRADO, _datos_de("nombre", "nuevo_nombre")),
+    cambiar_edad_usuario: (eventos.USUARIO_EDAD_CAMBIADA, _datos_de("nombre", "edad")),
+    eliminar_usuario: (eventos.USUARIO_ELIMINADO, _datos_de("nombre")),
+    crear_ejercicio: (
+        eventos.EJERCICIO_CREADO,
+        _datos_de("nombre", "repeticiones", "series"),
+    ),
+    renombrar_ejercicio: (
+        eventos.EJERCICIO_RENOMBRADO,
+        _datos_de("nombre", "nuevo_nombre"),
+    ),
+    actualizar_ejercicio_catalogo: (
+        eventos.EJERCICIO_ACTUALIZADO,
+        _datos_de("nombre", "repeticiones", "series"),
+    ),
+    eliminar_ejercicio: (eventos.EJERCICIO_ELIMINADO, _datos_eliminar_ejercicio),
+    crear_rutina: (
+        eventos.RUTINA_CREADA,
+        _datos_de("nombre", "descripcion", "ejercicios"),
+    ),
+    construir_rutina: (eventos.RUTINA_CREADA, _datos_construir_rutina),
+    editar_rutina: (
+        eventos.RUTINA_EDITADA,
+        _datos_de("nombre", "nuevo_nombre", "descripcion"),
+    ),
+    eliminar_rutina: (eventos.RUTINA_ELIMINADA, _datos_eliminar_rutina),
+    rutina_agregar_ejercicio_st: (
+        eventos.RUTINA_EJERCICIO_AGREGADO,
+        _datos_de("rutina", "ejercicio"),
+    ),
+    rutina_eliminar_ejercicio_st: (
+        eventos.RUTINA_EJERCICIO_ELIMINADO,
+        _datos_de("rutina", "ejercicio"),
+    ),
+    rutina_actualizar_ejercicio_st: (
+        eventos.RUTINA_EJERCICIO_ACTUALIZADO,
+        _datos_de("rutina", "ejercicio", "repeticiones", "series"),
+    ),
+    asignar_rutina_a_usuario: (eventos.RUTINA_ASIGNADA, _datos_de("usuario", "rutina")),
+    aplicar_perfil_tiempos: (eventos.PERFIL_TIEMPOS_CAMBIADO, _datos_perfil_tiempos),
+}
+
+
+def aplicar_con_eventos(bus: eventos.BusEventos, st: Dict, op, *args) -> Dict:
+    """
+    Aplica op(st, *args) y, si tuvo éxito, publica en `bus` el evento que
+    corresponde a la operación (ver EVENTOS_POR_OPERACION).
+    """
+    st2 = op(st, *args)
+    tipo, datos = EVENTOS_POR_OPERACION[op]
+    bus.emitir(tipo, **datos(st, st2, args))
+    return st2
+
+
+def _con_eventos(bus: eventos.BusEventos, op):
+    def envuelta(st: Dict, *args) -> Dict:
+        return aplicar_con_eventos(bus, st, op, *args)
+
+    envuelta.__name__ = op.__name__
+    return envuelta
+
+
+def ejecutar_lote_con_eventos(
+    bus: eventos.BusEventos, st: Dict, operaciones: List[Tuple]
+) -> Dict:
+    """Como ejecutar_lote; los eventos salen juntos y solo si el lote entero tuvo éxito."""
+    envueltas = list(
+        map(lambda par: (_con_eventos(bus, par[0]), *par[1:]), operaciones)
+    )
+    with bus.lote():
+        return ejecutar_lote(st, envueltas)
+
+
+# -------------------- Historial (deshacer / rehacer) --------------------
+
+HISTORIAL_PROFUNDIDAD = 50
+HISTORIAL_PRESUPUESTO = 16 * 1024 * 1024
+
+
+def _bytes_no_compartidos(base: Dict, st: Dict) -> int:
+    """
+    Bytes aproximados que `st` no comparte con `base`. Cada operación copia
+    solo las listas/índices que toca y reutiliza el resto de los dicts, así
+    que guardar un estado cuesta lo que cambió, no el gimnasio entero.
+    """
+
+    def costo(clave: str) -> int:
+        valor, anterior = st[clave], base.get(clave)
+        if valor is anterior:
+            return 0
+        if isinstance(valor, dict):
+            previos = set(map(id, anterior.values())) if isinstance(anterior, dict) else set()
+            elementos = valor.values()
+        elif isinstance(valor, list):
+            previos = set(map(id, anterior)) if isinstance(anterior, list) else set()
+            elementos = valor
         else:
+            return sys.getsizeof(valor)
+        return sys.getsizeof(valor) + sum(
+            map(lambda x: 0 if id(x) in previos else sys.getsizeof(x), elementos)
+        )
 
-            def go(lst: List[Dict]) -> None:
-                if not lst:
-                    return
-                cabeza, resto = lst[0], lst[1:]
-                _print(
-                    f"  - {cabeza['nombre']}: {minutos_a_texto(rutina_duracion_total_min(cabeza))}"
-                )
-                go(resto)
+    return sys.getsizeof(st) + sum(map(costo, st))
 
-            go(u["rutinas"])
 
-    def go(lst: List[Dict]) -> None:
-        if not lst:
-            _print("=" * 60)
-            return
-        cabeza, resto = lst[0], lst[1:]
-        imprimir_u(cabeza)
-        go(resto)
+def mk_historial(
+    st: Dict,
+    profundidad: int = HISTORIAL_PROFUNDIDAD,
+    presupuesto_bytes: int = HISTORIAL_PRESUPUESTO,
+) -> Dict:
+    """
+    Historial acotado de estados. `pasado` y `futuro` son tuplas de
+    (estado, bytes no compartidos con su vecino); se descartan los más viejos
+    al superar la profundidad o el presupuesto de memoria.
+    """
+    if profundidad < 0:
+        raise ValueError("La profundidad del historial no puede ser negativa.")
+    if presupuesto_bytes <= 0:
+        raise ValueError("El presupuesto de memoria debe ser mayor a 0.")
+    return {
+        "presente": st,
+        "pasado": (),
+        "futuro": (),
+        "profundidad": profundidad,
+        "presupuesto_bytes": presupuesto_bytes,
+    }
 
-    go(st["usuarios"])
 
-def menu_principal(st: Dict) -> None:
+def _recortar_historial(h: Dict) -> Dict:
+    pasado = h["pasado"][-h["profundidad"]:] if h["profundidad"] else ()
+    usado_futuro = sum(map(lambda par: par[1], h["futuro"]))
+    caben = len(
+        list(
+            takewhile(
+                lambda acum: acum + usado_futuro <= h["presupuesto_bytes"],
+                accumulate(map(lambda par: par[1], reversed(pasado))),
+            )
+        )
+    )
+    return {**h, "pasado": pasado[len(pasado) - caben:] if caben else ()}
+
+
+def historial_registrar(h: Dict, st: Dict) -> Dict:
+    """Fija `st` como estado actual; lo que se podía rehacer se descarta."""
+    if st is h["presente"]:
+        return h
+    entrada = (h["presente"], _bytes_no_compartidos(st, h["presente"]))
+    return _recortar_historial(
+        {**h, "presente": st, "pasado": h["pasado"] + (entrada,), "futuro": ()}
+    )
+
+
+def historial_aplicar(h: Dict, op, *args) -> Dict:
+    """Aplica op(estado_actual, *args) y registra el resultado."""
+    return historial_registrar(h, op(h["presente"], *args))
+
+
+def historial_deshacer(h: Dict) -> Dict:
+    if not h["pasado"]:
+        raise ValueError("No hay cambios para deshacer.")
+    anterior, _ = h["pasado"][-1]
+    entrada = (h["presente"], _bytes_no_compartidos(anterior, h["presente"]))
+    return {
+        **h,
+        "presente": anterior,
+        "pasado": h["pasado"][:-1],
+        "futuro": (entrada,) + h["futuro"],
+    }
+
+
+def historial_rehacer(h: Dict) -> Dict:
+    if not h["futuro"]:
+        raise ValueError("No hay cambios para rehacer.")
+    siguiente, _ = h["futuro"][0]
+    entrada = (h["presente"], _bytes_no_compartidos(siguiente, h["presente"]))
+    return _recortar_historial(
+        {
+            **h,
+            "presente": siguiente,
+            "pasado": h["pasado"] + (entrada,),
+            "futuro": h["futuro"][1:],
+        }
+    )
+
+
+def historial_estadisticas(h: Dict) -> Dict[str, int]:
+    return {
+        "deshacer_disponibles": len(h["pasado"]),
+        "rehacer_disponibles": len(h["futuro"]),
+        "bytes_estimados": sum(
+            map(lambda par: par[1], chain(h["pasado"], h["futuro"]))
+        ),
+        "profundidad": h["profundidad"],
+        "presupuesto_bytes": h["presupuesto_bytes"],
+    }
+
+
+def resumen_usuario(st: Dict, nombre: str) -> Optional[Dict]:
+    """
+    Resumen del plan de un usuario: rutinas con sus minutos y total. Las
+    duraciones ya viven en cada rutina y en el usuario, no se recalculan.
+    """
+    u = buscar_usuario(st, nombre)
+    return None if u is None else _resumen(u)
+
+
+def sesion_menu(st: Dict) -> Dict:
+    """Registros que el menú lleva aparte del estado durante una sesión.
+
+    La bitácora y los acumulados son de solo-añadir: siguen los renombres y
+    bajas por los eventos que el menú publica en `eventos` con
+    `aplicar_con_eventos`. `constructor` es la caché de `proponer_rutina` e
+    `historial` guarda los estados por los que pasa el menú, empezando en `st`.
+    """
+    bus = eventos.BusEventos()
+    b = bitacora.BitacoraSesiones()
+    b.seguir(bus)
+    acum = acumulados.Acumulados()
+    acum.seguir(bus, b.eventos)
+    return {
+        "eventos": bus,
+        "bitacora": b,
+        "acumulados": acum,
+        "constructor": {},
+        "historial": mk_historial(st),
+    }
+
+
+def _registrar(sesion: Dict, st: Dict) -> None:
+    # Cada menú vuelve a entrar con el estado resultante: registrarlo al
+    # entrar guarda cada cambio una vez (el mismo estado no cuenta).
+    sesion["historial"] = historial_registrar(sesion["historial"], st)
+
+
+_RENOMBRES = (
+    ("usuarios", eventos.USUARIO_RENOMBRADO),
+    ("ejercicios_catalogo", eventos.EJERCICIO_RENOMBRADO),
+    ("rutinas", eventos.RUTINA_EDITADA),
+)
+
+
+def _publicar_renombres(bus: eventos.BusEventos, antes: Dict, despues: Dict) -> None:
+    """
+    Deshacer o rehacer salta de estado sin pasar por las operaciones: los
+    nombres que cambian en la misma posición se publican como renombres para
+    que la bitácora y los acumulados sigan al usuario, ejercicio o rutina.
+    Las bajas no se revierten en ellos (el nombre ya quedó libre).
+    """
+    for clave, tipo in _RENOMBRES:
+        if len(antes[clave]) != len(despues[clave]):
+            continue
+        cambios = filter(
+            lambda par: par[0]["nombre"] != par[1]["nombre"],
+            zip(antes[clave], despues[clave]),
+        )
+        for a, d in cambios:
+            extra = {"descripcion": d["descripcion"]} if tipo == eventos.RUTINA_EDITADA else {}
+            bus.emitir(tipo, nombre=a["nombre"], nuevo_nombre=d["nombre"], **extra)
+
+
+def _moverse_en_historial(st: Dict, sesion: Dict, paso) -> Dict:
+    h = paso(sesion["historial"])
+    _publicar_renombres(sesion["eventos"], st, h["presente"])
+    sesion["historial"] = h
+    return h["presente"]
+
+
+def menu_principal(st: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print("\n=== MENÚ PRINCIPAL ===")
     _print("1) Usuarios")
     _print("2) Ejercicios (catálogo)")
@@ -580,14 +1489,16 @@ def menu_principal(st: Dict) -> None:
     _print("5) Mostrar rutinas de un usuario")
     _print("6) Reporte por usuario")
     _print("7) Salir")
+    _print("8) Deshacer último cambio")
+    _print("9) Rehacer")
     op = input("Opción: ").strip()
     try:
         if op == "1":
-            return menu_usuarios(st)
+            return menu_usuarios(st, sesion)
         elif op == "2":
-            return menu_ejercicios(st)
+            return menu_ejercicios(st, sesion)
         elif op == "3":
-            return menu_rutinas(st)
+            return menu_rutinas(st, sesion)
         elif op == "4":
             u = _pedir_usuario_nombre()
             _print("\nRutinas disponibles:")
@@ -620,26 +1531,34 @@ def menu_principal(st: Dict) -> None:
                     go_msgs(resto)
 
                 go_msgs(errores)
-                return menu_principal(st2)
+                return menu_principal(st2, sesion)
             else:
                 _print("Rutinas asignadas.")
-                return menu_principal(st2)
+                return menu_principal(st2, sesion)
         elif op == "5":
             nombre = input("Usuario: ").strip()
             mostrar_rutinas_de_usuario(st, nombre)
-            return menu_principal(st)
+            return menu_principal(st, sesion)
         elif op == "6":
             reporte_por_usuario(st)
-            return menu_principal(st)
+            return menu_principal(st, sesion)
         elif op == "7":
             _print("Hasta luego.")
             return None
+        elif op == "8":
+            st2 = _moverse_en_historial(st, sesion, historial_deshacer)
+            _print("Cambio deshecho.")
+            return menu_principal(st2, sesion)
+        elif op == "9":
+            st2 = _moverse_en_historial(st, sesion, historial_rehacer)
+            _print("Cambio rehecho.")
+            return menu_principal(st2, sesion)
         else:
             _print("Opción no válida.")
-            return menu_principal(st)
+            return menu_principal(st, sesion)
     except ValueError as e:
         _print(f"[Error] {e}")
-        return menu_principal(st)
+        return menu_principal(st, sesion)
 
 
 def _pedir_no_vacio(msg: str) -> str:
@@ -661,12 +1580,17 @@ def _pedir_usuario_nombre() -> str:
 # ---- Submenú Usuarios ----
 
 
-def menu_usuarios(st: Dict) -> None:
+def menu_usuarios(st: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print("\n--- Usuarios ---")
     _print("1) Agregar")
     _print("2) Listar")
     _print("3) Editar usuario")
-    _print("4) Volver")
+    _print("4) Eliminar usuario")
+    _print("5) Registrar sesión realizada")
+    _print("6) Ver sesiones de los últimos 30 días")
+    _print("7) Ver volumen de las últimas 4 semanas")
+    _print("8) Volver")
     op = input("Opción: ").strip()
     if op == "1":
         nombre = _repetir_hasta(
@@ -678,25 +1602,90 @@ def menu_usuarios(st: Dict) -> None:
         try:
             st2 = agregar_usuario(st, nombre, edad)
             _print("Usuario agregado.")
-            return menu_usuarios(st2)
+            return menu_usuarios(st2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return menu_usuarios(st)
+            return menu_usuarios(st, sesion)
     elif op == "2":
         listar_usuarios(st)
-        return menu_usuarios(st)
+        return menu_usuarios(st, sesion)
     elif op == "3":
         nombre = _input_no_vacio("Nombre del usuario a editar: ")
         u = buscar_usuario(st, nombre)
         if u is None:
             _print("No existe ese usuario.")
-            return menu_usuarios(st)
-        return submenu_editar_usuario(st, u)
+            return menu_usuarios(st, sesion)
+        return submenu_editar_usuario(st, u, sesion)
     elif op == "4":
-        return menu_principal(st)
+        nombre = _input_no_vacio("Nombre a eliminar: ")
+        try:
+            st2 = aplicar_con_eventos(sesion["eventos"], st, eliminar_usuario, nombre)
+            _print("Usuario eliminado.")
+            return menu_usuarios(st2, sesion)
+        except ValueError as e:
+            _print(f"[Error] {e}")
+            return menu_usuarios(st, sesion)
+    elif op == "5":
+        nombre = _input_no_vacio("Usuario: ")
+        nombre_r = _input_no_vacio("Rutina realizada: ")
+        dur = _input_int("Duración en minutos (0 = la planificada): ", minimo=0)
+        try:
+            registrar_sesion(
+                sesion["bitacora"],
+                st,
+                nombre,
+                nombre_r,
+                duracion_seg=(dur * 60) if dur > 0 else None,
+            )
+            _print("Sesión registrada.")
+        except ValueError as e:
+            _print(f"[Error] {e}")
+        return menu_usuarios(st, sesion)
+    elif op == "6":
+        nombre = _input_no_vacio("Usuario: ")
+        try:
+            sesiones = sesiones_de_usuario(sesion["bitacora"], st, nombre)
+        except ValueError as e:
+            _print(f"[Error] {e}")
+            return menu_usuarios(st, sesion)
+        if not sesiones:
+            _print("Sin sesiones en los últimos 30 días.")
+        list(
+            map(
+                lambda ses: _print(
+                    f"  {ses.fecha:%Y-%m-%d %H:%M} | {ses.rutina} | "
+                    f"{ses.series} series, {ses.repeticiones} reps | "
+                    f"{minutos_a_texto(ses.duracion_seg / 60)}"
+                ),
+                sesiones,
+            )
+        )
+        return menu_usuarios(st, sesion)
+    elif op == "7":
+        u = buscar_usuario(st, _input_no_vacio("Usuario: "))
+        if u is None:
+            _print("Usuario no encontrado.")
+            return menu_usuarios(st, sesion)
+        list(
+            map(
+                lambda par: _print(
+                    f"  Semana del {par[0]:%Y-%m-%d}: {int(par[1].sesiones)} sesiones | "
+                    f"{minutos_a_texto(par[1].minutos)}"
+                    + (
+                        f" | adherencia {par[1].adherencia * 100:.0f}%"
+                        if par[1].adherencia is not None
+                        else ""
+                    )
+                ),
+                sesion["acumulados"].ultimas_semanas(u["nombre"], 4),
+            )
+        )
+        return menu_usuarios(st, sesion)
+    elif op == "8":
+        return menu_principal(st, sesion)
     else:
         _print("Opción no válida.")
-        return menu_usuarios(st)
+        return menu_usuarios(st, sesion)
 
 
 def _repetir_hasta(pred_ok, prompt: str, msg_dup: str) -> str:
@@ -708,7 +1697,8 @@ def _repetir_hasta(pred_ok, prompt: str, msg_dup: str) -> str:
     )
 
 
-def submenu_editar_usuario(st: Dict, u: Dict) -> None:
+def submenu_editar_usuario(st: Dict, u: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print(f"\nEditando usuario: {u['nombre']}")
     _print("1) Cambiar nombre")
     _print("2) Cambiar edad")
@@ -720,46 +1710,34 @@ def submenu_editar_usuario(st: Dict, u: Dict) -> None:
             "Nuevo nombre: ",
             "Ya existe un usuario con ese nombre.",
         )
-        old_key = _norm(u["nombre"])
-        u2 = {"nombre": nuevo.strip(), "edad": u["edad"], "rutinas": u["rutinas"]}
-        nuevos_idx = dict(st["idx_usuarios"])
-        nuevos_idx.pop(old_key, None)
-        nuevos_idx[_norm(u2["nombre"])] = u2
-        nuevos_usuarios = list(map(lambda x: u2 if x is u else x, st["usuarios"]))
+        st2 = aplicar_con_eventos(sesion["eventos"], st, renombrar_usuario, u["nombre"], nuevo)
         _print("Nombre actualizado.")
-        return submenu_editar_usuario(
-            {**st, "usuarios": nuevos_usuarios, "idx_usuarios": nuevos_idx}, u2
-        )
+        return submenu_editar_usuario(st2, buscar_usuario(st2, nuevo), sesion)
     elif subop == "2":
-        u2 = {
-            "nombre": u["nombre"],
-            "edad": _input_int("Nueva edad: ", minimo=16, maximo=100),
-            "rutinas": u["rutinas"],
-        }
-        nuevos_idx = dict(st["idx_usuarios"])
-        nuevos_idx[_norm(u2["nombre"])] = u2
-        nuevos_usuarios = list(map(lambda x: u2 if x is u else x, st["usuarios"]))
-        _print("Edad actualizada.")
-        return submenu_editar_usuario(
-            {**st, "usuarios": nuevos_usuarios, "idx_usuarios": nuevos_idx}, u2
+        st2 = cambiar_edad_usuario(
+            st, u["nombre"], _input_int("Nueva edad: ", minimo=16, maximo=100)
         )
+        _print("Edad actualizada.")
+        return submenu_editar_usuario(st2, buscar_usuario(st2, u["nombre"]), sesion)
     elif subop == "3":
-        return menu_usuarios(st)
+        return menu_usuarios(st, sesion)
     else:
         _print("Opción no válida.")
-        return submenu_editar_usuario(st, u)
+        return submenu_editar_usuario(st, u, sesion)
 
 
 # ---- Submenú Ejercicios ----
 
 
-def menu_ejercicios(st: Dict) -> None:
+def menu_ejercicios(st: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print("\n--- Ejercicios (catálogo) ---")
     _print("1) Crear ejercicio")
     _print("2) Listar ejercicios")
     _print("3) Editar ejercicio")
     _print("4) Eliminar ejercicio")
-    _print("5) Volver")
+    _print("5) Cambiar perfil de tiempos")
+    _print("6) Volver")
     op = input("Opción: ").strip()
     if op == "1":
         nombre = _repetir_hasta(
@@ -771,37 +1749,50 @@ def menu_ejercicios(st: Dict) -> None:
         series = _input_int("Series: ", minimo=1, maximo=100)
         try:
             st2 = crear_ejercicio(st, nombre, reps, series)
-            return menu_ejercicios(st2)
+            return menu_ejercicios(st2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return menu_ejercicios(st)
+            return menu_ejercicios(st, sesion)
     elif op == "2":
         listar_ejercicios(st)
-        return menu_ejercicios(st)
+        return menu_ejercicios(st, sesion)
     elif op == "3":
         nombre = _input_no_vacio("Nombre del ejercicio a editar: ")
         ejercicio = buscar_ejercicio(st, nombre)
         if ejercicio is None:
             _print("No existe ese ejercicio.")
-            return menu_ejercicios(st)
-        return submenu_editar_ejercicio(st, ejercicio)
+            return menu_ejercicios(st, sesion)
+        return submenu_editar_ejercicio(st, ejercicio, sesion)
     elif op == "4":
         nombre = _input_no_vacio("Nombre a eliminar: ")
         try:
             st2 = eliminar_ejercicio(st, nombre)
             _print("Ejercicio eliminado del catálogo.")
-            return menu_ejercicios(st2)
+            return menu_ejercicios(st2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return menu_ejercicios(st)
+            return menu_ejercicios(st, sesion)
     elif op == "5":
-        return menu_principal(st)
+        p = _perfil_tiempos(st)
+        _print(
+            f"Perfil actual (v{p['version']}): {p['sec_por_rep']} s por repetición, "
+            f"{p['descanso_entre_series']} s de descanso entre series."
+        )
+        sec = _input_int("Segundos por repetición: ", minimo=1)
+        descanso = _input_int("Descanso entre series (s): ", minimo=0)
+        todos = input("¿Aplicar también a ejercicios con tiempos propios? (s/n): ")
+        st2 = aplicar_perfil_tiempos(st, sec, descanso, todos.strip().lower() == "s")
+        _print(f"Perfil actualizado (v{_perfil_tiempos(st2)['version']}).")
+        return menu_ejercicios(st2, sesion)
+    elif op == "6":
+        return menu_principal(st, sesion)
     else:
         _print("Opción no válida.")
-        return menu_ejercicios(st)
+        return menu_ejercicios(st, sesion)
 
 
-def submenu_editar_ejercicio(st: Dict, ej: Dict) -> None:
+def submenu_editar_ejercicio(st: Dict, ej: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print(f"\nEditando ejercicio: {ej['nombre']}")
     _print("1) Cambiar nombre")
     _print("2) Cambiar repeticiones")
@@ -814,60 +1805,48 @@ def submenu_editar_ejercicio(st: Dict, ej: Dict) -> None:
             "Nuevo nombre: ",
             "Ya existe un ejercicio con ese nombre.",
         )
-        old_key = _norm(ej["nombre"])
-        ej2 = dict(ej)
-        ej2["nombre"] = nuevo.strip()
-        idx = dict(st["idx_ejercicios"])
-        idx.pop(old_key, None)
-        idx[_norm(ej2["nombre"])] = ej2
-        catalogo = list(map(lambda x: ej2 if x is ej else x, st["ejercicios_catalogo"]))
+        st2 = aplicar_con_eventos(sesion["eventos"], st, renombrar_ejercicio, ej["nombre"], nuevo)
         _print("Nombre actualizado.")
-        return submenu_editar_ejercicio(
-            {**st, "idx_ejercicios": idx, "ejercicios_catalogo": catalogo}, ej2
-        )
+        return submenu_editar_ejercicio(st2, buscar_ejercicio(st2, nuevo), sesion)
     elif subop == "2":
-        ej2 = actualizar_ejercicio(
-            ej, rep=_input_int("Nuevas repeticiones: ", minimo=1, maximo=100)
+        st2 = actualizar_ejercicio_catalogo(
+            st,
+            ej["nombre"],
+            rep=_input_int("Nuevas repeticiones: ", minimo=1, maximo=100),
         )
-        idx = dict(st["idx_ejercicios"])
-        idx[_norm(ej2["nombre"])] = ej2
-        catalogo = list(map(lambda x: ej2 if x is ej else x, st["ejercicios_catalogo"]))
         _print("Repeticiones actualizadas.")
-        return submenu_editar_ejercicio(
-            {**st, "idx_ejercicios": idx, "ejercicios_catalogo": catalogo}, ej2
-        )
+        return submenu_editar_ejercicio(st2, buscar_ejercicio(st2, ej["nombre"]), sesion)
     elif subop == "3":
-        ej2 = actualizar_ejercicio(
-            ej, ser=_input_int("Nuevas series: ", minimo=1, maximo=100)
+        st2 = actualizar_ejercicio_catalogo(
+            st, ej["nombre"], ser=_input_int("Nuevas series: ", minimo=1, maximo=100)
         )
-        idx = dict(st["idx_ejercicios"])
-        idx[_norm(ej2["nombre"])] = ej2
-        catalogo = list(map(lambda x: ej2 if x is ej else x, st["ejercicios_catalogo"]))
         _print("Series actualizadas.")
-        return submenu_editar_ejercicio(
-            {**st, "idx_ejercicios": idx, "ejercicios_catalogo": catalogo}, ej2
-        )
+        return submenu_editar_ejercicio(st2, buscar_ejercicio(st2, ej["nombre"]), sesion)
     elif subop == "4":
-        return menu_ejercicios(st)
+        return menu_ejercicios(st, sesion)
     else:
         _print("Opción no válida.")
-        return submenu_editar_ejercicio(st, ej)
+        return submenu_editar_ejercicio(st, ej, sesion)
 
 
 # ---- Submenú Rutinas ----
 
 
-def menu_rutinas(st: Dict) -> None:
+def menu_rutinas(st: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print("\n--- Rutinas ---")
     _print("1) Crear rutina (seleccionando ejercicios del catálogo)")
     _print("2) Listar rutinas")
     _print("3) Editar rutina")
-    _print("4) Volver")
+    _print("4) Eliminar rutina")
+    _print("5) Construir rutina por duración objetivo")
+    _print("6) Ver rutinas duplicadas")
+    _print("7) Volver")
     op = input("Opción: ").strip()
     if op == "1":
         if not st["ejercicios_catalogo"]:
             _print("Primero crea ejercicios en el catálogo.")
-            return menu_rutinas(st)
+            return menu_rutinas(st, sesion)
         nombre = _repetir_hasta(
             lambda n: buscar_rutina(st, n) is None,
             "Nombre de la rutina: ",
@@ -880,28 +1859,77 @@ def menu_rutinas(st: Dict) -> None:
         try:
             st2 = crear_rutina(st, nombre, desc, nombres)
             _print("Rutina creada.")
-            return menu_rutinas(st2)
+            return menu_rutinas(st2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return menu_rutinas(st)
+            return menu_rutinas(st, sesion)
     elif op == "2":
         listar_rutinas(st)
-        return menu_rutinas(st)
+        return menu_rutinas(st, sesion)
     elif op == "3":
         nombre = _input_no_vacio("Nombre de la rutina a editar: ")
         r = buscar_rutina(st, nombre)
         if r is None:
             _print("No existe esa rutina.")
-            return menu_rutinas(st)
-        return submenu_editar_rutina(st, r)
+            return menu_rutinas(st, sesion)
+        return submenu_editar_rutina(st, r, sesion)
     elif op == "4":
-        return menu_principal(st)
+        nombre = _input_no_vacio("Nombre a eliminar: ")
+        try:
+            st2 = eliminar_rutina(st, nombre)
+            _print("Rutina eliminada; se quitó de los usuarios que la tenían.")
+            return menu_rutinas(st2, sesion)
+        except ValueError as e:
+            _print(f"[Error] {e}")
+            return menu_rutinas(st, sesion)
+    elif op == "5":
+        if not st["ejercicios_catalogo"]:
+            _print("Primero crea ejercicios en el catálogo.")
+            return menu_rutinas(st, sesion)
+        nombre = _repetir_hasta(
+            lambda n: buscar_rutina(st, n) is None,
+            "Nombre de la rutina: ",
+            "Ya existe una rutina con ese nombre. Intenta otro.",
+        )
+        desc = _input_no_vacio("Descripción: ")
+        minutos = _input_int("Duración objetivo (min): ", minimo=1)
+        sel = input("Obligatorios (separados por coma, vacío = ninguno): ")
+        incluir = tuple(filter(lambda x: x != "", map(lambda s: s.strip(), sel.split(","))))
+        maximo = _input_int("Máximo de ejercicios (0 = sin límite): ", minimo=0)
+        try:
+            st2 = construir_rutina(
+                st,
+                nombre,
+                desc,
+                minutos,
+                incluir,
+                maximo if maximo > 0 else None,
+                cache=sesion["constructor"],
+            )
+            r = st2["rutinas"][-1]
+            _print(
+                f"Rutina creada con {len(r['ejercicios'])} ejercicios. "
+                f"Duración: {minutos_a_texto(rutina_duracion_total_min(r))}"
+            )
+            return menu_rutinas(st2, sesion)
+        except ValueError as e:
+            _print(f"[Error] {e}")
+            return menu_rutinas(st, sesion)
+    elif op == "6":
+        grupos = rutinas_duplicadas(st)
+        if not grupos:
+            _print("No hay rutinas duplicadas.")
+        list(map(lambda g: _print("- " + " = ".join(map(lambda r: r["nombre"], g))), grupos))
+        return menu_rutinas(st, sesion)
+    elif op == "7":
+        return menu_principal(st, sesion)
     else:
         _print("Opción no válida.")
-        return menu_rutinas(st)
+        return menu_rutinas(st, sesion)
 
 
-def submenu_editar_rutina(st: Dict, r: Dict) -> None:
+def submenu_editar_rutina(st: Dict, r: Dict, sesion: Dict) -> None:
+    _registrar(sesion, st)
     _print(f"\n>>> Editando: {r['nombre']}")
     _print("1) Agregar ejercicio (del catálogo)")
     _print("2) Eliminar ejercicio")
@@ -914,7 +1942,7 @@ def submenu_editar_rutina(st: Dict, r: Dict) -> None:
     if op == "1":
         if not st["ejercicios_catalogo"]:
             _print("Catálogo vacío. Crea ejercicios primero.")
-            return submenu_editar_rutina(st, r)
+            return submenu_editar_rutina(st, r, sesion)
         listar_ejercicios(st)
 
         def _pedir_ej_valido() -> str:
@@ -929,20 +1957,20 @@ def submenu_editar_rutina(st: Dict, r: Dict) -> None:
             st2 = rutina_agregar_ejercicio_st(st, r["nombre"], nombre)
             _print("Ejercicio agregado a la rutina.")
             r2 = buscar_rutina(st2, r["nombre"]) or r
-            return submenu_editar_rutina(st2, r2)
+            return submenu_editar_rutina(st2, r2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return submenu_editar_rutina(st, r)
+            return submenu_editar_rutina(st, r, sesion)
     elif op == "2":
         nombre = _input_no_vacio("Nombre del ejercicio a eliminar: ")
         try:
             st2 = rutina_eliminar_ejercicio_st(st, r["nombre"], nombre)
             _print("Ejercicio eliminado de la rutina.")
             r2 = buscar_rutina(st2, r["nombre"]) or r
-            return submenu_editar_rutina(st2, r2)
+            return submenu_editar_rutina(st2, r2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return submenu_editar_rutina(st, r)
+            return submenu_editar_rutina(st, r, sesion)
     elif op == "3":
         nombre = _input_no_vacio("Ejercicio a actualizar: ")
         rep_txt = input("Nuevas repeticiones (enter para mantener): ").strip()
@@ -953,29 +1981,31 @@ def submenu_editar_rutina(st: Dict, r: Dict) -> None:
             st2 = rutina_actualizar_ejercicio_st(st, r["nombre"], nombre, rep, ser)
             _print("Ejercicio actualizado.")
             r2 = buscar_rutina(st2, r["nombre"]) or r
-            return submenu_editar_rutina(st2, r2)
+            return submenu_editar_rutina(st2, r2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return submenu_editar_rutina(st, r)
+            return submenu_editar_rutina(st, r, sesion)
     elif op == "4":
         nuevo = input("Nuevo nombre (enter=mantener): ").strip()
         desc = input("Nueva descripción (enter=mantener): ").strip()
         try:
-            st2 = editar_rutina(
+            st2 = aplicar_con_eventos(
+                sesion["eventos"],
                 st,
+                editar_rutina,
                 r["nombre"],
-                nuevo_nombre=(None if not nuevo else nuevo),
-                nueva_desc=(None if not desc else desc),
+                (None if not nuevo else nuevo),
+                (None if not desc else desc),
             )
             _print("Datos actualizados.")
             r2 = buscar_rutina(st2, (nuevo if nuevo else r["nombre"])) or r
-            return submenu_editar_rutina(st2, r2)
+            return submenu_editar_rutina(st2, r2, sesion)
         except ValueError as e:
             _print(f"[Error] {e}")
-            return submenu_editar_rutina(st, r)
+            return submenu_editar_rutina(st, r, sesion)
     elif op == "5":
         _print(f"Duración total: {minutos_a_texto(rutina_duracion_total_min(r))}")
-        return submenu_editar_rutina(st, r)
+        return submenu_editar_rutina(st, r, sesion)
     elif op == "6":
         if not r["ejercicios"]:
             _print("(Sin ejercicios)")
@@ -989,12 +2019,12 @@ def submenu_editar_rutina(st: Dict, r: Dict) -> None:
                 go(resto)
 
             go(r["ejercicios"])
-        return submenu_editar_rutina(st, r)
+        return submenu_editar_rutina(st, r, sesion)
     elif op == "7":
-        return menu_rutinas(st)
+        return menu_rutinas(st, sesion)
     else:
         _print("Opción no válida.")
-        return submenu_editar_rutina(st, r)
+        return submenu_editar_rutina(st, r, sesion)
 
 
 # -------------------- Main --------------------
@@ -1002,6 +2032,6 @@ def submenu_editar_rutina(st: Dict, r: Dict) -> None:
 if __name__ == "__main__":
     st = estado_vacio()
     try:
-        menu_principal(st)
+        menu_principal(st, sesion_menu(st))
     except KeyboardInterrupt:
         print("\n¡Hasta luego!")
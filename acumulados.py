@@ -0,0 +1,348 @@
+"""
+Acumulados de volumen de entrenamiento por día, semana y mes.
+
+Se alimentan de los eventos `SESION_REGISTRADA` de una `BitacoraSesiones`:
+cada sesión suma, en su día, su semana (ISO, desde el lunes) y su mes, las
+sesiones, series, repeticiones y segundos reales del usuario junto con los
+segundos planificados de la rutina (la suma de `duracion_minutos()` de sus
+ejercicios). Con eso la adherencia es reales / planificados.
+
+Por ejercicio del catálogo se acumula el plan de cada sesión hecha (series,
+repeticiones y segundos de ese ejercicio en la rutina). La bitácora solo
+guarda totales por sesión, así que lo real se reparte entre los ejercicios
+en proporción a lo planificado.
+
+Cada serie (usuario o ejercicio, por granularidad) guarda sus periodos
+ordenados con los valores al lado: registrar una sesión es una búsqueda
+binaria y unas sumas, y consultar un rango cuesta lo que la cantidad de
+periodos que devuelve, no la de sesiones.
+
+Acepta los `Ejercicio` de Gestion_POO o los dicts de Gestion_funcional.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import constructor_rutinas
+import eventos
+
+GRANULARIDADES: Tuple[str, ...] = ("dia", "semana", "mes")
+
+# (ejercicio, series, repeticiones, segundos) planificados para una sesión.
+Plan = Tuple[Tuple[str, int, int, int], ...]
+
+
+class Volumen(NamedTuple):
+    sesiones: float
+    series: float
+    repeticiones: float
+    segundos: float
+    segundos_plan: float
+
+    @property
+    def minutos(self) -> float:
+        return self.segundos / 60.0
+
+    @property
+    def adherencia(self) -> Optional[float]:
+        """Segundos reales sobre planificados (None si no hubo plan)."""
+        return (self.segundos / self.segundos_plan) if self.segundos_plan else None
+
+
+VACIO = Volumen(0, 0, 0, 0, 0)
+
+
+def plan_de_rutina(ejercicios: Iterable) -> Plan:
+    """Plan de una sesión de la rutina con estos ejercicios."""
+    res: List[Tuple[str, int, int, int]] = []
+    for ej in ejercicios:
+        nombre, rep, ser, _, _ = constructor_rutinas._campos(ej)
+        res.append((nombre, ser, rep * ser, constructor_rutinas.segundos_ejercicio(ej)))
+    return tuple(res)
+
+
+def _periodo(granularidad: str, dia: date) -> int:
+    if granularidad == "dia":
+        return dia.toordinal()
+    if granularidad == "semana":
+        return dia.toordinal() - dia.weekday()
+    if granularidad == "mes":
+        return dia.year * 12 + dia.month - 1
+    raise ValueError(f"Granularidad desconocida: '{granularidad}'.")
+
+
+def inicio_periodo(granularidad: str, periodo: int) -> date:
+    if granularidad == "mes":
+        return date(periodo // 12, periodo % 12 + 1, 1)
+    return date.fromordinal(periodo)
+
+
+def _dia(fecha: Union[date, datetime]) -> date:
+    return fecha.date() if isinstance(fecha, datetime) else fecha
+
+
+def _clave(nombre: str) -> str:
+    return nombre.strip().lower()
+
+
+class _Serie:
+    """Periodos ordenados y, en paralelo, sus cinco acumuladores."""
+
+    __slots__ = ("periodos", "valores")
+
+    def __init__(self):
+        self.periodos = array("l")
+        self.valores: List[List[float]] = []
+
+    def sumar(self, periodo: int, delta: Tuple[float, ...]) -> None:
+        n = len(self.periodos)
+        if n and self.periodos[n - 1] == periodo:
+            pos = n - 1
+        elif n == 0 or self.periodos[n - 1] < periodo:
+            self.periodos.append(periodo)
+            self.valores.append([0, 0, 0, 0, 0])
+            pos = n
+        else:
+            # Sesión atrasada: se busca (o se inserta) su periodo.
+            pos = bisect_left(self.periodos, periodo)
+            if self.periodos[pos] != periodo:
+                self.periodos.insert(pos, periodo)
+                self.valores.insert(pos, [0, 0, 0, 0, 0])
+        fila = self.valores[pos]
+        for k in range(5):
+            fila[k] += delta[k]
+
+    def rango(self, desde: Optional[int], hasta: Optional[int]) -> Tuple[int, int]:
+        inicio = 0 if desde is None else bisect_left(self.periodos, desde)
+        fin = len(self.periodos) if hasta is None else bisect_left(self.periodos, hasta + 1)
+        return inicio, fin
+
+
+class Acumulados:
+    def __init__(self):
+        # (granularidad, "usuario" | "ejercicio") -> clave normalizada -> serie
+        self._series: Dict[Tuple[str, str], Dict[str, _Serie]] = {
+            (g, tipo): {} for g in GRANULARIDADES for tipo in ("usuario", "ejercicio")
+        }
+        self.sesiones = 0
+
+    # --------- Alimentación ---------
+    def sumar_sesion(
+        self,
+        usuario: str,
+        fecha: Union[date, datetime],
+        series: int,
+        repeticiones: int,
+        duracion_seg: int,
+        plan: Plan = (),
+    ) -> None:
+        dia = _dia(fecha)
+        plan_seg = 0
+        plan_series = 0
+        plan_reps = 0
+        for _, ser, reps, seg in plan:
+            plan_series += ser
+            plan_reps += reps
+            plan_seg += seg
+        delta_usuario = (1, series, repeticiones, duracion_seg, plan_seg)
+        key_u = _clave(usuario)
+
+        # Parte de lo real que le toca a cada ejercicio del plan.
+        por_ejercicio: List[Tuple[str, Tuple[float, ...]]] = []
+        for nombre, ser, reps, seg in plan:
+            por_ejercicio.append(
+                (
+                    _clave(nombre),
+                    (
+                        1,
+                        series * ser / plan_series if plan_series else 0,
+                        repeticiones * reps / plan_reps if plan_reps else 0,
+                        duracion_seg * seg / plan_seg if plan_seg else 0,
+                        seg,
+                    ),
+                )
+            )
+
+        for g in GRANULARIDADES:
+            periodo = _periodo(g, dia)
+            usuarios = self._series[(g, "usuario")]
+            serie = usuarios.get(key_u)
+            if serie is None:
+                serie = usuarios[key_u] = _Serie()
+            serie.sumar(periodo, delta_usuario)
+            ejercicios = self._series[(g, "ejercicio")]
+            for key_e, delta in por_ejercicio:
+                serie = ejercicios.get(key_e)
+                if serie is None:
+                    serie = ejercicios[key_e] = _Serie()
+                serie.sumar(periodo, delta)
+        self.sesiones += 1
+
+    def _al_registrar(self, evento: eventos.Evento) -> None:
+        d = evento.datos
+        self.sumar_sesion(
+            d["usuario"],
+            d["fecha"],
+            d["series"],
+            d["repeticiones"],
+            d["duracion_seg"],
+            d.get("plan", ()),
+        )
+
+    def _al_cambiar(self, evento: eventos.Evento) -> None:
+        d = evento.datos
+        if evento.tipo == eventos.USUARIO_RENOMBRADO:
+            self._mover("usuario", d["nombre"], d["nuevo_nombre"])
+        elif evento.tipo == eventos.USUARIO_ELIMINADO:
+            for g in GRANULARIDADES:
+                self._series[(g, "usuario")].pop(_clave(d["nombre"]), None)
+        else:
+            self._mover("ejercicio", d["nombre"], d["nuevo_nombre"])
+
+    def _mover(self, tipo: str, nombre: str, nuevo_nombre: str) -> None:
+        viejo, nuevo = _clave(nombre), _clave(nuevo_nombre)
+        if viejo == nuevo:
+            return
+        for g in GRANULARIDADES:
+            series = self._series[(g, tipo)]
+            serie = series.pop(viejo, None)
+            if serie is None:
+                continue
+            destino = series.get(nuevo)
+            if destino is None:
+                series[nuevo] = serie
+                continue
+            for i in range(len(serie.periodos)):
+                destino.sumar(serie.periodos[i], tuple(serie.valores[i]))
+
+    def seguir(self, bus: eventos.BusEventos, registro: eventos.BusEventos) -> Callable[[], None]:
+        """
+        Suma las sesiones que publica `registro` (el bus de la bitácora) y
+        sigue en `bus` los renombres y bajas del sistema. Devuelve la función
+        para dejar de seguir ambos.
+        """
+        cancelar_sesiones = registro.suscribir(
+            self._al_registrar, tipos=(eventos.SESION_REGISTRADA,)
+        )
+        cancelar_cambios = bus.suscribir(
+            self._al_cambiar,
+            tipos=(
+                eventos.USUARIO_RENOMBRADO,
+                eventos.USUARIO_ELIMINADO,
+                eventos.EJERCICIO_RENOMBRADO,
+            ),
+        )
+
+        def cancelar() -> None:
+            cancelar_sesiones()
+            cancelar_cambios()
+
+        return cancelar
+
+    def cargar(self, bitacora, plan_de: Optional[Callable[[str], Plan]] = None) -> None:
+        """
+        Suma todo lo que ya hay en una bitácora (una pasada, al arrancar). Sin
+        `plan_de` (nombre de rutina -> plan) solo se acumula por usuario; con
+        él, se usa la composición actual de cada rutina.
+        """
+        for i in range(len(bitacora)):
+            s = bitacora.fila(i)
+            plan = plan_de(s.rutina) if plan_de is not None else ()
+            self.sumar_sesion(
+                s.usuario, s.fecha, s.series, s.repeticiones, s.duracion_seg, plan
+            )
+
+    # --------- Consultas ---------
+    def _consultar(
+        self,
+        tipo: str,
+        nombre: str,
+        granularidad: str,
+        desde: Optional[Union[date, datetime]],
+        hasta: Optional[Union[date, datetime]],
+    ) -> Tuple[Optional[_Serie], int, int]:
+        if granularidad not in GRANULARIDADES:
+            raise ValueError(f"Granularidad desconocida: '{granularidad}'.")
+        serie = self._series[(granularidad, tipo)].get(_clave(nombre))
+        if serie is None:
+            return None, 0, 0
+        inicio, fin = serie.rango(
+            None if desde is None else _periodo(granularidad, _dia(desde)),
+            None if hasta is None else _periodo(granularidad, _dia(hasta)),
+        )
+        return serie, inicio, fin
+
+    def _por_periodo(self, tipo: str, *args) -> List[Tuple[date, Volumen]]:
+        serie, inicio, fin = self._consultar(tipo, *args)
+        granularidad = args[1]
+        res: List[Tuple[date, Volumen]] = []
+        for i in range(inicio, fin):
+            res.append(
+                (inicio_periodo(granularidad, serie.periodos[i]), Volumen(*serie.valores[i]))
+            )
+        return res
+
+    def _total(self, tipo: str, *args) -> Volumen:
+        serie, inicio, fin = self._consultar(tipo, *args)
+        suma = [0, 0, 0, 0, 0]
+        for i in range(inicio, fin):
+            fila = serie.valores[i]
+            for k in range(5):
+                suma[k] += fila[k]
+        return Volumen(*suma)
+
+    def de_usuario(
+        self,
+        nombre: str,
+        granularidad: str = "semana",
+        desde: Optional[Union[date, datetime]] = None,
+        hasta: Optional[Union[date, datetime]] = None,
+    ) -> List[Tuple[date, Volumen]]:
+        """(inicio del periodo, volumen) de los periodos con sesiones que tocan [desde, hasta]."""
+        return self._por_periodo("usuario", nombre, granularidad, desde, hasta)
+
+    def de_ejercicio(
+        self,
+        nombre: str,
+        granularidad: str = "semana",
+        desde: Optional[Union[date, datetime]] = None,
+        hasta: Optional[Union[date, datetime]] = None,
+    ) -> List[Tuple[date, Volumen]]:
+        return self._por_periodo("ejercicio", nombre, granularidad, desde, hasta)
+
+    def total_usuario(
+        self,
+        nombre: str,
+        granularidad: str = "mes",
+        desde: Optional[Union[date, datetime]] = None,
+        hasta: Optional[Union[date, datetime]] = None,
+    ) -> Volumen:
+        """Suma de los periodos en el rango (periodos completos)."""
+        return self._total("usuario", nombre, granularidad, desde, hasta)
+
+    def total_ejercicio(
+        self,
+        nombre: str,
+        granularidad: str = "mes",
+        desde: Optional[Union[date, datetime]] = None,
+        hasta: Optional[Union[date, datetime]] = None,
+    ) -> Volumen:
+        return self._total("ejercicio", nombre, granularidad, desde, hasta)
+
+    def ultimas_semanas(
+        self, nombre: str, semanas: int = 4, hoy: Optional[date] = None
+    ) -> List[Tuple[date, Volumen]]:
+        """Volumen de las últimas `semanas` (incluida la actual), con ceros en las vacías."""
+        if semanas <= 0:
+            raise ValueError("La cantidad de semanas debe ser mayor a 0.")
+        hoy = date.today() if hoy is None else hoy
+        lunes = hoy - timedelta(days=hoy.weekday())
+        primero = lunes - timedelta(weeks=semanas - 1)
+        hechos = dict(self.de_usuario(nombre, "semana", primero, hoy))
+        res: List[Tuple[date, Volumen]] = []
+        for k in range(semanas):
+            inicio = primero + timedelta(weeks=k)
+            res.append((inicio, hechos.get(inicio, VACIO)))
+        return res
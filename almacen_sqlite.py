@@ -0,0 +1,615 @@
+"""
+Repositorio en SQLite con las mismas operaciones que `SistemaGestion`.
+
+Los datos viven en disco (o en ":memory:") y las búsquedas por nombre usan
+índices únicos sobre el nombre normalizado. La semántica replica la versión
+POO: los ejercicios de una rutina son los del catálogo (actualizarlos en una
+rutina cambia el ejercicio del catálogo) y eliminar un ejercicio del catálogo
+no lo quita de una rutina que se quedaría vacía.
+
+Las validaciones se delegan en las clases de Gestion_POO para conservar los
+mismos mensajes de error (ValueError).
+"""
+
+import sqlite3
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from Gestion_POO import Ejercicio, Rutina, SistemaGestion, Usuario, Utilidades
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY,
+    clave TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    edad INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usuarios_edad ON usuarios (edad);
+
+-- clave es NULL cuando el ejercicio ya no está en el catálogo pero sigue
+-- en alguna rutina (ver eliminar_ejercicio).
+CREATE TABLE IF NOT EXISTS ejercicios (
+    id INTEGER PRIMARY KEY,
+    clave TEXT UNIQUE,
+    nombre TEXT NOT NULL,
+    repeticiones INTEGER NOT NULL,
+    series INTEGER NOT NULL,
+    sec_por_rep INTEGER NOT NULL,
+    descanso_entre_series INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rutinas (
+    id INTEGER PRIMARY KEY,
+    clave TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    descripcion TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rutina_ejercicios (
+    rutina_id INTEGER NOT NULL REFERENCES rutinas (id) ON DELETE CASCADE,
+    ejercicio_id INTEGER NOT NULL REFERENCES ejercicios (id) ON DELETE CASCADE,
+    posicion INTEGER NOT NULL,
+    PRIMARY KEY (rutina_id, ejercicio_id)
+);
+CREATE INDEX IF NOT EXISTS idx_rutina_ejercicios_ejercicio
+    ON rutina_ejercicios (ejercicio_id);
+
+CREATE TABLE IF NOT EXISTS usuario_rutinas (
+    usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+    rutina_id INTEGER NOT NULL REFERENCES rutinas (id) ON DELETE CASCADE,
+    posicion INTEGER NOT NULL,
+    PRIMARY KEY (usuario_id, rutina_id)
+);
+CREATE INDEX IF NOT EXISTS idx_usuario_rutinas_rutina ON usuario_rutinas (rutina_id);
+"""
+
+# Consultas fijas: sqlite3 reutiliza las sentencias preparadas por texto.
+_SQL_USUARIO = "SELECT id, nombre, edad FROM usuarios WHERE clave = ?"
+_SQL_EJERCICIO = (
+    "SELECT id, nombre, repeticiones, series, sec_por_rep, descanso_entre_series "
+    "FROM ejercicios WHERE clave = ?"
+)
+_SQL_RUTINA = "SELECT id, nombre, descripcion FROM rutinas WHERE clave = ?"
+_SQL_EJERCICIOS_DE_RUTINA = (
+    "SELECT e.id, e.nombre, e.repeticiones, e.series, e.sec_por_rep, "
+    "e.descanso_entre_series FROM rutina_ejercicios re "
+    "JOIN ejercicios e ON e.id = re.ejercicio_id "
+    "WHERE re.rutina_id = ? ORDER BY re.posicion"
+)
+_SQL_RUTINAS_DE_USUARIO = (
+    "SELECT r.id, r.nombre, r.descripcion FROM usuario_rutinas ur "
+    "JOIN rutinas r ON r.id = ur.rutina_id "
+    "WHERE ur.usuario_id = ? ORDER BY ur.posicion"
+)
+_SQL_INSERTAR_USUARIO = "INSERT INTO usuarios (clave, nombre, edad) VALUES (?, ?, ?)"
+_SQL_INSERTAR_EJERCICIO = (
+    "INSERT INTO ejercicios (clave, nombre, repeticiones, series, sec_por_rep, "
+    "descanso_entre_series) VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERTAR_RUTINA = (
+    "INSERT INTO rutinas (clave, nombre, descripcion) VALUES (?, ?, ?)"
+)
+_SQL_INSERTAR_ENLACE = (
+    "INSERT INTO rutina_ejercicios (rutina_id, ejercicio_id, posicion) VALUES (?, ?, ?)"
+)
+_SQL_INSERTAR_ASIGNACION = (
+    "INSERT INTO usuario_rutinas (usuario_id, rutina_id, posicion) VALUES (?, ?, ?)"
+)
+# Misma fórmula que Ejercicio.duracion_minutos, en segundos enteros.
+_SQL_SEGUNDOS = (
+    "e.repeticiones * e.sec_por_rep * e.series"
+    " + e.descanso_entre_series * MAX(0, e.series - 1)"
+)
+
+
+def _ejercicio_desde_fila(fila: Tuple) -> Ejercicio:
+    _, nombre, rep, ser, sec, descanso = fila
+    return Ejercicio(nombre, rep, ser, sec, descanso)
+
+
+class RepositorioSQLite:
+    """Almacenamiento persistente con búsquedas indexadas y cargas masivas."""
+
+    def __init__(self, ruta: str = ":memory:"):
+        self._con = sqlite3.connect(ruta)
+        self._con.execute("PRAGMA foreign_keys = ON")
+        if ruta != ":memory:":
+            self._con.execute("PRAGMA journal_mode = WAL")
+        self._con.executescript(ESQUEMA)
+
+    def cerrar(self) -> None:
+        self._con.close()
+
+    def __enter__(self) -> "RepositorioSQLite":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # --------- Helpers ---------
+    def _fila_usuario(self, nombre: str) -> Tuple:
+        fila = self._con.execute(
+            _SQL_USUARIO, (Utilidades.normalizar(nombre),)
+        ).fetchone()
+        if fila is None:
+            raise ValueError("Usuario no encontrado.")
+        return fila
+
+    def _id_usuario(self, nombre: str) -> int:
+        return self._fila_usuario(nombre)[0]
+
+    def _id_rutina(self, nombre: str) -> int:
+        fila = self._con.execute(
+            "SELECT id FROM rutinas WHERE clave = ?", (Utilidades.normalizar(nombre),)
+        ).fetchone()
+        if fila is None:
+            raise ValueError("Rutina no encontrada.")
+        return fila[0]
+
+    def _fila_ejercicio(self, nombre: str) -> Optional[Tuple]:
+        return self._con.execute(
+            _SQL_EJERCICIO, (Utilidades.normalizar(nombre),)
+        ).fetchone()
+
+    def _siguiente_posicion(self, tabla: str, columna: str, valor: int) -> int:
+        fila = self._con.execute(
+            f"SELECT COALESCE(MAX(posicion), -1) + 1 FROM {tabla} WHERE {columna} = ?",
+            (valor,),
+        ).fetchone()
+        return fila[0]
+
+    # -------- Usuarios --------
+    def agregar_usuario(self, nombre: str, edad: int) -> None:
+        self.agregar_usuarios([(nombre, edad)])
+
+    def agregar_usuarios(self, datos: Iterable[Tuple[str, int]]) -> int:
+        """Alta masiva con executemany; todo o nada."""
+        filas = []
+        claves = set()
+        for nombre, edad in datos:
+            u = Usuario(nombre, edad)
+            key = Utilidades.normalizar(u.nombre)
+            if key in claves:
+                raise ValueError("Ya existe un usuario con ese nombre.")
+            claves.add(key)
+            filas.append((key, u.nombre, u.edad))
+        try:
+            with self._con:
+                self._con.executemany(_SQL_INSERTAR_USUARIO, filas)
+        except sqlite3.IntegrityError:
+            raise ValueError("Ya existe un usuario con ese nombre.") from None
+        return len(filas)
+
+    def buscar_usuario(self, nombre: str) -> Optional[Usuario]:
+        """Materializa el usuario con sus rutinas (y los ejercicios de cada una)."""
+        fila = self._con.execute(
+            _SQL_USUARIO, (Utilidades.normalizar(nombre),)
+        ).fetchone()
+        if fila is None:
+            return None
+        id_u, nombre_u, edad = fila
+        u = Usuario(nombre_u, edad)
+        for id_r, nombre_r, desc in self._con.execute(_SQL_RUTINAS_DE_USUARIO, (id_u,)):
+            u.rutinas.append(self._materializar_rutina(id_r, nombre_r, desc))
+        return u
+
+    def renombrar_usuario(self, nombre: str, nuevo_nombre: str) -> None:
+        id_u, actual, edad = self._fila_usuario(nombre)
+        u = Usuario(actual, edad)
+        u.cambiar_nombre(nuevo_nombre)
+        try:
+            with self._con:
+                self._con.execute(
+                    "UPDATE usuarios SET clave = ?, nombre = ? WHERE id = ?",
+                    (Utilidades.normalizar(u.nombre), u.nombre, id_u),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("Ya existe un usuario con ese nombre.") from None
+
+    def cambiar_edad_usuario(self, nombre: str, nueva_edad: int) -> None:
+        id_u, actual, edad = self._fila_usuario(nombre)
+        u = Usuario(actual, edad)
+        u.cambiar_edad(nueva_edad)
+        with self._con:
+            self._con.execute("UPDATE usuarios SET edad = ? WHERE id = ?", (u.edad, id_u))
+
+    def usuarios_por_edad(self, minimo: int, maximo: int) -> List[Tuple[str, int]]:
+        return self._con.execute(
+            "SELECT nombre, edad FROM usuarios WHERE edad BETWEEN ? AND ? ORDER BY id",
+            (minimo, maximo),
+        ).fetchall()
+
+    def contar_usuarios(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    # -------- Ejercicios (catálogo) --------
+    def crear_ejercicio(self, nombre: str, repeticiones: int, series: int) -> None:
+        self.crear_ejercicios([(nombre, repeticiones, series)])
+
+    def crear_ejercicios(self, datos: Iterable[Tuple[str, int, int]]) -> int:
+        """Alta masiva de ejercicios del catálogo con executemany; todo o nada."""
+        filas = []
+        claves = set()
+        for nombre, rep, ser in datos:
+            ej = Ejercicio(nombre, rep, ser)
+            key = Utilidades.normalizar(ej.nombre)
+            if key in claves:
+                raise ValueError("Ya existe un ejercicio en el catálogo con ese nombre.")
+            claves.add(key)
+            filas.append(
+                (
+                    key,
+                    ej.nombre,
+                    ej.repeticiones,
+                    ej.series,
+                    ej.sec_por_rep,
+                    ej.descanso_entre_series,
+                )
+            )
+        try:
+            with self._con:
+                self._con.executemany(_SQL_INSERTAR_EJERCICIO, filas)
+        except sqlite3.IntegrityError:
+            raise ValueError(
+                "Ya existe un ejercicio en el catálogo con ese nombre."
+            ) from None
+        return len(filas)
+
+    def buscar_ejercicio(self, nombre: str) -> Optional[Ejercicio]:
+        fila = self._fila_ejercicio(nombre)
+        return None if fila is None else _ejercicio_desde_fila(fila)
+
+    def renombrar_ejercicio(self, nombre: str, nuevo_nombre: str) -> None:
+        fila = self._fila_ejercicio(nombre)
+        if fila is None:
+            raise ValueError("Ese ejercicio no existe en el catálogo.")
+        ej = _ejercicio_desde_fila(fila)
+        ej.cambiar_nombre(nuevo_nombre)
+        try:
+            with self._con:
+                self._con.execute(
+                    "UPDATE ejercicios SET clave = ?, nombre = ? WHERE id = ?",
+                    (Utilidades.normalizar(ej.nombre), ej.nombre, fila[0]),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(
+                "Ya existe un ejercicio en el catálogo con ese nombre."
+            ) from None
+
+    def actualizar_ejercicio(
+        self,
+        nombre: str,
+        repeticiones: Optional[int] = None,
+        series: Optional[int] = None,
+    ) -> None:
+        fila = self._fila_ejercicio(nombre)
+        if fila is None:
+            raise ValueError("Ese ejercicio no existe en el catálogo.")
+        self._actualizar_fila_ejercicio(fila, repeticiones, series)
+
+    def _actualizar_fila_ejercicio(
+        self, fila: Tuple, repeticiones: Optional[int], series: Optional[int]
+    ) -> None:
+        ej = _ejercicio_desde_fila(fila)
+        ej.actualizar(repeticiones, series)
+        with self._con:
+            self._con.execute(
+                "UPDATE ejercicios SET repeticiones = ?, series = ? WHERE id = ?",
+                (ej.repeticiones, ej.series, fila[0]),
+            )
+
+    def eliminar_ejercicio(self, nombre: str) -> None:
+        fila = self._fila_ejercicio(nombre)
+        if fila is None:
+            raise ValueError("No se encontró el ejercicio para eliminar.")
+        id_e = fila[0]
+        with self._con:
+            # Igual que en POO: una rutina que se quedaría vacía conserva el ejercicio.
+            self._con.execute(
+                "DELETE FROM rutina_ejercicios WHERE ejercicio_id = ? AND rutina_id IN ("
+                " SELECT rutina_id FROM rutina_ejercicios GROUP BY rutina_id"
+                " HAVING COUNT(*) > 1)",
+                (id_e,),
+            )
+            sigue_en_uso = self._con.execute(
+                "SELECT 1 FROM rutina_ejercicios WHERE ejercicio_id = ? LIMIT 1", (id_e,)
+            ).fetchone()
+            if sigue_en_uso:
+                self._con.execute(
+                    "UPDATE ejercicios SET clave = NULL WHERE id = ?", (id_e,)
+                )
+            else:
+                self._con.execute("DELETE FROM ejercicios WHERE id = ?", (id_e,))
+
+    def contar_ejercicios(self) -> int:
+        return self._con.execute(
+            "SELECT COUNT(*) FROM ejercicios WHERE clave IS NOT NULL"
+        ).fetchone()[0]
+
+    # -------- Rutinas --------
+    def _materializar_rutina(self, id_r: int, nombre: str, descripcion: str) -> Rutina:
+        ejercicios = [
+            _ejercicio_desde_fila(f)
+            for f in self._con.execute(_SQL_EJERCICIOS_DE_RUTINA, (id_r,))
+        ]
+        return Rutina(nombre, descripcion, ejercicios)
+
+    def buscar_rutina(self, nombre: str) -> Optional[Rutina]:
+        fila = self._con.execute(
+            _SQL_RUTINA, (Utilidades.normalizar(nombre),)
+        ).fetchone()
+        return None if fila is None else self._materializar_rutina(*fila)
+
+    def crear_rutina(
+        self, nombre: str, descripcion: str, nombres_ejercicios: List[str]
+    ) -> None:
+        if self.contar_ejercicios() == 0:
+            raise ValueError("Primero crea ejercicios en el catálogo.")
+        if len(nombres_ejercicios) == 0:
+            raise ValueError("Debes seleccionar al menos un ejercicio para la rutina.")
+        key = Utilidades.normalizar(nombre)
+        if self._con.execute(_SQL_RUTINA, (key,)).fetchone() is not None:
+            raise ValueError("Ya existe una rutina con ese nombre.")
+
+        filas = []
+        vistos = set()
+        for n in nombres_ejercicios:
+            k = Utilidades.normalizar(n)
+            if k in vistos:
+                raise ValueError(
+                    "Nombre de ejercicio repetido en la selección: '" + n + "'."
+                )
+            fila = self._fila_ejercicio(n)
+            if fila is None:
+                raise ValueError("Ejercicio '" + n + "' no existe en el catálogo.")
+            vistos.add(k)
+            filas.append(fila)
+        r = Rutina(nombre, descripcion, [_ejercicio_desde_fila(f) for f in filas])
+
+        with self._con:
+            cur = self._con.execute(_SQL_INSERTAR_RUTINA, (key, r.nombre, r.descripcion))
+            id_r = cur.lastrowid
+            self._con.executemany(
+                _SQL_INSERTAR_ENLACE,
+                [(id_r, fila[0], pos) for pos, fila in enumerate(filas)],
+            )
+
+    def editar_rutina(
+        self,
+        nombre: str,
+        nuevo_nombre: Optional[str] = None,
+        nueva_desc: Optional[str] = None,
+    ) -> None:
+        fila = self._con.execute(
+            _SQL_RUTINA, (Utilidades.normalizar(nombre),)
+        ).fetchone()
+        if fila is None:
+            raise ValueError("Rutina no encontrada.")
+        id_r = fila[0]
+        if nuevo_nombre is not None:
+            propuesto_key = Utilidades.normalizar(nuevo_nombre)
+            if propuesto_key != Utilidades.normalizar(fila[1]) and (
+                self._con.execute(_SQL_RUTINA, (propuesto_key,)).fetchone() is not None
+            ):
+                raise ValueError("Ya existe otra rutina con ese nombre.")
+        r = self._materializar_rutina(*fila)
+        r.actualizar_datos(nuevo_nombre, nueva_desc)
+        try:
+            with self._con:
+                self._con.execute(
+                    "UPDATE rutinas SET clave = ?, nombre = ?, descripcion = ? WHERE id = ?",
+                    (Utilidades.normalizar(r.nombre), r.nombre, r.descripcion, id_r),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("Ya existe otra rutina con ese nombre.") from None
+
+    def rutina_agregar_ejercicio(
+        self, nombre_rutina: str, nombre_ejercicio: str
+    ) -> None:
+        id_r = self._id_rutina(nombre_rutina)
+        fila = self._fila_ejercicio(nombre_ejercicio)
+        if fila is None:
+            raise ValueError("Ese ejercicio no existe en el catálogo.")
+        if self._fila_ejercicio_en_rutina(id_r, fila[1]) is not None:
+            raise ValueError(f"Ya existe un ejercicio '{fila[1]}' en la rutina.")
+        with self._con:
+            self._con.execute(
+                _SQL_INSERTAR_ENLACE,
+                (id_r, fila[0], self._siguiente_posicion("rutina_ejercicios", "rutina_id", id_r)),
+            )
+
+    def _fila_ejercicio_en_rutina(self, id_r: int, nombre_ejercicio: str) -> Optional[Tuple]:
+        key = Utilidades.normalizar(nombre_ejercicio)
+        for fila in self._con.execute(_SQL_EJERCICIOS_DE_RUTINA, (id_r,)):
+            if Utilidades.normalizar(fila[1]) == key:
+                return fila
+        return None
+
+    def rutina_eliminar_ejercicio(
+        self, nombre_rutina: str, nombre_ejercicio: str
+    ) -> None:
+        id_r = self._id_rutina(nombre_rutina)
+        fila = self._fila_ejercicio_en_rutina(id_r, nombre_ejercicio)
+        if fila is None:
+            raise ValueError("No se encontró el ejercicio para eliminar.")
+        total = self._con.execute(
+            "SELECT COUNT(*) FROM rutina_ejercicios WHERE rutina_id = ?", (id_r,)
+        ).fetchone()[0]
+        if total == 1:
+            raise ValueError(
+                "La rutina no puede quedarse vacía; agrega otro ejercicio o cancela la eliminación."
+            )
+        with self._con:
+            self._con.execute(
+                "DELETE FROM rutina_ejercicios WHERE rutina_id = ? AND ejercicio_id = ?",
+                (id_r, fila[0]),
+            )
+
+    def rutina_actualizar_ejercicio(
+        self,
+        nombre_rutina: str,
+        nombre_ejercicio: str,
+        repeticiones: Optional[int] = None,
+        series: Optional[int] = None,
+    ) -> None:
+        id_r = self._id_rutina(nombre_rutina)
+        fila = self._fila_ejercicio_en_rutina(id_r, nombre_ejercicio)
+        if fila is None:
+            raise ValueError("Ejercicio no encontrado en la rutina.")
+        self._actualizar_fila_ejercicio(fila, repeticiones, series)
+
+    def duracion_rutina_min(self, nombre: str) -> float:
+        id_r = self._id_rutina(nombre)
+        segundos = self._con.execute(
+            f"SELECT COALESCE(SUM({_SQL_SEGUNDOS}), 0) FROM rutina_ejercicios re"
+            " JOIN ejercicios e ON e.id = re.ejercicio_id WHERE re.rutina_id = ?",
+            (id_r,),
+        ).fetchone()[0]
+        return segundos / 60.0
+
+    # -------- Asignación y Reporte --------
+    def asignar_rutina_a_usuario(self, nombre_usuario: str, nombre_rutina: str) -> None:
+        id_u = self._id_usuario(nombre_usuario)
+        id_r = self._id_rutina(nombre_rutina)
+        try:
+            with self._con:
+                self._con.execute(
+                    _SQL_INSERTAR_ASIGNACION,
+                    (id_u, id_r, self._siguiente_posicion("usuario_rutinas", "usuario_id", id_u)),
+                )
+        except sqlite3.IntegrityError:
+            nombre_r = self._con.execute(
+                "SELECT nombre FROM rutinas WHERE id = ?", (id_r,)
+            ).fetchone()[0]
+            raise ValueError(
+                f"El usuario ya tiene una rutina llamada '{nombre_r}'."
+            ) from None
+
+    def asignar_rutinas(self, pares: Iterable[Tuple[str, str]]) -> int:
+        """Asignación masiva (usuario, rutina) en una sola transacción."""
+        n = 0
+        with self._con:
+            for nombre_usuario, nombre_rutina in pares:
+                id_u = self._id_usuario(nombre_usuario)
+                id_r = self._id_rutina(nombre_rutina)
+                try:
+                    self._con.execute(
+                        _SQL_INSERTAR_ASIGNACION,
+                        (id_u, id_r, self._siguiente_posicion("usuario_rutinas", "usuario_id", id_u)),
+                    )
+                except sqlite3.IntegrityError:
+                    raise ValueError(
+                        f"El usuario ya tiene una rutina llamada '{nombre_rutina}'."
+                    ) from None
+                n += 1
+        return n
+
+    def filas_reporte(self) -> Iterator[Tuple[str, int, Optional[str], Optional[float]]]:
+        """Mismas filas que SistemaGestion.filas_reporte, leídas con un cursor."""
+        cur = self._con.execute(
+            "SELECT u.nombre, u.edad, r.nombre, d.segundos FROM usuarios u"
+            " LEFT JOIN usuario_rutinas ur ON ur.usuario_id = u.id"
+            " LEFT JOIN rutinas r ON r.id = ur.rutina_id"
+            " LEFT JOIN ("
+            f"  SELECT re.rutina_id, SUM({_SQL_SEGUNDOS}) AS segundos"
+            "   FROM rutina_ejercicios re JOIN ejercicios e ON e.id = re.ejercicio_id"
+            "   GROUP BY re.rutina_id"
+            " ) d ON d.rutina_id = r.id"
+            " ORDER BY u.id, ur.posicion"
+        )
+        for nombre, edad, rutina, segundos in cur:
+            yield (nombre, edad, rutina, None if rutina is None else segundos / 60.0)
+
+    # -------- Volcado desde / hacia memoria --------
+    def importar_sistema(self, sistema: SistemaGestion) -> None:
+        """Copia un SistemaGestion completo usando inserciones masivas."""
+        with self._con:
+            ids_ej = {}
+            for ej in sistema.ejercicios_catalogo:
+                cur = self._con.execute(
+                    _SQL_INSERTAR_EJERCICIO,
+                    (
+                        Utilidades.normalizar(ej.nombre),
+                        ej.nombre,
+                        ej.repeticiones,
+                        ej.series,
+                        ej.sec_por_rep,
+                        ej.descanso_entre_series,
+                    ),
+                )
+                ids_ej[id(ej)] = cur.lastrowid
+            ids_r = {}
+            enlaces = []
+            for r in sistema.rutinas:
+                cur = self._con.execute(
+                    _SQL_INSERTAR_RUTINA,
+                    (Utilidades.normalizar(r.nombre), r.nombre, r.descripcion),
+                )
+                ids_r[id(r)] = cur.lastrowid
+                for pos, ej in enumerate(r.ejercicios):
+                    id_e = ids_ej.get(id(ej))
+                    if id_e is None:
+                        # Ejercicio que ya no está en el catálogo.
+                        id_e = self._con.execute(
+                            _SQL_INSERTAR_EJERCICIO,
+                            (
+                                None,
+                                ej.nombre,
+                                ej.repeticiones,
+                                ej.series,
+                                ej.sec_por_rep,
+                                ej.descanso_entre_series,
+                            ),
+                        ).lastrowid
+                        ids_ej[id(ej)] = id_e
+                    enlaces.append((cur.lastrowid, id_e, pos))
+            self._con.executemany(_SQL_INSERTAR_ENLACE, enlaces)
+            asignaciones = []
+            for u in sistema.usuarios:
+                cur = self._con.execute(
+                    _SQL_INSERTAR_USUARIO,
+                    (Utilidades.normalizar(u.nombre), u.nombre, u.edad),
+                )
+                for pos, r in enumerate(u.rutinas):
+                    asignaciones.append((cur.lastrowid, ids_r[id(r)], pos))
+            self._con.executemany(_SQL_INSERTAR_ASIGNACION, asignaciones)
+
+    def cargar_sistema(self) -> SistemaGestion:
+        """Materializa todo el contenido en un SistemaGestion en memoria."""
+        s = SistemaGestion()
+        ejercicios = {}
+        for fila in self._con.execute(
+            "SELECT id, nombre, repeticiones, series, sec_por_rep, descanso_entre_series,"
+            " clave FROM ejercicios ORDER BY id"
+        ):
+            ej = _ejercicio_desde_fila(fila[:6])
+            ejercicios[fila[0]] = ej
+            if fila[6] is not None:
+                s.ejercicios_catalogo.append(ej)
+                s.idx_ejercicios[fila[6]] = ej
+        rutinas = {}
+        for id_r, nombre, desc, clave in self._con.execute(
+            "SELECT id, nombre, descripcion, clave FROM rutinas ORDER BY id"
+        ).fetchall():
+            ids = self._con.execute(
+                "SELECT ejercicio_id FROM rutina_ejercicios WHERE rutina_id = ?"
+                " ORDER BY posicion",
+                (id_r,),
+            ).fetchall()
+            r = Rutina(nombre, desc, [ejercicios[i] for (i,) in ids])
+            rutinas[id_r] = r
+            s.rutinas.append(r)
+            s.idx_rutinas[clave] = r
+        for id_u, nombre, edad, clave in self._con.execute(
+            "SELECT id, nombre, edad, clave FROM usuarios ORDER BY id"
+        ).fetchall():
+            u = Usuario(nombre, edad)
+            for (id_r,) in self._con.execute(
+                "SELECT rutina_id FROM usuario_rutinas WHERE usuario_id = ?"
+                " ORDER BY posicion",
+                (id_u,),
+            ):
+                u.rutinas.append(rutinas[id_r])
+            s.usuarios.append(u)
+            s.idx_usuarios[clave] = u
+        s._marcar_cambio()
+        return s
@@ -0,0 +1,159 @@
+"""
+Agregados del gimnasio calculados en una sola pasada sobre usuarios y rutinas.
+
+Funciona con cualquiera de las dos implementaciones: recibe un
+`SistemaGestion` (POO) o el estado `st` de Gestion_funcional. Los resultados
+se guardan en caché hasta que los datos cambian: en POO se compara
+`SistemaGestion.version`; en la versión funcional, como cada operación
+devuelve un estado nuevo, basta con comparar la identidad del estado.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import Gestion_funcional as gf
+from Gestion_POO import SistemaGestion, Utilidades
+
+BANDAS_EDAD: Tuple[int, ...] = (16, 26, 36, 46, 56, 66)
+
+
+class ResumenAnalitico(NamedTuple):
+    usuarios: int
+    asignaciones: int
+    duracion_promedio_por_banda: Dict[str, float]
+    usos_por_ejercicio: List[Tuple[str, int]]
+    minutos_semanales: float
+
+
+def _etiqueta_banda(edad: int, bandas: Tuple[int, ...]) -> str:
+    i = len(bandas) - 1
+    while i >= 0:
+        if edad >= bandas[i]:
+            if i == len(bandas) - 1:
+                return f"{bandas[i]}+"
+            return f"{bandas[i]}-{bandas[i + 1] - 1}"
+        i -= 1
+    return f"<{bandas[0]}"
+
+
+def _leer_poo(sistema: SistemaGestion):
+    """Normaliza la fuente POO a (edad, rutinas) y (rutina -> (minutos, ejercicios))."""
+
+    def rutina(r):
+        return (
+            r.duracion_total_min(),
+            [(Utilidades.normalizar(ej.nombre), ej.nombre) for ej in r.ejercicios],
+        )
+
+    return [(u.edad, u.rutinas) for u in sistema.usuarios], rutina
+
+
+def _leer_funcional(st: Dict):
+    def rutina(r):
+        return (
+            gf.rutina_duracion_total_min(r),
+            [(gf._norm(ej["nombre"]), ej["nombre"]) for ej in r["ejercicios"]],
+        )
+
+    return [(u["edad"], u["rutinas"]) for u in st["usuarios"]], rutina
+
+
+class AnaliticaGimnasio:
+    """
+    Calcula en un único recorrido:
+    - duración promedio de rutina asignada por banda de edad,
+    - uso de cada ejercicio (cuántas asignaciones de rutina lo incluyen),
+    - minutos semanales de entrenamiento (cada rutina asignada cuenta como
+      `sesiones_por_semana` sesiones).
+    Cada rutina se mide una sola vez aunque la tengan asignada miles de usuarios.
+    """
+
+    def __init__(
+        self,
+        fuente,
+        bandas: Tuple[int, ...] = BANDAS_EDAD,
+        sesiones_por_semana: int = 1,
+    ):
+        if len(bandas) == 0:
+            raise ValueError("Debe haber al menos una banda de edad.")
+        self.fuente = fuente
+        self.bandas = tuple(bandas)
+        self.sesiones_por_semana = int(sesiones_por_semana)
+        self._cache: Optional[ResumenAnalitico] = None
+        self._cache_fuente = None
+        self._cache_version: Optional[int] = None
+
+    def _version_fuente(self) -> Optional[int]:
+        if isinstance(self.fuente, SistemaGestion):
+            return self.fuente.version
+        return None
+
+    def resultados(self) -> ResumenAnalitico:
+        version = self._version_fuente()
+        if (
+            self._cache is not None
+            and self._cache_fuente is self.fuente
+            and self._cache_version == version
+        ):
+            return self._cache
+        self._cache = self._calcular()
+        self._cache_fuente = self.fuente
+        self._cache_version = version
+        return self._cache
+
+    def invalidar(self) -> None:
+        self._cache = None
+
+    def _calcular(self) -> ResumenAnalitico:
+        if isinstance(self.fuente, SistemaGestion):
+            usuarios, medir_rutina = _leer_poo(self.fuente)
+        else:
+            usuarios, medir_rutina = _leer_funcional(self.fuente)
+
+        medidas: Dict[int, Tuple[float, List[Tuple[str, str]]]] = {}
+        suma_banda: Dict[str, float] = {}
+        cuenta_banda: Dict[str, int] = {}
+        usos: Dict[str, int] = {}
+        nombres: Dict[str, str] = {}
+        asignaciones = 0
+        minutos = 0.0
+
+        for edad, rutinas in usuarios:
+            banda = _etiqueta_banda(edad, self.bandas)
+            for r in rutinas:
+                medida = medidas.get(id(r))
+                if medida is None:
+                    medida = medir_rutina(r)
+                    medidas[id(r)] = medida
+                duracion, ejercicios = medida
+                asignaciones += 1
+                minutos += duracion
+                suma_banda[banda] = suma_banda.get(banda, 0.0) + duracion
+                cuenta_banda[banda] = cuenta_banda.get(banda, 0) + 1
+                for key, nombre in ejercicios:
+                    usos[key] = usos.get(key, 0) + 1
+                    nombres.setdefault(key, nombre)
+
+        promedios = {
+            banda: suma_banda[banda] / cuenta_banda[banda] for banda in suma_banda
+        }
+        ranking = sorted(
+            ((nombres[key], n) for key, n in usos.items()),
+            key=lambda par: (-par[1], Utilidades.normalizar(par[0])),
+        )
+        return ResumenAnalitico(
+            usuarios=len(usuarios),
+            asignaciones=asignaciones,
+            duracion_promedio_por_banda=promedios,
+            usos_por_ejercicio=ranking,
+            minutos_semanales=minutos * self.sesiones_por_semana,
+        )
+
+    # -------- Consultas --------
+    def duracion_promedio_por_banda(self) -> Dict[str, float]:
+        return self.resultados().duracion_promedio_por_banda
+
+    def ejercicios_mas_usados(self, n: int = 10) -> List[Tuple[str, int]]:
+        return self.resultados().usos_por_ejercicio[:n]
+
+    def minutos_semanales(self) -> float:
+        return self.resultados().minutos_semanales
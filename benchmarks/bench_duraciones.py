@@ -0,0 +1,57 @@
+"""
+Compara el cálculo directo de duraciones contra la tabla precalculada.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_duraciones [cantidad]
+"""
+
+import sys
+import timeit
+
+import Gestion_funcional as gf
+from Gestion_POO import Ejercicio, Rutina
+
+
+def _formula_poo(ej: Ejercicio) -> float:
+    movimiento = ej.repeticiones * ej.sec_por_rep * ej.series
+    descanso = ej.descanso_entre_series * max(0, ej.series - 1)
+    return (movimiento + descanso) / 60.0
+
+
+def _formula_funcional(e) -> float:
+    movimiento = e["repeticiones"] * e["sec_por_rep"] * e["series"]
+    descanso = e["descanso_entre_series"] * max(0, e["series"] - 1)
+    return (movimiento + descanso) / 60.0
+
+
+def _mejor(stmt, veces: int = 5, numero: int = 10) -> float:
+    return min(timeit.repeat(stmt, number=numero, repeat=veces)) / numero
+
+
+def main(cantidad: int = 100_000) -> None:
+    pares = [(i % 100 + 1, (i * 37) % 100 + 1) for i in range(cantidad)]
+    ejercicios = [Ejercicio(f"E{i}", r, s) for i, (r, s) in enumerate(pares)]
+    dicts = [gf.mk_ejercicio(f"E{i}", r, s) for i, (r, s) in enumerate(pares)]
+    # Una rutina mediana basta para medir duracion_total_min.
+    rutina = Rutina("Bench", "Rutina mediana", ejercicios[:1000])
+
+    assert all(_formula_poo(e) == e.duracion_minutos() for e in ejercicios)
+    assert all(_formula_funcional(e) == gf.duracion_ejercicio_min(e) for e in dicts)
+
+    casos = [
+        ("POO fórmula", lambda: [_formula_poo(e) for e in ejercicios]),
+        ("POO tabla", lambda: [e.duracion_minutos() for e in ejercicios]),
+        (
+            "POO duracion_total_min x100",
+            lambda: [rutina.duracion_total_min() for _ in range(100)],
+        ),
+        ("Funcional fórmula", lambda: [_formula_funcional(e) for e in dicts]),
+        ("Funcional tabla", lambda: [gf.duracion_ejercicio_min(e) for e in dicts]),
+    ]
+    print(f"{cantidad} ejercicios (mejor de 5)")
+    for nombre, fn in casos:
+        print(f"  {nombre:<32} {_mejor(fn) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
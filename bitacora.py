@@ -0,0 +1,367 @@
+"""
+Bitácora de sesiones realizadas (check-ins), en columnas de solo-añadir.
+
+Cada sesión es una fila con usuario, rutina, fecha, series y repeticiones
+hechas y duración real. Cada columna vive en su propio archivo de ancho fijo
+(o en un `array` si la bitácora es solo en memoria), así que registrar una
+sesión es añadir unos pocos bytes al final de cada una. Usuarios y rutinas
+se guardan como ids; el diccionario id <-> nombre es otro archivo de
+solo-añadir (un renombre agrega una línea, no reescribe filas).
+
+Al abrir solo se leen las columnas de usuario y fecha para armar, por
+usuario, sus fechas ordenadas y la fila de cada una. Una consulta por rango
+("sesiones de X en los últimos 30 días") es una búsqueda binaria en ese
+índice y la lectura de esas filas; el resto del historial no se toca.
+
+Si un corte dejó columnas de distinto largo, al abrir se recortan a la
+última fila completa. Cada sesión registrada se publica como
+`SESION_REGISTRADA` en el bus `eventos` de la bitácora.
+"""
+
+import json
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import eventos
+
+# Columna -> código de `array`/`struct` (ancho fijo, little-endian en disco).
+COLUMNAS: Tuple[Tuple[str, str], ...] = (
+    ("rutina", "I"),
+    ("fecha", "q"),
+    ("series", "I"),
+    ("repeticiones", "I"),
+    ("duracion", "I"),
+    # La de usuario va última: una fila existe cuando ya se escribió entera.
+    ("usuario", "I"),
+)
+ARCHIVO_NOMBRES = "nombres.jsonl"
+
+Fecha = Union[date, datetime]
+
+
+class Sesion(NamedTuple):
+    usuario: str
+    rutina: str
+    fecha: datetime
+    series: int
+    repeticiones: int
+    duracion_seg: int
+
+
+def _a_segundos(fecha: Fecha) -> int:
+    if not isinstance(fecha, datetime):
+        fecha = datetime.combine(fecha, time())
+    return int(fecha.timestamp())
+
+
+def _normalizar(s: str) -> str:
+    return s.strip().lower()
+
+
+class _ColumnaArchivo:
+    """Columna de ancho fijo en disco con la interfaz mínima de un array."""
+
+    def __init__(self, ruta: str, codigo: str):
+        self._struct = struct.Struct("<" + codigo)
+        self._codigo = codigo
+        self._f = open(ruta, "ab+")
+        self._f.seek(0, os.SEEK_END)
+        self._n = self._f.tell() // self._struct.size
+        self._pendiente = False
+
+    def __len__(self) -> int:
+        return self._n
+
+    def recortar(self, n: int) -> None:
+        self._f.truncate(n * self._struct.size)
+        self._n = n
+
+    def append(self, valor: int) -> None:
+        self._f.write(self._struct.pack(valor))
+        self._n += 1
+        self._pendiente = True
+
+    def vaciar(self) -> None:
+        if self._pendiente:
+            self._f.flush()
+            self._pendiente = False
+
+    def __getitem__(self, i: int) -> int:
+        self.vaciar()
+        self._f.seek(i * self._struct.size)
+        return self._struct.unpack(self._f.read(self._struct.size))[0]
+
+    def todo(self) -> array:
+        self.vaciar()
+        self._f.seek(0)
+        datos = array(self._codigo)
+        datos.frombytes(self._f.read(self._n * self._struct.size))
+        if datos.itemsize != self._struct.size:
+            raise ValueError("Tamaño de columna no soportado en esta plataforma.")
+        if struct.pack("=I", 1) != struct.pack("<I", 1):
+            datos.byteswap()
+        return datos
+
+    def cerrar(self) -> None:
+        self._f.close()
+
+
+class BitacoraSesiones:
+    """
+    `ruta` es un directorio (se crea si no existe); sin ruta, todo queda en
+    memoria. Los nombres se comparan normalizados.
+    """
+
+    def __init__(self, ruta: Optional[str] = None):
+        self.ruta = ruta
+        self.eventos = eventos.BusEventos()
+        self._nombres_archivo = None
+        if ruta is None:
+            self._columnas = {nombre: array(codigo) for nombre, codigo in COLUMNAS}
+        else:
+            os.makedirs(ruta, exist_ok=True)
+            self._columnas = {
+                nombre: _ColumnaArchivo(os.path.join(ruta, nombre + ".col"), codigo)
+                for nombre, codigo in COLUMNAS
+            }
+            n = min(len(c) for c in self._columnas.values())
+            for c in self._columnas.values():
+                if len(c) != n:
+                    c.recortar(n)
+
+        # Diccionarios: nombre normalizado -> id e id -> nombre a mostrar.
+        self._ids: Dict[str, Dict[str, int]] = {"usuario": {}, "rutina": {}}
+        self._nombres: Dict[str, List[Optional[str]]] = {"usuario": [], "rutina": []}
+        if ruta is not None:
+            self._cargar_nombres(os.path.join(ruta, ARCHIVO_NOMBRES))
+
+        # Índice por usuario: (fechas ordenadas, fila de cada fecha).
+        self._indice: Dict[int, Tuple[array, array]] = {}
+        usuarios = self._columna_completa("usuario")
+        fechas = self._columna_completa("fecha")
+        for fila in range(len(usuarios)):
+            self._indexar(usuarios[fila], fechas[fila], fila)
+
+    def _columna_completa(self, nombre: str) -> array:
+        c = self._columnas[nombre]
+        return c if isinstance(c, array) else c.todo()
+
+    def _cargar_nombres(self, ruta: str) -> None:
+        if os.path.exists(ruta):
+            with open(ruta, "r", encoding="utf-8") as f:
+                for linea in f:
+                    if not linea.endswith("\n"):
+                        break  # línea cortada a medias: se ignora
+                    d = json.loads(linea)
+                    self._asignar_nombre(d["tipo"], d["id"], d["nombre"])
+        self._nombres_archivo = open(ruta, "a", encoding="utf-8")
+
+    def _asignar_nombre(self, tipo: str, ident: int, nombre: Optional[str]) -> None:
+        nombres = self._nombres[tipo]
+        while len(nombres) <= ident:
+            nombres.append(None)
+        previo = nombres[ident]
+        if previo is not None and self._ids[tipo].get(_normalizar(previo)) == ident:
+            del self._ids[tipo][_normalizar(previo)]
+        nombres[ident] = nombre
+        if nombre is not None:
+            self._ids[tipo][_normalizar(nombre)] = ident
+
+    def _anotar_nombre(self, tipo: str, ident: int, nombre: Optional[str]) -> None:
+        self._asignar_nombre(tipo, ident, nombre)
+        if self._nombres_archivo is not None:
+            self._nombres_archivo.write(
+                json.dumps({"tipo": tipo, "id": ident, "nombre": nombre}, ensure_ascii=False)
+                + "\n"
+            )
+            self._nombres_archivo.flush()
+
+    def _id(self, tipo: str, nombre: str) -> int:
+        ident = self._ids[tipo].get(_normalizar(nombre))
+        if ident is None:
+            ident = len(self._nombres[tipo])
+            self._anotar_nombre(tipo, ident, nombre.strip())
+        return ident
+
+    def _indexar(self, usuario: int, fecha: int, fila: int) -> None:
+        par = self._indice.get(usuario)
+        if par is None:
+            par = (array("q"), array("I"))
+            self._indice[usuario] = par
+        fechas, filas = par
+        if len(fechas) == 0 or fecha >= fechas[-1]:
+            fechas.append(fecha)
+            filas.append(fila)
+        else:
+            # Check-in atrasado: se inserta en su lugar para seguir ordenado.
+            pos = bisect_right(fechas, fecha)
+            fechas.insert(pos, fecha)
+            filas.insert(pos, fila)
+
+    # --------- Escritura ---------
+    def __len__(self) -> int:
+        return len(self._columnas["usuario"])
+
+    def registrar(
+        self,
+        usuario: str,
+        rutina: str,
+        fecha: Fecha,
+        series: int,
+        repeticiones: int,
+        duracion_seg: int,
+        plan: tuple = (),
+    ) -> None:
+        """
+        `plan` no se guarda: viaja en el evento para quien acumule por
+        ejercicio (ver acumulados.plan_de_rutina).
+        """
+        if usuario.strip() == "" or rutina.strip() == "":
+            raise ValueError("La sesión necesita usuario y rutina.")
+        if series < 0 or repeticiones < 0 or duracion_seg < 0:
+            raise ValueError("Series, repeticiones y duración no pueden ser negativas.")
+        id_u = self._id("usuario", usuario)
+        id_r = self._id("rutina", rutina)
+        segundos = _a_segundos(fecha)
+        fila = len(self)
+        valores = {
+            "usuario": id_u,
+            "rutina": id_r,
+            "fecha": segundos,
+            "series": series,
+            "repeticiones": repeticiones,
+            "duracion": duracion_seg,
+        }
+        for nombre, _ in COLUMNAS:
+            self._columnas[nombre].append(valores[nombre])
+        self.vaciar()
+        self._indexar(id_u, segundos, fila)
+        self.eventos.emitir(
+            eventos.SESION_REGISTRADA,
+            usuario=self._nombres["usuario"][id_u],
+            rutina=self._nombres["rutina"][id_r],
+            fecha=datetime.fromtimestamp(segundos),
+            series=series,
+            repeticiones=repeticiones,
+            duracion_seg=duracion_seg,
+            plan=plan,
+        )
+
+    def renombrar_usuario(self, nombre: str, nuevo_nombre: str) -> None:
+        """El historial sigue al usuario: solo cambia el diccionario."""
+        ident = self._ids["usuario"].get(_normalizar(nombre))
+        if ident is not None:
+            self._anotar_nombre("usuario", ident, nuevo_nombre.strip())
+
+    def renombrar_rutina(self, nombre: str, nuevo_nombre: str) -> None:
+        ident = self._ids["rutina"].get(_normalizar(nombre))
+        if ident is not None:
+            self._anotar_nombre("rutina", ident, nuevo_nombre.strip())
+
+    def olvidar_usuario(self, nombre: str) -> None:
+        """
+        Libera el nombre (un usuario nuevo con el mismo nombre empieza de
+        cero); las filas anteriores se conservan, como todo lo ya escrito.
+        """
+        ident = self._ids["usuario"].get(_normalizar(nombre))
+        if ident is not None:
+            self._anotar_nombre("usuario", ident, None)
+            self._indice.pop(ident, None)
+
+    def seguir(self, bus: eventos.BusEventos) -> Callable[[], None]:
+        """
+        Mantiene los nombres al día con los eventos de `bus` (renombres de
+        usuario y rutina, bajas de usuario). Devuelve la función para dejar
+        de seguirlo.
+        """
+
+        def al_cambiar(evento: eventos.Evento) -> None:
+            d = evento.datos
+            if evento.tipo == eventos.USUARIO_RENOMBRADO:
+                self.renombrar_usuario(d["nombre"], d["nuevo_nombre"])
+            elif evento.tipo == eventos.USUARIO_ELIMINADO:
+                self.olvidar_usuario(d["nombre"])
+            elif d.get("nuevo_nombre") is not None:
+                self.renombrar_rutina(d["nombre"], d["nuevo_nombre"])
+
+        return bus.suscribir(
+            al_cambiar,
+            tipos=(
+                eventos.USUARIO_RENOMBRADO,
+                eventos.USUARIO_ELIMINADO,
+                eventos.RUTINA_EDITADA,
+            ),
+        )
+
+    def vaciar(self) -> None:
+        for c in self._columnas.values():
+            if not isinstance(c, array):
+                c.vaciar()
+
+    def cerrar(self) -> None:
+        for c in self._columnas.values():
+            if not isinstance(c, array):
+                c.cerrar()
+        if self._nombres_archivo is not None:
+            self._nombres_archivo.close()
+            self._nombres_archivo = None
+        self.eventos.cerrar()
+
+    def __enter__(self) -> "BitacoraSesiones":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # --------- Consultas ---------
+    def _rango(
+        self, usuario: str, desde: Optional[Fecha], hasta: Optional[Fecha]
+    ) -> Tuple[Optional[array], int, int]:
+        ident = self._ids["usuario"].get(_normalizar(usuario))
+        par = None if ident is None else self._indice.get(ident)
+        if par is None:
+            return None, 0, 0
+        fechas, filas = par
+        inicio = 0 if desde is None else bisect_left(fechas, _a_segundos(desde))
+        fin = len(fechas) if hasta is None else bisect_left(fechas, _a_segundos(hasta))
+        return filas, inicio, fin
+
+    def contar(
+        self, usuario: str, desde: Optional[Fecha] = None, hasta: Optional[Fecha] = None
+    ) -> int:
+        """Sesiones en [desde, hasta) sin leer ninguna fila."""
+        _, inicio, fin = self._rango(usuario, desde, hasta)
+        return max(0, fin - inicio)
+
+    def sesiones(
+        self, usuario: str, desde: Optional[Fecha] = None, hasta: Optional[Fecha] = None
+    ) -> List[Sesion]:
+        """Sesiones del usuario en [desde, hasta), de la más antigua a la más nueva."""
+        filas, inicio, fin = self._rango(usuario, desde, hasta)
+        res: List[Sesion] = []
+        for k in range(inicio, fin):
+            res.append(self.fila(filas[k]))
+        return res
+
+    def ultimos_dias(
+        self, usuario: str, dias: int = 30, ahora: Optional[datetime] = None
+    ) -> List[Sesion]:
+        if dias <= 0:
+            raise ValueError("La cantidad de días debe ser mayor a 0.")
+        ahora = datetime.now() if ahora is None else ahora
+        return self.sesiones(usuario, ahora - timedelta(days=dias), ahora + timedelta(seconds=1))
+
+    def fila(self, i: int) -> Sesion:
+        c = self._columnas
+        return Sesion(
+            self._nombres["usuario"][c["usuario"][i]] or "",
+            self._nombres["rutina"][c["rutina"][i]] or "",
+            datetime.fromtimestamp(c["fecha"][i]),
+            c["series"][i],
+            c["repeticiones"][i],
+            c["duracion"][i],
+        )
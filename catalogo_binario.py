@@ -0,0 +1,314 @@
+"""
+Formato binario de ancho fijo para el catálogo de ejercicios y las rutinas.
+
+El archivo se abre con mmap en modo lectura, así que arrancar con un catálogo
+de millones de ejercicios no lee ni valida nada por adelantado, y varios
+procesos comparten las mismas páginas. Los `Ejercicio`/`Rutina` se
+materializan solo cuando se piden.
+
+Distribución (little-endian):
+    cabecera     magic "GEJC", versión, nº registros, nº en catálogo,
+                 nº rutinas, nº miembros
+    registros    72 bytes c/u: nombre (64, UTF-8), reps u8, series u8,
+                 sec_por_rep u16, descanso u16, relleno
+    idx_catalogo u32 por ejercicio del catálogo, ordenado por nombre normalizado
+    rutinas      328 bytes c/u: nombre (64), descripción (256),
+                 primer miembro u32, cantidad u32
+    idx_rutinas  u32 por rutina, ordenado por nombre normalizado
+    miembros     u32 por ejercicio de rutina (índice de registro)
+
+Los registros del catálogo van primero y en orden de alta; detrás van los
+ejercicios que solo siguen vivos dentro de alguna rutina.
+"""
+
+import mmap
+import struct
+import weakref
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Gestion_POO import Ejercicio, Parametros, Rutina, SistemaGestion, Utilidades
+
+MAGIC = b"GEJC"
+VERSION = 1
+LARGO_NOMBRE = 64
+LARGO_DESCRIPCION = 256
+
+_CABECERA = struct.Struct("<4sHHIIII")
+_REGISTRO = struct.Struct(f"<{LARGO_NOMBRE}sBBHH2x")
+_RUTINA = struct.Struct(f"<{LARGO_NOMBRE}s{LARGO_DESCRIPCION}sII")
+_U32 = struct.Struct("<I")
+
+
+def _codificar(texto: str, largo: int, que: str) -> bytes:
+    datos = texto.encode("utf-8")
+    if len(datos) > largo:
+        raise ValueError(f"El {que} '{texto}' excede {largo} bytes en UTF-8.")
+    return datos
+
+
+def _decodificar(datos: bytes) -> str:
+    return datos.rstrip(b"\0").decode("utf-8")
+
+
+def _campos(ej) -> Tuple[str, int, int, int, int]:
+    if isinstance(ej, dict):
+        return (
+            ej["nombre"],
+            ej["repeticiones"],
+            ej["series"],
+            ej["sec_por_rep"],
+            ej["descanso_entre_series"],
+        )
+    return (
+        ej.nombre,
+        ej.repeticiones,
+        ej.series,
+        ej.sec_por_rep,
+        ej.descanso_entre_series,
+    )
+
+
+def _campos_rutina(r) -> Tuple[str, str, List]:
+    if isinstance(r, dict):
+        return r["nombre"], r["descripcion"], list(r["ejercicios"])
+    return r.nombre, r.descripcion, list(r.ejercicios)
+
+
+def escribir_catalogo(ruta: str, catalogo: Iterable, rutinas: Iterable = ()) -> None:
+    """
+    Escribe el catálogo y las rutinas. Acepta objetos de Gestion_POO o los
+    dicts de Gestion_funcional.
+    """
+    registros: List[Tuple[str, int, int, int, int]] = []
+    posicion: Dict[int, int] = {}
+    for ej in catalogo:
+        posicion[id(ej)] = len(registros)
+        registros.append(_campos(ej))
+    n_catalogo = len(registros)
+
+    datos_rutinas = []
+    miembros: List[int] = []
+    for r in rutinas:
+        nombre, desc, ejercicios = _campos_rutina(r)
+        inicio = len(miembros)
+        for ej in ejercicios:
+            i = posicion.get(id(ej))
+            if i is None:
+                i = len(registros)
+                posicion[id(ej)] = i
+                registros.append(_campos(ej))
+            miembros.append(i)
+        datos_rutinas.append((nombre, desc, inicio, len(ejercicios)))
+
+    idx_catalogo = sorted(
+        range(n_catalogo), key=lambda i: Utilidades.normalizar(registros[i][0])
+    )
+    idx_rutinas = sorted(
+        range(len(datos_rutinas)),
+        key=lambda i: Utilidades.normalizar(datos_rutinas[i][0]),
+    )
+
+    with open(ruta, "wb", buffering=1 << 20) as f:
+        f.write(
+            _CABECERA.pack(
+                MAGIC,
+                VERSION,
+                0,
+                len(registros),
+                n_catalogo,
+                len(datos_rutinas),
+                len(miembros),
+            )
+        )
+        for nombre, rep, ser, sec, descanso in registros:
+            if sec > 0xFFFF or descanso > 0xFFFF:
+                raise ValueError(f"Tiempos fuera de rango para '{nombre}'.")
+            f.write(
+                _REGISTRO.pack(
+                    _codificar(nombre, LARGO_NOMBRE, "nombre"), rep, ser, sec, descanso
+                )
+            )
+        f.write(struct.pack(f"<{n_catalogo}I", *idx_catalogo))
+        for nombre, desc, inicio, cantidad in datos_rutinas:
+            f.write(
+                _RUTINA.pack(
+                    _codificar(nombre, LARGO_NOMBRE, "nombre"),
+                    _codificar(desc, LARGO_DESCRIPCION, "descripción"),
+                    inicio,
+                    cantidad,
+                )
+            )
+        f.write(struct.pack(f"<{len(idx_rutinas)}I", *idx_rutinas))
+        f.write(struct.pack(f"<{len(miembros)}I", *miembros))
+
+
+def guardar_sistema(sistema: SistemaGestion, ruta: str) -> None:
+    escribir_catalogo(ruta, sistema.ejercicios_catalogo, sistema.rutinas)
+
+
+class CatalogoMapeado:
+    """Vista perezosa (solo lectura) sobre un archivo escrito con escribir_catalogo."""
+
+    def __init__(self, ruta: str):
+        with open(ruta, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            _,
+            self._n_registros,
+            self._n_catalogo,
+            self._n_rutinas,
+            self._n_miembros,
+        ) = _CABECERA.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError("El archivo no es un catálogo binario.")
+        if version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Versión de catálogo no soportada: {version}.")
+
+        self._off_registros = _CABECERA.size
+        self._off_idx_catalogo = self._off_registros + self._n_registros * _REGISTRO.size
+        self._off_rutinas = self._off_idx_catalogo + self._n_catalogo * 4
+        self._off_idx_rutinas = self._off_rutinas + self._n_rutinas * _RUTINA.size
+        self._off_miembros = self._off_idx_rutinas + self._n_rutinas * 4
+
+        # Ejercicios ya materializados, compartidos mientras alguien los use.
+        self._vivos: "weakref.WeakValueDictionary[int, Ejercicio]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def cerrar(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "CatalogoMapeado":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # --------- Lectura de registros ---------
+    def _registro(self, i: int) -> Tuple[bytes, int, int, int, int]:
+        return _REGISTRO.unpack_from(self._mm, self._off_registros + i * _REGISTRO.size)
+
+    def _nombre_registro(self, i: int) -> str:
+        inicio = self._off_registros + i * _REGISTRO.size
+        return _decodificar(self._mm[inicio : inicio + LARGO_NOMBRE])
+
+    def _ejercicio(self, i: int) -> Ejercicio:
+        ej = self._vivos.get(i)
+        if ej is None:
+            nombre, rep, ser, sec, descanso = self._registro(i)
+            ej = Ejercicio(_decodificar(nombre), rep, ser, sec, descanso)
+            self._vivos[i] = ej
+        return ej
+
+    def _u32(self, offset: int) -> int:
+        return _U32.unpack_from(self._mm, offset)[0]
+
+    def _buscar(self, nombre: str, off_idx: int, n: int, nombre_de) -> Optional[int]:
+        key = Utilidades.normalizar(nombre)
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = self._u32(off_idx + mid * 4)
+            actual = Utilidades.normalizar(nombre_de(i))
+            if actual < key:
+                lo = mid + 1
+            elif actual > key:
+                hi = mid
+            else:
+                return i
+        return None
+
+    # --------- Catálogo ---------
+    def __len__(self) -> int:
+        return self._n_catalogo
+
+    def __getitem__(self, i: int) -> Ejercicio:
+        if i < 0:
+            i += self._n_catalogo
+        if not 0 <= i < self._n_catalogo:
+            raise IndexError("Índice fuera del catálogo.")
+        return self._ejercicio(i)
+
+    def __iter__(self) -> Iterator[Ejercicio]:
+        for i in range(self._n_catalogo):
+            yield self._ejercicio(i)
+
+    def nombres(self) -> Iterator[str]:
+        for i in range(self._n_catalogo):
+            yield self._nombre_registro(i)
+
+    def buscar_ejercicio(self, nombre: str) -> Optional[Ejercicio]:
+        i = self._buscar(
+            nombre, self._off_idx_catalogo, self._n_catalogo, self._nombre_registro
+        )
+        return None if i is None else self._ejercicio(i)
+
+    def duracion_ejercicio_min(self, i: int) -> float:
+        """Duración del registro i sin materializar el Ejercicio."""
+        _, rep, ser, sec, descanso = self._registro(i)
+        return Parametros.tabla_duraciones(sec, descanso)[rep * 101 + ser]
+
+    # --------- Rutinas ---------
+    def _rutina_cruda(self, j: int) -> Tuple[str, str, int, int]:
+        nombre, desc, inicio, cantidad = _RUTINA.unpack_from(
+            self._mm, self._off_rutinas + j * _RUTINA.size
+        )
+        return _decodificar(nombre), _decodificar(desc), inicio, cantidad
+
+    def _miembros(self, inicio: int, cantidad: int) -> Tuple[int, ...]:
+        return struct.unpack_from(
+            f"<{cantidad}I", self._mm, self._off_miembros + inicio * 4
+        )
+
+    def cantidad_rutinas(self) -> int:
+        return self._n_rutinas
+
+    def nombres_rutinas(self) -> Iterator[str]:
+        for j in range(self._n_rutinas):
+            yield self._rutina_cruda(j)[0]
+
+    def buscar_rutina(self, nombre: str) -> Optional[Rutina]:
+        j = self._buscar(
+            nombre,
+            self._off_idx_rutinas,
+            self._n_rutinas,
+            lambda j: self._rutina_cruda(j)[0],
+        )
+        if j is None:
+            return None
+        nombre_r, desc, inicio, cantidad = self._rutina_cruda(j)
+        return Rutina(
+            nombre_r, desc, [self._ejercicio(i) for i in self._miembros(inicio, cantidad)]
+        )
+
+    def duracion_rutina_min(self, nombre: str) -> float:
+        j = self._buscar(
+            nombre,
+            self._off_idx_rutinas,
+            self._n_rutinas,
+            lambda j: self._rutina_cruda(j)[0],
+        )
+        if j is None:
+            raise ValueError("Rutina no encontrada.")
+        _, _, inicio, cantidad = self._rutina_cruda(j)
+        return sum(
+            self.duracion_ejercicio_min(i) for i in self._miembros(inicio, cantidad)
+        )
+
+    def cargar_en(self, sistema: SistemaGestion) -> None:
+        """Vuelca catálogo y rutinas en un SistemaGestion vacío (materializa todo)."""
+        for ej in self:
+            sistema.ejercicios_catalogo.append(ej)
+            sistema.idx_ejercicios[Utilidades.normalizar(ej.nombre)] = ej
+        for j in range(self._n_rutinas):
+            nombre, desc, inicio, cantidad = self._rutina_cruda(j)
+            r = Rutina(
+                nombre, desc, [self._ejercicio(i) for i in self._miembros(inicio, cantidad)]
+            )
+            sistema.rutinas.append(r)
+            sistema.idx_rutinas[Utilidades.normalizar(r.nombre)] = r
+        sistema._marcar_cambio()
@@ -0,0 +1,223 @@
+"""
+Armado automático de rutinas que se ajustan a una duración objetivo.
+
+A partir del catálogo de ejercicios se elige un subconjunto (sin repetir
+ejercicios, como exige `Rutina`) cuya duración total quede lo más cerca
+posible del objetivo dentro de una tolerancia, con ejercicios obligatorios,
+excluidos y un máximo de ejercicios opcionales.
+
+Las duraciones se manejan en segundos enteros. Es una mochila acotada: los
+ejercicios se agrupan por duración, cada grupo se parte en bloques de
+1, 2, 4, ... copias y los totales alcanzables se guardan como bits de un
+entero de Python, así que agregar un bloque es un desplazamiento y un OR.
+Con máximo de ejercicios hay un entero por cantidad usada. Para reconstruir
+la elección se anota qué bloque alcanzó primero cada estado.
+
+Acepta los `Ejercicio` de Gestion_POO o los dicts de Gestion_funcional.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TOLERANCIA_SEG = 60
+
+
+class RutinaPropuesta(NamedTuple):
+    ejercicios: List
+    segundos: int
+
+
+def _campos(ej) -> Tuple[str, int, int, int, int]:
+    if isinstance(ej, dict):
+        return (
+            ej["nombre"],
+            ej["repeticiones"],
+            ej["series"],
+            ej["sec_por_rep"],
+            ej["descanso_entre_series"],
+        )
+    return (
+        ej.nombre,
+        ej.repeticiones,
+        ej.series,
+        ej.sec_por_rep,
+        ej.descanso_entre_series,
+    )
+
+
+def _clave(nombre: str) -> str:
+    return nombre.strip().lower()
+
+
+def segundos_ejercicio(ej) -> int:
+    """Misma fórmula que las tablas de duración, sin pasar por minutos."""
+    _, rep, ser, sec, descanso = _campos(ej)
+    return rep * sec * ser + descanso * max(0, ser - 1)
+
+
+def _bits(x: int) -> Iterable[int]:
+    while x:
+        bajo = x & -x
+        yield bajo.bit_length() - 1
+        x ^= bajo
+
+
+class ConstructorRutinas:
+    """
+    Agrupa el catálogo por duración una sola vez; cada `proponer` trabaja
+    sobre los grupos, no sobre los ejercicios.
+    """
+
+    def __init__(self, catalogo: Iterable):
+        # duración (s) -> [(posición en el catálogo, ejercicio)]
+        self._por_duracion: Dict[int, List[Tuple[int, object]]] = {}
+        self._por_clave: Dict[str, Tuple[int, int, object]] = {}
+        for pos, ej in enumerate(catalogo):
+            nombre, rep, ser, sec, descanso = _campos(ej)
+            seg = rep * sec * ser + descanso * max(0, ser - 1)
+            self._por_duracion.setdefault(seg, []).append((pos, ej))
+            self._por_clave[_clave(nombre)] = (pos, seg, ej)
+        self._duraciones = sorted(self._por_duracion)
+
+    def __len__(self) -> int:
+        return len(self._por_clave)
+
+    def _resolver(self, nombres: Iterable[str], que: str) -> List[Tuple[int, int, object]]:
+        res: List[Tuple[int, int, object]] = []
+        vistos = set()
+        for n in nombres:
+            key = _clave(n)
+            if key in vistos:
+                raise ValueError(f"Ejercicio repetido en {que}: '{n}'.")
+            dato = self._por_clave.get(key)
+            if dato is None:
+                raise ValueError(f"Ejercicio '{n}' no existe en el catálogo.")
+            vistos.add(key)
+            res.append(dato)
+        return res
+
+    def proponer(
+        self,
+        objetivo_seg: int,
+        tolerancia_seg: int = TOLERANCIA_SEG,
+        incluir: Iterable[str] = (),
+        excluir: Iterable[str] = (),
+        max_ejercicios: Optional[int] = None,
+    ) -> RutinaPropuesta:
+        """
+        Ejercicios cuya duración total queda a lo sumo a `tolerancia_seg` del
+        objetivo; entre varias, la más cercana y, si hay máximo, la de menos
+        ejercicios. Los de `incluir` van primero; el resto, en orden de
+        catálogo. Lanza ValueError si no hay ninguna combinación válida.
+        """
+        if objetivo_seg <= 0:
+            raise ValueError("La duración objetivo debe ser mayor a 0.")
+        if tolerancia_seg < 0:
+            raise ValueError("La tolerancia no puede ser negativa.")
+        if max_ejercicios is not None and max_ejercicios <= 0:
+            raise ValueError("El máximo de ejercicios debe ser mayor a 0.")
+
+        fijos = self._resolver(incluir, "los obligatorios")
+        excluidos = self._resolver(excluir, "los excluidos")
+        fuera = set()
+        fuera_por_duracion: Dict[int, int] = {}
+        for _, seg, ej in fijos + excluidos:
+            if id(ej) in fuera:
+                raise ValueError("Un ejercicio no puede ser obligatorio y excluido a la vez.")
+            fuera.add(id(ej))
+            fuera_por_duracion[seg] = fuera_por_duracion.get(seg, 0) + 1
+
+        restante = objetivo_seg - sum(seg for _, seg, _ in fijos)
+        tope = restante + tolerancia_seg
+        if tope < 0:
+            raise ValueError("Los ejercicios obligatorios ya exceden la duración objetivo.")
+        cupo = None
+        if max_ejercicios is not None:
+            cupo = max_ejercicios - len(fijos)
+            if cupo < 0:
+                raise ValueError("Hay más ejercicios obligatorios que el máximo permitido.")
+
+        # Bloques (duración, copias) de la mochila acotada.
+        # De mayor a menor duración: como cada estado recuerda el primer
+        # bloque que lo alcanzó, sin máximo se tiende a usar pocos ejercicios.
+        bloques: List[Tuple[int, int]] = []
+        for d in reversed(self._duraciones):
+            if d > tope:
+                continue
+            disponibles = len(self._por_duracion[d]) - fuera_por_duracion.get(d, 0)
+            limite = min(disponibles, tope // d)
+            if cupo is not None:
+                limite = min(limite, cupo)
+            copias = 1
+            while limite > 0:
+                c = min(copias, limite)
+                bloques.append((d, c))
+                limite -= c
+                copias *= 2
+
+        # alcanzable[k]: bit s encendido si se llega a s segundos con k
+        # ejercicios opcionales (una sola capa si no hay máximo).
+        mascara = (1 << (tope + 1)) - 1
+        capas = 1 if cupo is None else cupo + 1
+        alcanzable = [1] + [0] * (capas - 1)
+        primero: Dict[Tuple[int, int], int] = {}
+        for i, (d, c) in enumerate(bloques):
+            paso = d * c
+            if cupo is None:
+                antes = alcanzable[0]
+                despues = antes | ((antes << paso) & mascara)
+                if despues != antes:
+                    alcanzable[0] = despues
+                    for s in _bits(despues & ~antes):
+                        primero[(0, s)] = i
+                continue
+            k = cupo
+            while k >= c:
+                antes = alcanzable[k]
+                despues = antes | ((alcanzable[k - c] << paso) & mascara)
+                if despues != antes:
+                    alcanzable[k] = despues
+                    for s in _bits(despues & ~antes):
+                        primero[(k, s)] = i
+                k -= 1
+
+        elegido = None
+        delta = 0
+        while elegido is None and delta <= tolerancia_seg:
+            for s in (restante - delta, restante + delta):
+                if s < 0 or s > tope:
+                    continue
+                for k in range(capas):
+                    if (alcanzable[k] >> s) & 1 and (s > 0 or fijos):
+                        elegido = (k, s)
+                        break
+                if elegido is not None:
+                    break
+            delta += 1
+        if elegido is None:
+            raise ValueError(
+                "No hay combinación de ejercicios que se ajuste a la duración pedida."
+            )
+
+        # Se recorre la cadena de bloques hacia atrás (índices decrecientes,
+        # así que ningún bloque se usa dos veces).
+        por_duracion: Dict[int, int] = {}
+        k, s = elegido
+        while s > 0:
+            d, c = bloques[primero[(k, s)]]
+            por_duracion[d] = por_duracion.get(d, 0) + c
+            s -= d * c
+            if cupo is not None:
+                k -= c
+
+        extra: List[Tuple[int, object]] = []
+        for d, n in por_duracion.items():
+            for pos, ej in self._por_duracion[d]:
+                if n == 0:
+                    break
+                if id(ej) not in fuera:
+                    extra.append((pos, ej))
+                    n -= 1
+        extra.sort(key=lambda par: par[0])
+        ejercicios = [ej for _, _, ej in fijos] + [ej for _, ej in extra]
+        segundos = sum(seg for _, seg, _ in fijos) + elegido[1]
+        return RutinaPropuesta(ejercicios, segundos)
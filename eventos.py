@@ -0,0 +1,179 @@
+"""
+Flujo de eventos de cambio del dominio.
+
+Ambas implementaciones publican un `Evento` por cada modificación exitosa
+(alta de usuario, creación de rutina, asignación, ...) en un `BusEventos`.
+Los suscriptores pueden ser síncronos (se llaman en el mismo hilo, al
+momento) o asíncronos (un hilo propio por suscriptor con su cola), y pueden
+recibir los eventos de uno en uno o por lotes.
+
+Dentro de `bus.lote()` los eventos se retienen y se entregan juntos al
+salir; si el bloque termina con excepción se descartan, así que una
+transacción revertida no avisa de cambios que nunca ocurrieron.
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+# Tipos de evento y sus `datos`. En las actualizaciones, repeticiones/series
+# en None significan "sin cambio", igual que en la operación. Los nombres no
+# siempre vienen con la capitalización guardada: compárense normalizados.
+USUARIO_AGREGADO = "usuario_agregado"  # nombre, edad
+USUARIO_RENOMBRADO = "usuario_renombrado"  # nombre, nuevo_nombre
+USUARIO_EDAD_CAMBIADA = "usuario_edad_cambiada"  # nombre, edad
+USUARIO_ELIMINADO = "usuario_eliminado"  # nombre
+EJERCICIO_CREADO = "ejercicio_creado"  # nombre, repeticiones, series
+EJERCICIO_RENOMBRADO = "ejercicio_renombrado"  # nombre, nuevo_nombre
+EJERCICIO_ACTUALIZADO = "ejercicio_actualizado"  # nombre, repeticiones, series
+EJERCICIO_ELIMINADO = "ejercicio_eliminado"  # nombre, rutinas (las que lo contenían)
+RUTINA_CREADA = "rutina_creada"  # nombre, descripcion, ejercicios
+RUTINA_EDITADA = "rutina_editada"  # nombre, nuevo_nombre, descripcion
+RUTINA_ELIMINADA = "rutina_eliminada"  # nombre, usuarios (a los que se les quitó)
+RUTINA_EJERCICIO_AGREGADO = "rutina_ejercicio_agregado"  # rutina, ejercicio
+RUTINA_EJERCICIO_ELIMINADO = "rutina_ejercicio_eliminado"  # rutina, ejercicio
+RUTINA_EJERCICIO_ACTUALIZADO = "rutina_ejercicio_actualizado"  # rutina, ejercicio, repeticiones, series
+RUTINA_ASIGNADA = "rutina_asignada"  # usuario, rutina
+# version, sec_por_rep, descanso_entre_series, todos, ejercicios (cuántos se reescribieron)
+PERFIL_TIEMPOS_CAMBIADO = "perfil_tiempos_cambiado"
+# usuario, rutina, fecha, series, repeticiones, duracion_seg, plan (lo publica la bitácora)
+SESION_REGISTRADA = "sesion_registrada"
+
+
+class Evento(NamedTuple):
+    secuencia: int
+    tipo: str
+    datos: Dict[str, object]
+
+
+class _Suscripcion:
+    def __init__(
+        self,
+        funcion: Callable,
+        tipos: Optional[Set[str]],
+        por_lotes: bool,
+        asincrono: bool,
+        errores: List[BaseException],
+    ):
+        self.funcion = funcion
+        self.tipos = tipos
+        self.por_lotes = por_lotes
+        self.cola: Optional["queue.Queue"] = None
+        self.hilo: Optional[threading.Thread] = None
+        if asincrono:
+            self.cola = queue.Queue()
+            self.hilo = threading.Thread(
+                target=self._consumir, args=(errores,), daemon=True
+            )
+            self.hilo.start()
+
+    def _consumir(self, errores: List[BaseException]) -> None:
+        while True:
+            carga = self.cola.get()
+            try:
+                if carga is None:
+                    return
+                self.funcion(carga)
+            except Exception as e:  # un consumidor roto no detiene a los demás
+                errores.append(e)
+            finally:
+                self.cola.task_done()
+
+    def entregar(self, eventos: List[Evento]) -> None:
+        if self.tipos is not None:
+            eventos = [e for e in eventos if e.tipo in self.tipos]
+        if not eventos:
+            return
+        cargas = [eventos] if self.por_lotes else eventos
+        for carga in cargas:
+            if self.cola is not None:
+                self.cola.put(carga)
+            else:
+                self.funcion(carga)
+
+    def detener(self) -> None:
+        if self.cola is not None:
+            self.cola.put(None)
+            self.hilo.join()
+            self.cola = None
+
+
+class BusEventos:
+    def __init__(self):
+        self._suscripciones: List[_Suscripcion] = []
+        self._pendientes: List[Evento] = []
+        self._profundidad = 0
+        self._secuencia = 0
+        # Excepciones lanzadas por suscriptores asíncronos.
+        self.errores: List[BaseException] = []
+
+    def suscribir(
+        self,
+        funcion: Callable,
+        tipos: Optional[Iterable[str]] = None,
+        asincrono: bool = False,
+        por_lotes: bool = False,
+    ) -> Callable[[], None]:
+        """
+        Registra `funcion`, que recibe un Evento (o una lista si `por_lotes`).
+        `tipos` limita los eventos que le llegan. Devuelve la función para
+        cancelar la suscripción.
+        """
+        sus = _Suscripcion(
+            funcion,
+            None if tipos is None else set(tipos),
+            por_lotes,
+            asincrono,
+            self.errores,
+        )
+        self._suscripciones.append(sus)
+
+        def cancelar() -> None:
+            if sus in self._suscripciones:
+                self._suscripciones.remove(sus)
+                sus.detener()
+
+        return cancelar
+
+    def emitir(self, tipo: str, **datos) -> Evento:
+        self._secuencia += 1
+        evento = Evento(self._secuencia, tipo, datos)
+        if self._profundidad > 0:
+            self._pendientes.append(evento)
+        else:
+            self._entregar([evento])
+        return evento
+
+    def _entregar(self, eventos: List[Evento]) -> None:
+        for sus in list(self._suscripciones):
+            sus.entregar(eventos)
+
+    @contextmanager
+    def lote(self) -> Iterator["BusEventos"]:
+        """Retiene los eventos del bloque; se descartan si termina con error."""
+        inicio = len(self._pendientes)
+        secuencia = self._secuencia
+        self._profundidad += 1
+        try:
+            yield self
+        except BaseException:
+            del self._pendientes[inicio:]
+            self._secuencia = secuencia
+            raise
+        finally:
+            self._profundidad -= 1
+        if self._profundidad == 0 and self._pendientes:
+            eventos, self._pendientes = self._pendientes, []
+            self._entregar(eventos)
+
+    def esperar(self) -> None:
+        """Bloquea hasta que los suscriptores asíncronos procesen lo recibido."""
+        for sus in list(self._suscripciones):
+            if sus.cola is not None:
+                sus.cola.join()
+
+    def cerrar(self) -> None:
+        for sus in self._suscripciones:
+            sus.detener()
+        self._suscripciones = []
@@ -0,0 +1,320 @@
+"""
+Despliegue fragmentado de SistemaGestion en varios procesos.
+
+Cada fragmento es un proceso con su propio SistemaGestion. Los usuarios se
+reparten por hash estable del nombre normalizado (o de la sucursal, si se
+indica) y todas sus operaciones se envían al fragmento dueño. El catálogo de
+ejercicios y las rutinas se replican: el coordinador valida cada cambio en
+el primer fragmento y, si es válido, lo aplica en el resto.
+
+`reporte_por_usuario` combina los reportes de todos los fragmentos en el
+orden global de alta de los usuarios.
+"""
+
+import heapq
+import io
+import multiprocessing as mp
+import os
+import sys
+import zlib
+from contextlib import redirect_stdout
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+import reportes
+from Gestion_POO import SistemaGestion, Utilidades
+
+FILAS_POR_MENSAJE = 512
+
+def _trabajador(con) -> None:
+    sistema = SistemaGestion()
+    orden: Dict[int, int] = {}
+    while True:
+        msg = con.recv()
+        if msg is None:
+            break
+        op, args = msg
+        if op == "reporte":
+            try:
+                bloque: List[Tuple[int, tuple]] = []
+                for u in sistema.usuarios:
+                    seq = orden[id(u)]
+                    if len(u.rutinas) == 0:
+                        bloque.append((seq, (u.nombre, u.edad, None, None)))
+                    for r in u.rutinas:
+                        bloque.append((seq, (u.nombre, u.edad, r.nombre, r.duracion_total_min())))
+                    if len(bloque) >= FILAS_POR_MENSAJE:
+                        con.send(("bloque", bloque))
+                        bloque = []
+                con.send(("bloque", bloque))
+                con.send(("fin", None))
+            except Exception as e:
+                con.send(("fallo", f"{type(e).__name__}: {e}"))
+            continue
+
+        salida = io.StringIO()
+        try:
+            with redirect_stdout(salida):
+                if op == "agregar_usuario":
+                    nombre, edad, seq = args
+                    sistema.agregar_usuario(nombre, edad)
+                    orden[id(sistema._buscar_usuario(nombre))] = seq
+                    res = None
+                elif op == "eliminar_usuario":
+                    u = sistema._buscar_usuario(args[0])
+                    sistema.eliminar_usuario(*args)
+                    orden.pop(id(u), None)
+                    res = None
+                else:
+                    res = getattr(sistema, op)(*args)
+            con.send(("ok", res, salida.getvalue()))
+        except ValueError as e:
+            con.send(("error", str(e), salida.getvalue()))
+        except Exception as e:
+            # Cualquier otro fallo también se responde: el padre espera en recv.
+            con.send(("fallo", f"{type(e).__name__}: {e}", salida.getvalue()))
+
+
+def fragmento_por_clave(clave: str, n_fragmentos: int) -> int:
+    """Hash estable entre procesos (hash() de Python cambia por proceso)."""
+    return zlib.crc32(Utilidades.normalizar(clave).encode("utf-8")) % n_fragmentos
+
+
+class SistemaFragmentado:
+    def __init__(self, n_fragmentos: Optional[int] = None):
+        n = n_fragmentos if n_fragmentos is not None else (os.cpu_count() or 1)
+        if n <= 0:
+            raise ValueError("Debe haber al menos un fragmento.")
+        self._conexiones = []
+        self._procesos = []
+        for _ in range(n):
+            padre, hijo = mp.Pipe()
+            p = mp.Process(target=_trabajador, args=(hijo,), daemon=True)
+            p.start()
+            hijo.close()
+            self._conexiones.append(padre)
+            self._procesos.append(p)
+        # Directorio: nombre normalizado -> fragmento dueño.
+        self._directorio: Dict[str, int] = {}
+        self._siguiente_seq = 0
+
+    @property
+    def n_fragmentos(self) -> int:
+        return len(self._conexiones)
+
+    def cerrar(self) -> None:
+        for con in self._conexiones:
+            con.send(None)
+        for p in self._procesos:
+            p.join()
+        for con in self._conexiones:
+            con.close()
+        self._conexiones = []
+        self._procesos = []
+
+    def __enter__(self) -> "SistemaFragmentado":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # --------- Comunicación ---------
+    @staticmethod
+    def _respuesta(con, mostrar: bool = True):
+        estado, valor, impreso = con.recv()
+        if mostrar and impreso:
+            print(impreso, end="")
+        if estado == "error":
+            raise ValueError(valor)
+        if estado == "fallo":
+            raise RuntimeError(valor)
+        return valor
+
+    def _en(self, fragmento: int, op: str, *args):
+        con = self._conexiones[fragmento]
+        con.send((op, args))
+        return self._respuesta(con)
+
+    def _replicar(self, op: str, *args):
+        # El primer fragmento valida; si falla, nadie más aplica el cambio.
+        res = self._en(0, op, *args)
+        resto = self._conexiones[1:]
+        for con in resto:
+            con.send((op, args))
+        # Se leen todas las respuestas antes de avisar de un error; si no,
+        # las que quedan pendientes desfasan las tuberías.
+        primer_error: Optional[Exception] = None
+        for con in resto:
+            try:
+                self._respuesta(con, mostrar=False)
+            except (ValueError, RuntimeError) as e:
+                if primer_error is None:
+                    primer_error = e
+        if primer_error is not None:
+            raise primer_error
+        return res
+
+    def _dueno(self, nombre_usuario: str) -> int:
+        fragmento = self._directorio.get(Utilidades.normalizar(nombre_usuario))
+        if fragmento is None:
+            raise ValueError("Usuario no encontrado.")
+        return fragmento
+
+    # -------- Usuarios --------
+    def agregar_usuario(self, nombre: str, edad: int, sucursal: Optional[str] = None) -> None:
+        key = Utilidades.normalizar(nombre)
+        if key in self._directorio:
+            raise ValueError("Ya existe un usuario con ese nombre.")
+        fragmento = fragmento_por_clave(
+            nombre if sucursal is None else sucursal, self.n_fragmentos
+        )
+        self._en(fragmento, "agregar_usuario", nombre, edad, self._siguiente_seq)
+        self._siguiente_seq += 1
+        self._directorio[key] = fragmento
+
+    def renombrar_usuario(self, nombre: str, nuevo_nombre: str) -> None:
+        old_key = Utilidades.normalizar(nombre)
+        new_key = Utilidades.normalizar(nuevo_nombre)
+        fragmento = self._dueno(nombre)
+        if new_key != old_key and new_key in self._directorio:
+            raise ValueError("Ya existe un usuario con ese nombre.")
+        self._en(fragmento, "renombrar_usuario", nombre, nuevo_nombre)
+        # El usuario no cambia de fragmento al renombrarse.
+        del self._directorio[old_key]
+        self._directorio[new_key] = fragmento
+
+    def cambiar_edad_usuario(self, nombre: str, nueva_edad: int) -> None:
+        self._en(self._dueno(nombre), "cambiar_edad_usuario", nombre, nueva_edad)
+
+    def eliminar_usuario(self, nombre: str) -> None:
+        self._en(self._dueno(nombre), "eliminar_usuario", nombre)
+        del self._directorio[Utilidades.normalizar(nombre)]
+
+    def asignar_rutina_a_usuario(self, nombre_usuario: str, nombre_rutina: str) -> None:
+        self._en(
+            self._dueno(nombre_usuario),
+            "asignar_rutina_a_usuario",
+            nombre_usuario,
+            nombre_rutina,
+        )
+
+    def mostrar_rutinas_de_usuario(self, nombre_usuario: str) -> None:
+        fragmento = self._directorio.get(Utilidades.normalizar(nombre_usuario))
+        if fragmento is None:
+            print("Usuario no encontrado.")
+            return
+        self._en(fragmento, "mostrar_rutinas_de_usuario", nombre_usuario)
+
+    def registrar_sesion(self, nombre_usuario: str, nombre_rutina: str, *args) -> None:
+        # La bitácora de cada usuario vive en el fragmento dueño.
+        self._en(
+            self._dueno(nombre_usuario), "registrar_sesion", nombre_usuario, nombre_rutina, *args
+        )
+
+    def sesiones_de_usuario(self, nombre_usuario: str, dias: int = 30) -> list:
+        return self._en(
+            self._dueno(nombre_usuario), "sesiones_de_usuario", nombre_usuario, dias
+        )
+
+    def fragmento_de(self, nombre_usuario: str) -> int:
+        return self._dueno(nombre_usuario)
+
+    # -------- Catálogo y rutinas (replicados) --------
+    def crear_ejercicio(self, nombre: str, repeticiones: int, series: int) -> None:
+        self._replicar("crear_ejercicio", nombre, repeticiones, series)
+
+    def renombrar_ejercicio(self, nombre: str, nuevo_nombre: str) -> None:
+        self._replicar("renombrar_ejercicio", nombre, nuevo_nombre)
+
+    def actualizar_ejercicio(
+        self, nombre: str, repeticiones: Optional[int] = None, series: Optional[int] = None
+    ) -> None:
+        self._replicar("actualizar_ejercicio", nombre, repeticiones, series)
+
+    def eliminar_ejercicio(self, nombre: str) -> None:
+        self._replicar("eliminar_ejercicio", nombre)
+
+    def aplicar_perfil_tiempos(
+        self, sec_por_rep: int, descanso_entre_series: int, todos: bool = False
+    ) -> int:
+        # Cada fragmento tiene su copia del catálogo: todos deben recalcular.
+        return self._replicar(
+            "aplicar_perfil_tiempos", sec_por_rep, descanso_entre_series, todos
+        )
+
+    def listar_ejercicios(self) -> None:
+        self._en(0, "listar_ejercicios")
+
+    def crear_rutina(
+        self, nombre: str, descripcion: str, nombres_ejercicios: List[str]
+    ) -> None:
+        self._replicar("crear_rutina", nombre, descripcion, list(nombres_ejercicios))
+
+    def editar_rutina(
+        self,
+        nombre: str,
+        nuevo_nombre: Optional[str] = None,
+        nueva_desc: Optional[str] = None,
+    ) -> None:
+        self._replicar("editar_rutina", nombre, nuevo_nombre, nueva_desc)
+
+    def eliminar_rutina(self, nombre: str) -> None:
+        # Cada fragmento la quita de sus propios usuarios.
+        self._replicar("eliminar_rutina", nombre)
+
+    def rutina_agregar_ejercicio(self, nombre_rutina: str, nombre_ejercicio: str) -> None:
+        self._replicar("rutina_agregar_ejercicio", nombre_rutina, nombre_ejercicio)
+
+    def rutina_eliminar_ejercicio(self, nombre_rutina: str, nombre_ejercicio: str) -> None:
+        self._replicar("rutina_eliminar_ejercicio", nombre_rutina, nombre_ejercicio)
+
+    def rutina_actualizar_ejercicio(
+        self,
+        nombre_rutina: str,
+        nombre_ejercicio: str,
+        repeticiones: Optional[int] = None,
+        series: Optional[int] = None,
+    ) -> None:
+        self._replicar(
+            "rutina_actualizar_ejercicio",
+            nombre_rutina,
+            nombre_ejercicio,
+            repeticiones,
+            series,
+        )
+
+    def listar_rutinas(self) -> None:
+        self._en(0, "listar_rutinas")
+
+    # -------- Reporte combinado --------
+    def _filas_de(self, con) -> Iterator[Tuple[int, tuple]]:
+        while True:
+            tipo, bloque = con.recv()
+            if tipo == "fin":
+                return
+            if tipo == "fallo":
+                raise RuntimeError(bloque)
+            yield from bloque
+
+    def filas_reporte(self) -> Iterator[Tuple[str, int, Optional[str], Optional[float]]]:
+        """Filas de todos los fragmentos en el orden global de alta."""
+        for con in self._conexiones:
+            con.send(("reporte", ()))
+        flujos = [self._filas_de(con) for con in self._conexiones]
+        try:
+            for _, fila in heapq.merge(*flujos, key=lambda par: par[0]):
+                yield fila
+        finally:
+            # Si se abandona el reporte a medias, se vacían las tuberías.
+            for flujo in flujos:
+                for _ in flujo:
+                    pass
+
+    def reporte_por_usuario(self, salida: Optional[TextIO] = None) -> None:
+        if len(self._directorio) == 0:
+            print("No hay usuarios.", file=salida)
+            return
+        reportes.escribir_texto(
+            self.filas_reporte(),
+            sys.stdout if salida is None else salida,
+            Utilidades.minutos_a_texto,
+        )
@@ -0,0 +1,372 @@
+"""
+Instantánea inmutable del sistema en memoria compartida.
+
+`publicar` vuelca usuarios, rutinas y ejercicios (de un `SistemaGestion` o
+del estado `st` de Gestion_funcional) en un solo bloque de
+`multiprocessing.shared_memory`, con un diseño plano: cada campo es una
+columna de ancho fijo y los textos van en un bloque UTF-8 con su tabla de
+desplazamientos. Los procesos trabajadores se conectan por nombre con
+`InstantaneaCompartida.abrir` y leen directamente de esas páginas a través
+de `memoryview`, sin copiar ni deserializar nada; cada consulta decodifica
+solo lo que devuelve.
+
+Las búsquedas por nombre son binarias sobre un índice ordenado de los
+nombres normalizados (también en el bloque). Las duraciones de rutinas y
+usuarios se guardan ya calculadas en segundos.
+
+Secciones (orden nativo de bytes, es memoria de la misma máquina):
+    ejercicios  reps u8, series u8, sec_por_rep u32, descanso u32,
+                nombres, claves, índice (solo catálogo)
+    rutinas     nombres, claves, descripciones, inicio u32 (n+1),
+                miembros u32, segundos u32, índice (solo las del sistema)
+    usuarios    nombres, claves, edad u8, inicio u32 (n+1), miembros u32,
+                segundos u32, índice
+
+La instantánea no cambia: para reflejar cambios se publica otra y los
+trabajadores abren la nueva.
+"""
+
+import struct
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import constructor_rutinas
+import serializacion
+
+MAGIC = b"GEJM"
+VERSION = 1
+
+# (nombre, código de memoryview); los textos son pares *_off/* (bytes).
+SECCIONES: Tuple[Tuple[str, str], ...] = (
+    ("ej_reps", "B"),
+    ("ej_series", "B"),
+    ("ej_sec", "I"),
+    ("ej_descanso", "I"),
+    ("ej_nombre_off", "I"),
+    ("ej_nombre", "B"),
+    ("ej_clave_off", "I"),
+    ("ej_clave", "B"),
+    ("ej_idx", "I"),
+    ("r_nombre_off", "I"),
+    ("r_nombre", "B"),
+    ("r_clave_off", "I"),
+    ("r_clave", "B"),
+    ("r_desc_off", "I"),
+    ("r_desc", "B"),
+    ("r_inicio", "I"),
+    ("r_miembros", "I"),
+    ("r_seg", "I"),
+    ("r_idx", "I"),
+    ("u_nombre_off", "I"),
+    ("u_nombre", "B"),
+    ("u_clave_off", "I"),
+    ("u_clave", "B"),
+    ("u_edad", "B"),
+    ("u_inicio", "I"),
+    ("u_miembros", "I"),
+    ("u_seg", "I"),
+    ("u_idx", "I"),
+)
+
+# magic, versión, n ejercicios, n catálogo, n rutinas, n rutinas del
+# sistema, n usuarios; luego (offset, largo) por sección.
+_CABECERA = struct.Struct("=4sH2xIIIII")
+_SECCION = struct.Struct("=QQ")
+_ALINEACION = 8
+
+
+class EjercicioPlano(NamedTuple):
+    nombre: str
+    repeticiones: int
+    series: int
+    sec_por_rep: int
+    descanso_entre_series: int
+
+    def duracion_minutos(self) -> float:
+        return constructor_rutinas.segundos_ejercicio(self) / 60.0
+
+
+class UsuarioPlano(NamedTuple):
+    nombre: str
+    edad: int
+    rutinas: Tuple[Tuple[str, float], ...]  # (nombre de rutina, minutos)
+    total_min: float
+
+
+def _norm(s: str) -> str:
+    return s.strip().lower()
+
+
+def _textos(valores: List[str]) -> Tuple[array, bytes]:
+    offsets = array("I", [0])
+    partes: List[bytes] = []
+    total = 0
+    for v in valores:
+        b = v.encode("utf-8")
+        partes.append(b)
+        total += len(b)
+        offsets.append(total)
+    return offsets, b"".join(partes)
+
+
+def _indice(claves: List[str], n: int) -> array:
+    # Orden por bytes UTF-8, el mismo que usa la búsqueda sobre el bloque.
+    return array("I", sorted(range(n), key=lambda i: claves[i].encode("utf-8")))
+
+
+def _aplanar(fuente) -> Dict[str, object]:
+    a = serializacion.alcance(fuente)
+    r_seg = array("I")
+    for k in range(len(a.rutinas)):
+        seg = 0
+        for i in a.r_miembros[a.r_inicio[k] : a.r_inicio[k + 1]]:
+            seg += constructor_rutinas.segundos_ejercicio(a.ejercicios[i])
+        r_seg.append(seg)
+    u_nombres = [nombre for nombre, _ in a.usuarios]
+    u_inicio = a.u_inicio
+    u_miembros = a.u_miembros
+
+    u_seg = array("I")
+    for k in range(len(u_nombres)):
+        seg = 0
+        for i in u_miembros[u_inicio[k] : u_inicio[k + 1]]:
+            seg += r_seg[i]
+        u_seg.append(seg)
+
+    ej_nombres: List[str] = []
+    columnas = {
+        "ej_reps": array("B"),
+        "ej_series": array("B"),
+        "ej_sec": array("I"),
+        "ej_descanso": array("I"),
+    }
+    for ej in a.ejercicios:
+        nombre, rep, ser, sec, descanso = serializacion.campos_ejercicio(ej)
+        ej_nombres.append(nombre)
+        columnas["ej_reps"].append(rep)
+        columnas["ej_series"].append(ser)
+        columnas["ej_sec"].append(sec)
+        columnas["ej_descanso"].append(descanso)
+
+    secciones: Dict[str, object] = dict(columnas)
+    for prefijo, nombres, n_indice in (
+        ("ej", ej_nombres, a.n_catalogo),
+        ("r", [nombre for nombre, _ in a.rutinas], a.n_rutinas_sistema),
+        ("u", u_nombres, len(u_nombres)),
+    ):
+        claves = [_norm(n) for n in nombres]
+        secciones[f"{prefijo}_nombre_off"], secciones[f"{prefijo}_nombre"] = _textos(nombres)
+        secciones[f"{prefijo}_clave_off"], secciones[f"{prefijo}_clave"] = _textos(claves)
+        secciones[f"{prefijo}_idx"] = _indice(claves, n_indice)
+    secciones["r_desc_off"], secciones["r_desc"] = _textos([desc for _, desc in a.rutinas])
+    secciones.update(
+        r_inicio=a.r_inicio,
+        r_miembros=a.r_miembros,
+        r_seg=r_seg,
+        u_edad=array("B", (edad for _, edad in a.usuarios)),
+        u_inicio=u_inicio,
+        u_miembros=u_miembros,
+        u_seg=u_seg,
+    )
+    secciones["_conteos"] = (
+        len(a.ejercicios),
+        a.n_catalogo,
+        len(a.rutinas),
+        a.n_rutinas_sistema,
+        len(u_nombres),
+    )
+    return secciones
+
+
+def publicar(fuente, nombre: Optional[str] = None) -> "InstantaneaCompartida":
+    """
+    Crea el bloque compartido con el estado actual de `fuente` y lo devuelve
+    abierto. Quien publica debe llamar a `liberar()` cuando ya nadie lo use.
+    """
+    secciones = _aplanar(fuente)
+    datos: List[bytes] = []
+    for nombre_seccion, _ in SECCIONES:
+        valor = secciones[nombre_seccion]
+        datos.append(valor if isinstance(valor, bytes) else valor.tobytes())
+
+    pos = _CABECERA.size + len(SECCIONES) * _SECCION.size
+    ubicaciones: List[Tuple[int, int]] = []
+    for d in datos:
+        pos += -pos % _ALINEACION
+        ubicaciones.append((pos, len(d)))
+        pos += len(d)
+
+    shm = shared_memory.SharedMemory(name=nombre, create=True, size=max(pos, 1))
+    try:
+        buf = shm.buf
+        _CABECERA.pack_into(buf, 0, MAGIC, VERSION, *secciones["_conteos"])
+        off = _CABECERA.size
+        for (inicio, largo), d in zip(ubicaciones, datos):
+            _SECCION.pack_into(buf, off, inicio, largo)
+            off += _SECCION.size
+            buf[inicio : inicio + largo] = d
+        del buf
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return InstantaneaCompartida(shm, propia=True)
+
+
+def _conectar(nombre: str) -> shared_memory.SharedMemory:
+    # Solo quien publica libera el bloque.
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    # Antes de 3.13 conectarse también registra el bloque en el rastreador de
+    # recursos, que lo borra al terminar el proceso, y no hay forma pública
+    # de evitarlo. Si el rastreador es propio de este proceso (no heredado
+    # de quien publicó), se quita ese registro; quitarlo de uno compartido
+    # borraría el de quien publicó. `_resource_tracker._fd` es interno pero
+    # estable hasta 3.12, y esta rama no corre en versiones posteriores.
+    propio = resource_tracker._resource_tracker._fd is None
+    shm = shared_memory.SharedMemory(name=nombre)
+    if propio:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class InstantaneaCompartida:
+    def __init__(self, shm: shared_memory.SharedMemory, propia: bool = False):
+        self._shm = shm
+        self._propia = propia
+        buf = shm.buf
+        (
+            magic,
+            version,
+            self._n_ej,
+            self._n_catalogo,
+            self._n_rutinas,
+            self._n_rutinas_sistema,
+            self._n_usuarios,
+        ) = _CABECERA.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("El bloque no es una instantánea del sistema.")
+        if version != VERSION:
+            raise ValueError(f"Versión de instantánea no soportada: {version}.")
+        self._vistas: Dict[str, memoryview] = {}
+        off = _CABECERA.size
+        for nombre_seccion, codigo in SECCIONES:
+            inicio, largo = _SECCION.unpack_from(buf, off)
+            off += _SECCION.size
+            self._vistas[nombre_seccion] = buf[inicio : inicio + largo].cast(codigo)
+        del buf
+
+    @classmethod
+    def abrir(cls, nombre: str) -> "InstantaneaCompartida":
+        """Se conecta (sin copiar) a una instantánea ya publicada."""
+        return cls(_conectar(nombre))
+
+    @property
+    def nombre(self) -> str:
+        return self._shm.name
+
+    def cerrar(self) -> None:
+        for vista in self._vistas.values():
+            vista.release()
+        self._vistas = {}
+        self._shm.close()
+
+    def liberar(self) -> None:
+        """Cierra y, si esta instancia lo publicó, borra el bloque."""
+        self.cerrar()
+        if self._propia:
+            self._shm.unlink()
+
+    def __enter__(self) -> "InstantaneaCompartida":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._propia:
+            self.liberar()
+        else:
+            self.cerrar()
+
+    # --------- Lectura ---------
+    def _texto(self, seccion: str, i: int) -> str:
+        off = self._vistas[seccion + "_off"]
+        return bytes(self._vistas[seccion][off[i] : off[i + 1]]).decode("utf-8")
+
+    def _buscar(self, prefijo: str, nombre: str) -> Optional[int]:
+        key = _norm(nombre).encode("utf-8")
+        idx = self._vistas[prefijo + "_idx"]
+        off = self._vistas[prefijo + "_clave_off"]
+        claves = self._vistas[prefijo + "_clave"]
+        lo, hi = 0, len(idx)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = idx[mid]
+            actual = bytes(claves[off[i] : off[i + 1]])
+            if actual < key:
+                lo = mid + 1
+            elif actual > key:
+                hi = mid
+            else:
+                return i
+        return None
+
+    def _ejercicio(self, i: int) -> EjercicioPlano:
+        v = self._vistas
+        return EjercicioPlano(
+            self._texto("ej_nombre", i),
+            v["ej_reps"][i],
+            v["ej_series"][i],
+            v["ej_sec"][i],
+            v["ej_descanso"][i],
+        )
+
+    def cantidad_ejercicios(self) -> int:
+        return self._n_catalogo
+
+    def cantidad_rutinas(self) -> int:
+        return self._n_rutinas_sistema
+
+    def cantidad_usuarios(self) -> int:
+        return self._n_usuarios
+
+    def nombres_usuarios(self) -> Iterator[str]:
+        for i in range(self._n_usuarios):
+            yield self._texto("u_nombre", i)
+
+    def buscar_ejercicio(self, nombre: str) -> Optional[EjercicioPlano]:
+        i = self._buscar("ej", nombre)
+        return None if i is None else self._ejercicio(i)
+
+    def ejercicios_de_rutina(self, nombre: str) -> List[EjercicioPlano]:
+        j = self._buscar("r", nombre)
+        if j is None:
+            raise ValueError("Rutina no encontrada.")
+        inicio = self._vistas["r_inicio"]
+        return [self._ejercicio(i) for i in self._vistas["r_miembros"][inicio[j] : inicio[j + 1]]]
+
+    def duracion_rutina_min(self, nombre: str) -> float:
+        j = self._buscar("r", nombre)
+        if j is None:
+            raise ValueError("Rutina no encontrada.")
+        return self._vistas["r_seg"][j] / 60.0
+
+    def buscar_usuario(self, nombre: str) -> Optional[UsuarioPlano]:
+        k = self._buscar("u", nombre)
+        if k is None:
+            return None
+        v = self._vistas
+        rutinas = tuple(
+            (self._texto("r_nombre", j), v["r_seg"][j] / 60.0)
+            for j in v["u_miembros"][v["u_inicio"][k] : v["u_inicio"][k + 1]]
+        )
+        return UsuarioPlano(
+            self._texto("u_nombre", k), v["u_edad"][k], rutinas, v["u_seg"][k] / 60.0
+        )
+
+    def total_min_usuario(self, nombre: str) -> float:
+        """Solo el total, sin decodificar los nombres de sus rutinas."""
+        k = self._buscar("u", nombre)
+        if k is None:
+            raise ValueError("Usuario no encontrado.")
+        return self._vistas["u_seg"][k] / 60.0
@@ -0,0 +1,312 @@
+"""
+Réplica de solo lectura de un SistemaGestion en otro proceso.
+
+La réplica arranca de una instantánea binaria del primario (ver
+serializacion) y desde ahí sigue su registro de cambios: cada lote de
+eventos confirmados del primario se envía por una tubería y el proceso
+seguidor lo vuelve a aplicar, en orden, sobre su propia copia. Las
+consultas pesadas (reporte, listados, búsquedas) se atienden allá, así que
+no compiten con el proceso que escribe.
+
+En el primario, el suscriptor solo encola el lote y anota la hora; el envío
+lo hace un hilo aparte, de modo que una réplica lenta no frena a quien
+escribe. El retraso se mide en el primario: eventos enviados que la réplica
+todavía no confirmó aplicar y antigüedad del más viejo de ellos.
+
+Lo que cambia el primario sin publicar eventos (p. ej.
+`CatalogoMapeado.cargar_en`) no llega por el registro; `resincronizar`
+envía una instantánea nueva por el mismo canal, en orden con los eventos.
+Si un lote no se puede volver a aplicar, la copia diverge: el seguidor deja
+de aplicar eventos y avisa, y el primario manda una instantánea en su
+próxima escritura o consulta (en su propio hilo, con el estado coherente).
+La réplica debe crearse fuera de una transacción del primario.
+"""
+
+import io
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import redirect_stdout
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, NamedTuple, Optional, TextIO, Tuple
+
+import eventos
+import serializacion
+from Gestion_POO import SistemaGestion
+
+# Lotes del registro que el seguidor aplica antes de atender una consulta.
+LOTES_POR_VUELTA = 64
+
+
+class Retraso(NamedTuple):
+    eventos: int
+    segundos: float
+
+
+# Tipo de evento -> cómo rehacerlo sobre la copia.
+_REAPLICAR: Dict[str, Callable[[SistemaGestion, Dict], None]] = {
+    eventos.USUARIO_AGREGADO: lambda s, d: s.agregar_usuario(d["nombre"], d["edad"]),
+    eventos.USUARIO_RENOMBRADO: lambda s, d: s.renombrar_usuario(
+        d["nombre"], d["nuevo_nombre"]
+    ),
+    eventos.USUARIO_EDAD_CAMBIADA: lambda s, d: s.cambiar_edad_usuario(
+        d["nombre"], d["edad"]
+    ),
+    eventos.USUARIO_ELIMINADO: lambda s, d: s.eliminar_usuario(d["nombre"]),
+    eventos.EJERCICIO_CREADO: lambda s, d: s.crear_ejercicio(
+        d["nombre"], d["repeticiones"], d["series"]
+    ),
+    eventos.EJERCICIO_RENOMBRADO: lambda s, d: s.renombrar_ejercicio(
+        d["nombre"], d["nuevo_nombre"]
+    ),
+    eventos.EJERCICIO_ACTUALIZADO: lambda s, d: s.actualizar_ejercicio(
+        d["nombre"], d["repeticiones"], d["series"]
+    ),
+    eventos.EJERCICIO_ELIMINADO: lambda s, d: s.eliminar_ejercicio(d["nombre"]),
+    eventos.RUTINA_CREADA: lambda s, d: s.crear_rutina(
+        d["nombre"], d["descripcion"], d["ejercicios"]
+    ),
+    eventos.RUTINA_EDITADA: lambda s, d: s.editar_rutina(
+        d["nombre"], d["nuevo_nombre"], d["descripcion"]
+    ),
+    eventos.RUTINA_ELIMINADA: lambda s, d: s.eliminar_rutina(d["nombre"]),
+    eventos.RUTINA_EJERCICIO_AGREGADO: lambda s, d: s.rutina_agregar_ejercicio(
+        d["rutina"], d["ejercicio"]
+    ),
+    eventos.RUTINA_EJERCICIO_ELIMINADO: lambda s, d: s.rutina_eliminar_ejercicio(
+        d["rutina"], d["ejercicio"]
+    ),
+    eventos.RUTINA_EJERCICIO_ACTUALIZADO: lambda s, d: s.rutina_actualizar_ejercicio(
+        d["rutina"], d["ejercicio"], d["repeticiones"], d["series"]
+    ),
+    eventos.RUTINA_ASIGNADA: lambda s, d: s.asignar_rutina_a_usuario(
+        d["usuario"], d["rutina"]
+    ),
+    eventos.PERFIL_TIEMPOS_CAMBIADO: lambda s, d: s.aplicar_perfil_tiempos(
+        d["sec_por_rep"], d["descanso_entre_series"], d.get("todos", False)
+    ),
+}
+
+
+def _instantanea(sistema: SistemaGestion) -> bytes:
+    datos = io.BytesIO()
+    serializacion.escribir(sistema, datos)
+    return datos.getvalue()
+
+
+def _fallo(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def _seguidor(registro, con, avisos, instantanea: bytes) -> None:
+    sistema = serializacion.leer_sistema(io.BytesIO(instantanea))
+    aplicado = 0
+    errores: List[str] = []
+    # Tras un lote que no se pudo aplicar la copia ya no coincide: se dejan
+    # de aplicar eventos hasta recibir una instantánea.
+    divergente = False
+    while True:
+        listos = wait([registro, con])
+        if registro in listos:
+            vueltas = 0
+            while vueltas < LOTES_POR_VUELTA and registro.poll():
+                msg = registro.recv()
+                if msg is None:
+                    return
+                que, carga, posicion = msg
+                if que == "instantanea":
+                    try:
+                        sistema = serializacion.leer_sistema(io.BytesIO(carga))
+                        divergente = False
+                    except Exception as e:
+                        errores.append(f"instantánea {posicion}: {_fallo(e)}")
+                elif not divergente:
+                    with redirect_stdout(io.StringIO()):
+                        for ev in carga:
+                            try:
+                                _REAPLICAR[ev.tipo](sistema, ev.datos)
+                            except Exception as e:
+                                errores.append(f"{ev.secuencia} {ev.tipo}: {_fallo(e)}")
+                                divergente = True
+                                avisos.send(posicion)
+                                break
+                aplicado = posicion
+                vueltas += 1
+        if con.poll():
+            op, args = con.recv()
+            if op == "estado":
+                con.send(("ok", (aplicado, list(errores)), ""))
+                continue
+            salida = io.StringIO()
+            try:
+                with redirect_stdout(salida):
+                    if op == "filas_reporte":
+                        res = list(sistema.filas_reporte())
+                    elif op == "resumen_usuario":
+                        u = sistema._buscar_usuario(args[0])
+                        res = None if u is None else sistema.resumenes.de(u)
+                    else:
+                        res = getattr(sistema, op)(*args)
+                respuesta = ("ok", res, salida.getvalue())
+            except ValueError as e:
+                respuesta = ("error", str(e), salida.getvalue())
+            except Exception as e:
+                respuesta = ("fallo", _fallo(e), salida.getvalue())
+            try:
+                con.send(respuesta)
+            except Exception as e:
+                # P. ej. un resultado que no se puede enviar: igual se responde.
+                con.send(("fallo", _fallo(e), ""))
+
+
+class ReplicaLectura:
+    def __init__(self, primario: SistemaGestion):
+        self.primario = primario
+        registro_hijo, self._registro = mp.Pipe(duplex=False)
+        self._con, hijo = mp.Pipe()
+        self._avisos, avisos_hijo = mp.Pipe(duplex=False)
+        self._proceso = mp.Process(
+            target=_seguidor,
+            args=(registro_hijo, hijo, avisos_hijo, _instantanea(primario)),
+            daemon=True,
+        )
+        self._proceso.start()
+        registro_hijo.close()
+        hijo.close()
+        avisos_hijo.close()
+
+        # Cada mensaje del registro lleva una posición creciente; se guarda
+        # (posición, eventos, hora de envío) de lo aún no confirmado.
+        self._marcas: "deque[Tuple[int, int, float]]" = deque()
+        self._candado = threading.Lock()
+        self._posicion = 0
+        self.errores: List[str] = []
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo = threading.Thread(target=self._enviar, daemon=True)
+        self._hilo.start()
+        # El seguidor avisa cuando su copia diverge; la instantánea se toma
+        # después en el hilo del primario, no en el del vigía.
+        self._divergente = threading.Event()
+        self._vigia = threading.Thread(target=self._vigilar, daemon=True)
+        self._vigia.start()
+        self._cancelar = primario.eventos.suscribir(self._encolar, por_lotes=True)
+
+    # --------- Envío del registro (primario) ---------
+    def _encolar(self, lote: List[eventos.Evento]) -> None:
+        if self._divergente.is_set():
+            # La instantánea ya incluye este lote.
+            self._divergente.clear()
+            self._poner("instantanea", _instantanea(self.primario), len(lote))
+            return
+        self._poner("eventos", lote, len(lote))
+
+    def _poner(self, que: str, carga, n_eventos: int) -> None:
+        with self._candado:
+            self._posicion += 1
+            self._marcas.append((self._posicion, n_eventos, time.monotonic()))
+            self._cola.put((que, carga, self._posicion))
+
+    def _enviar(self) -> None:
+        while True:
+            msg = self._cola.get()
+            try:
+                self._registro.send(msg)
+            except (BrokenPipeError, OSError):
+                return
+            if msg is None:
+                return
+
+    def _vigilar(self) -> None:
+        while True:
+            try:
+                self._avisos.recv()
+            except (EOFError, OSError):
+                return
+            self._divergente.set()
+
+    def resincronizar(self) -> None:
+        """Envía una instantánea completa del primario (en orden con los eventos)."""
+        self._divergente.clear()
+        self._poner("instantanea", _instantanea(self.primario), 0)
+
+    # --------- Consultas ---------
+    def _pedir(self, op: str, *args, salida: Optional[TextIO] = None):
+        if self._divergente.is_set():
+            self.resincronizar()
+        self._con.send((op, args))
+        estado, valor, impreso = self._con.recv()
+        if impreso:
+            print(impreso, end="", file=salida)
+        if estado == "error":
+            raise ValueError(valor)
+        if estado == "fallo":
+            raise RuntimeError(valor)
+        return valor
+
+    def retraso(self) -> Retraso:
+        aplicado, errores = self._pedir("estado")
+        self.errores = errores
+        ahora = time.monotonic()
+        with self._candado:
+            while self._marcas and self._marcas[0][0] <= aplicado:
+                self._marcas.popleft()
+            pendientes = sum(n for _, n, _ in self._marcas)
+            segundos = (ahora - self._marcas[0][2]) if self._marcas else 0.0
+        return Retraso(pendientes, segundos)
+
+    def esperar(self, timeout: Optional[float] = None, intervalo: float = 0.001) -> bool:
+        """Bloquea hasta que la réplica alcance al primario; False si vence `timeout`."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            r = self.retraso()
+            if r.segundos == 0.0:
+                return True
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(intervalo)
+
+    def reporte_por_usuario(self, salida: Optional[TextIO] = None) -> None:
+        self._pedir("reporte_por_usuario", salida=salida)
+
+    def filas_reporte(self) -> List[Tuple[str, int, Optional[str], Optional[float]]]:
+        return self._pedir("filas_reporte")
+
+    def resumen_usuario(self, nombre: str):
+        """`ResumenUsuario` del usuario en la réplica (None si no existe)."""
+        return self._pedir("resumen_usuario", nombre)
+
+    def listar_usuarios(self) -> None:
+        self._pedir("listar_usuarios")
+
+    def listar_ejercicios(self) -> None:
+        self._pedir("listar_ejercicios")
+
+    def listar_rutinas(self) -> None:
+        self._pedir("listar_rutinas")
+
+    def mostrar_rutinas_de_usuario(self, nombre_usuario: str) -> None:
+        self._pedir("mostrar_rutinas_de_usuario", nombre_usuario)
+
+    # --------- Ciclo de vida ---------
+    def cerrar(self) -> None:
+        if self._proceso is None:
+            return
+        self._cancelar()
+        self._cola.put(None)
+        self._hilo.join()
+        self._proceso.join(timeout=5)
+        if self._proceso.is_alive():
+            self._proceso.terminate()
+        self._registro.close()
+        self._con.close()
+        self._avisos.close()
+        self._vigia.join(timeout=5)
+        self._proceso = None
+
+    def __enter__(self) -> "ReplicaLectura":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
@@ -0,0 +1,215 @@
+"""
+Escritura en streaming del reporte por usuario.
+
+Ambas implementaciones exponen `filas_reporte`, un generador de tuplas
+(usuario, edad, rutina, duracion_min); un usuario sin rutinas produce una
+única fila con rutina y duración en None. Aquí solo se consumen esas filas
+y se escriben en bloques, sin armar el reporte completo en memoria.
+"""
+
+import csv
+import io
+import json
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Optional, Sequence, TextIO, Tuple
+
+Fila = Tuple[str, int, Optional[str], Optional[float]]
+
+COLUMNAS = ("usuario", "edad", "rutina", "duracion_min")
+LINEAS_POR_BLOQUE = 1024
+BUFFER_ARCHIVO = 1 << 16
+
+
+def _escribir_en_bloques(lineas: Iterable[str], salida: TextIO) -> None:
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= LINEAS_POR_BLOQUE:
+            salida.write("".join(bloque))
+            bloque = []
+    if bloque:
+        salida.write("".join(bloque))
+
+
+def escribir_csv(filas: Iterable[Fila], salida: TextIO) -> int:
+    """Escribe las filas como CSV con encabezado. Devuelve cuántas escribió."""
+    escritor = csv.writer(salida, lineterminator="\n")
+    escritor.writerow(COLUMNAS)
+    total = 0
+    bloque = []
+    for usuario, edad, rutina, mins in filas:
+        bloque.append(
+            (usuario, edad, rutina or "", "" if mins is None else round(mins, 2))
+        )
+        if len(bloque) >= LINEAS_POR_BLOQUE:
+            escritor.writerows(bloque)
+            total += len(bloque)
+            bloque = []
+    escritor.writerows(bloque)
+    return total + len(bloque)
+
+
+def escribir_jsonl(filas: Iterable[Fila], salida: TextIO) -> int:
+    """Escribe un objeto JSON por línea. Devuelve cuántas filas escribió."""
+    contador = [0]
+
+    def lineas() -> Iterable[str]:
+        for usuario, edad, rutina, mins in filas:
+            contador[0] += 1
+            yield json.dumps(
+                {
+                    "usuario": usuario,
+                    "edad": edad,
+                    "rutina": rutina,
+                    "duracion_min": None if mins is None else round(mins, 2),
+                },
+                ensure_ascii=False,
+            ) + "\n"
+
+    _escribir_en_bloques(lineas(), salida)
+    return contador[0]
+
+
+def escribir_texto(
+    filas: Iterable[Fila],
+    salida: TextIO,
+    formatear: Callable[[float], str],
+    separador_final: bool = True,
+) -> int:
+    """
+    Reproduce el formato de `reporte_por_usuario` (tabla con separadores).
+    Las filas de un mismo usuario deben llegar consecutivas.
+    """
+    separador = "=" * 60 + "\n"
+    contador = [0]
+
+    def lineas() -> Iterable[str]:
+        actual = None
+        for usuario, edad, rutina, mins in filas:
+            contador[0] += 1
+            if usuario != actual:
+                actual = usuario
+                yield separador
+                yield f"Usuario: {usuario} | Edad: {edad}\n"
+            if rutina is None:
+                yield "  (Sin rutinas asignadas)\n"
+            else:
+                yield f"  - {rutina}: {formatear(mins)}\n"
+        if actual is not None and separador_final:
+            yield separador
+
+    _escribir_en_bloques(lineas(), salida)
+    return contador[0]
+
+
+def exportar_reporte(
+    filas: Iterable[Fila],
+    ruta: str,
+    formato: str = "csv",
+    formatear: Optional[Callable[[float], str]] = None,
+) -> int:
+    """Escribe el reporte en `ruta` con un buffer grande. Formatos: csv, jsonl, texto."""
+    if formato not in ("csv", "jsonl", "texto"):
+        raise ValueError(f"Formato de reporte no soportado: '{formato}'.")
+    if formato == "texto" and formatear is None:
+        raise ValueError("El formato texto requiere una función para formatear.")
+    with open(ruta, "w", encoding="utf-8", newline="", buffering=BUFFER_ARCHIVO) as f:
+        if formato == "csv":
+            return escribir_csv(filas, f)
+        if formato == "jsonl":
+            return escribir_jsonl(filas, f)
+        return escribir_texto(filas, f, formatear)
+
+
+# -------------------- Reporte en paralelo --------------------
+
+# Estado de cada proceso trabajador. Con "fork" se hereda sin serializar nada;
+# con "spawn" se envía una sola vez por proceso al iniciarlo.
+_TRABAJO: dict = {}
+
+
+def _iniciar_trabajador(elementos, seccion) -> None:
+    _TRABAJO["elementos"] = elementos
+    _TRABAJO["seccion"] = seccion
+
+
+def _seccion_trabajador(rango: Tuple[int, int]) -> str:
+    return _TRABAJO["seccion"](_TRABAJO["elementos"], rango[0], rango[1])
+
+
+def escribir_paralelo(
+    elementos: Sequence,
+    seccion: Callable[[Sequence, int, int], str],
+    salida: TextIO,
+    procesos: Optional[int] = None,
+    tam_bloque: int = 2000,
+) -> None:
+    """
+    Escribe seccion(elementos, inicio, fin) para bloques consecutivos de
+    `elementos`, calculados en un ProcessPoolExecutor. Cada bloque se escribe
+    en cuanto está listo respetando el orden original, así que la salida es
+    la misma que en secuencia. Con un solo bloque o un solo proceso no se
+    crea el pool.
+    """
+    if tam_bloque <= 0:
+        raise ValueError("El tamaño de bloque debe ser mayor a 0.")
+    n = len(elementos)
+    rangos = [(i, min(i + tam_bloque, n)) for i in range(0, n, tam_bloque)]
+    if procesos == 1 or len(rangos) <= 1:
+        for inicio, fin in rangos:
+            salida.write(seccion(elementos, inicio, fin))
+        return
+    metodos = mp.get_all_start_methods()
+    contexto = mp.get_context("fork" if "fork" in metodos else None)
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=contexto,
+        initializer=_iniciar_trabajador,
+        initargs=(elementos, seccion),
+    ) as pool:
+        for texto in pool.map(_seccion_trabajador, rangos):
+            salida.write(texto)
+
+
+def _seccion(
+    usuarios: Sequence,
+    inicio: int,
+    fin: int,
+    filas_de_usuario: Callable[[object], Iterable[Fila]],
+    formatear: Callable[[float], str],
+) -> str:
+    buffer = io.StringIO()
+
+    def filas() -> Iterable[Fila]:
+        for i in range(inicio, fin):
+            yield from filas_de_usuario(usuarios[i])
+
+    escribir_texto(filas(), buffer, formatear, separador_final=False)
+    return buffer.getvalue()
+
+
+def reporte_paralelo(
+    usuarios: Sequence,
+    filas_de_usuario: Callable[[object], Iterable[Fila]],
+    formatear: Callable[[float], str],
+    salida: TextIO,
+    procesos: Optional[int] = None,
+    tam_bloque: int = 2000,
+) -> None:
+    """
+    Mismo texto que `escribir_texto` con escribir_paralelo. Las filas de
+    cada usuario (y lo que cueste calcularlas) salen de `filas_de_usuario`
+    dentro del trabajador.
+    """
+    if len(usuarios) == 0:
+        return
+    escribir_paralelo(
+        usuarios,
+        partial(_seccion, filas_de_usuario=filas_de_usuario, formatear=formatear),
+        salida,
+        procesos,
+        tam_bloque,
+    )
+    salida.write("=" * 60 + "\n")
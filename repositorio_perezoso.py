@@ -0,0 +1,264 @@
+"""
+Carga perezosa de usuarios (con sus rutinas) desde un RepositorioSQLite.
+
+Un usuario se lee del almacén la primera vez que se busca y queda en una
+caché LRU acotada por un presupuesto de memoria aproximado; los menos usados
+se desalojan cuando se supera. Las modificaciones se escriben en el almacén
+e invalidan solo a los usuarios en caché afectados.
+"""
+
+import sys
+from collections import OrderedDict
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import Gestion_funcional as gf
+from almacen_sqlite import RepositorioSQLite
+from Gestion_POO import SistemaGestion, Usuario, Utilidades
+
+PRESUPUESTO_POR_DEFECTO = 64 * 1024 * 1024
+
+
+def _bytes_objeto(obj) -> int:
+    total = sys.getsizeof(obj) + sys.getsizeof(vars(obj))
+    for valor in vars(obj).values():
+        if isinstance(valor, str):
+            total += sys.getsizeof(valor)
+    return total
+
+
+def estimar_bytes(u: Usuario) -> int:
+    """Estimación del tamaño en memoria de un usuario materializado."""
+    total = _bytes_objeto(u) + sys.getsizeof(u.rutinas)
+    for r in u.rutinas:
+        total += _bytes_objeto(r) + sys.getsizeof(r.ejercicios)
+        for ej in r.ejercicios:
+            total += _bytes_objeto(ej)
+    return total
+
+
+class RepositorioPerezoso:
+    def __init__(
+        self, almacen: RepositorioSQLite, presupuesto_bytes: int = PRESUPUESTO_POR_DEFECTO
+    ):
+        if presupuesto_bytes <= 0:
+            raise ValueError("El presupuesto de memoria debe ser mayor a 0.")
+        self.almacen = almacen
+        self.presupuesto_bytes = presupuesto_bytes
+        self._cache: "OrderedDict[str, Usuario]" = OrderedDict()
+        self._tamanos: Dict[str, int] = {}
+        self._usado = 0
+        # Índices inversos: qué usuarios en caché dependen de cada rutina/ejercicio.
+        self._por_rutina: Dict[str, Set[str]] = {}
+        self._por_ejercicio: Dict[str, Set[str]] = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    # --------- Caché ---------
+    def buscar_usuario(self, nombre: str) -> Optional[Usuario]:
+        key = Utilidades.normalizar(nombre)
+        u = self._cache.get(key)
+        if u is not None:
+            self.aciertos += 1
+            self._cache.move_to_end(key)
+            return u
+        self.fallos += 1
+        u = self.almacen.buscar_usuario(nombre)
+        if u is not None:
+            self._guardar(key, u)
+        return u
+
+    # Mismo nombre que en SistemaGestion para quien ya lo usa así.
+    _buscar_usuario = buscar_usuario
+
+    def buscar_usuario_dict(self, nombre: str) -> Optional[Dict]:
+        """El mismo usuario con la forma de dicts de Gestion_funcional."""
+        u = self.buscar_usuario(nombre)
+        if u is None:
+            return None
+        rutinas = [
+            gf.mk_rutina(
+                r.nombre,
+                r.descripcion,
+                [
+                    gf.mk_ejercicio(
+                        ej.nombre,
+                        ej.repeticiones,
+                        ej.series,
+                        ej.sec_por_rep,
+                        ej.descanso_entre_series,
+                    )
+                    for ej in r.ejercicios
+                ],
+            )
+            for r in u.rutinas
+        ]
+        return reduce(gf.usuario_asignar_rutina, rutinas, gf.mk_usuario(u.nombre, u.edad))
+
+    def _guardar(self, key: str, u: Usuario) -> None:
+        tamano = estimar_bytes(u)
+        self._cache[key] = u
+        self._tamanos[key] = tamano
+        self._usado += tamano
+        for r in u.rutinas:
+            self._por_rutina.setdefault(Utilidades.normalizar(r.nombre), set()).add(key)
+            for ej in r.ejercicios:
+                self._por_ejercicio.setdefault(
+                    Utilidades.normalizar(ej.nombre), set()
+                ).add(key)
+        # Se desaloja lo más frío, pero nunca el usuario recién cargado.
+        while self._usado > self.presupuesto_bytes and len(self._cache) > 1:
+            frio = next(iter(self._cache))
+            self._quitar(frio)
+            self.desalojos += 1
+
+    def _quitar(self, key: str) -> None:
+        u = self._cache.pop(key, None)
+        if u is None:
+            return
+        self._usado -= self._tamanos.pop(key)
+        for r in u.rutinas:
+            self._desindexar(self._por_rutina, Utilidades.normalizar(r.nombre), key)
+            for ej in r.ejercicios:
+                self._desindexar(
+                    self._por_ejercicio, Utilidades.normalizar(ej.nombre), key
+                )
+
+    @staticmethod
+    def _desindexar(indice: Dict[str, Set[str]], clave: str, key: str) -> None:
+        usuarios = indice.get(clave)
+        if usuarios is not None:
+            usuarios.discard(key)
+            if not usuarios:
+                del indice[clave]
+
+    def invalidar(self, nombre: str) -> None:
+        self._quitar(Utilidades.normalizar(nombre))
+
+    def _invalidar_de(self, indice: Dict[str, Set[str]], nombre: str) -> None:
+        for key in list(indice.get(Utilidades.normalizar(nombre), ())):
+            self._quitar(key)
+
+    def vaciar(self) -> None:
+        for key in list(self._cache):
+            self._quitar(key)
+
+    def estadisticas(self) -> Dict[str, float]:
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": (self.aciertos / consultas) if consultas else 0.0,
+            "usuarios_en_memoria": len(self._cache),
+            "bytes_estimados": self._usado,
+            "presupuesto_bytes": self.presupuesto_bytes,
+        }
+
+    # --------- Consultas de mostrador ---------
+    def mostrar_rutinas_de_usuario(self, nombre_usuario: str) -> None:
+        u = self.buscar_usuario(nombre_usuario)
+        if u is None:
+            print("Usuario no encontrado.")
+            return
+        if len(u.rutinas) == 0:
+            print(f"{u.nombre} no tiene rutinas asignadas.")
+            return
+        print(f"Rutinas de {u.nombre}:")
+        for r in u.rutinas:
+            print(f"  - {r.nombre}: {Utilidades.minutos_a_texto(r.duracion_total_min())}")
+
+    # --------- Escrituras (se delegan al almacén) ---------
+    # Las altas no tocan a usuarios ya cargados: no invalidan nada.
+    def agregar_usuario(self, nombre: str, edad: int) -> None:
+        self.almacen.agregar_usuario(nombre, edad)
+
+    def agregar_usuarios(self, datos: Iterable[Tuple[str, int]]) -> int:
+        return self.almacen.agregar_usuarios(datos)
+
+    def crear_ejercicio(self, nombre: str, repeticiones: int, series: int) -> None:
+        self.almacen.crear_ejercicio(nombre, repeticiones, series)
+
+    def crear_ejercicios(self, datos: Iterable[Tuple[str, int, int]]) -> int:
+        return self.almacen.crear_ejercicios(datos)
+
+    def crear_rutina(
+        self, nombre: str, descripcion: str, nombres_ejercicios: List[str]
+    ) -> None:
+        self.almacen.crear_rutina(nombre, descripcion, nombres_ejercicios)
+
+    def renombrar_usuario(self, nombre: str, nuevo_nombre: str) -> None:
+        self.almacen.renombrar_usuario(nombre, nuevo_nombre)
+        self.invalidar(nombre)
+
+    def cambiar_edad_usuario(self, nombre: str, nueva_edad: int) -> None:
+        self.almacen.cambiar_edad_usuario(nombre, nueva_edad)
+        self.invalidar(nombre)
+
+    def asignar_rutina_a_usuario(self, nombre_usuario: str, nombre_rutina: str) -> None:
+        self.almacen.asignar_rutina_a_usuario(nombre_usuario, nombre_rutina)
+        self.invalidar(nombre_usuario)
+
+    def asignar_rutinas(self, pares: Iterable[Tuple[str, str]]) -> int:
+        pares = list(pares)
+        n = self.almacen.asignar_rutinas(pares)
+        for nombre_usuario, _ in pares:
+            self.invalidar(nombre_usuario)
+        return n
+
+    def editar_rutina(
+        self,
+        nombre: str,
+        nuevo_nombre: Optional[str] = None,
+        nueva_desc: Optional[str] = None,
+    ) -> None:
+        self.almacen.editar_rutina(nombre, nuevo_nombre, nueva_desc)
+        self._invalidar_de(self._por_rutina, nombre)
+
+    def rutina_agregar_ejercicio(self, nombre_rutina: str, nombre_ejercicio: str) -> None:
+        self.almacen.rutina_agregar_ejercicio(nombre_rutina, nombre_ejercicio)
+        self._invalidar_de(self._por_rutina, nombre_rutina)
+
+    def rutina_eliminar_ejercicio(self, nombre_rutina: str, nombre_ejercicio: str) -> None:
+        self.almacen.rutina_eliminar_ejercicio(nombre_rutina, nombre_ejercicio)
+        self._invalidar_de(self._por_rutina, nombre_rutina)
+
+    def rutina_actualizar_ejercicio(
+        self,
+        nombre_rutina: str,
+        nombre_ejercicio: str,
+        repeticiones: Optional[int] = None,
+        series: Optional[int] = None,
+    ) -> None:
+        self.almacen.rutina_actualizar_ejercicio(
+            nombre_rutina, nombre_ejercicio, repeticiones, series
+        )
+        # El ejercicio es compartido: afecta a todas las rutinas que lo usan.
+        self._invalidar_de(self._por_ejercicio, nombre_ejercicio)
+
+    def renombrar_ejercicio(self, nombre: str, nuevo_nombre: str) -> None:
+        self.almacen.renombrar_ejercicio(nombre, nuevo_nombre)
+        self._invalidar_de(self._por_ejercicio, nombre)
+
+    def actualizar_ejercicio(
+        self,
+        nombre: str,
+        repeticiones: Optional[int] = None,
+        series: Optional[int] = None,
+    ) -> None:
+        self.almacen.actualizar_ejercicio(nombre, repeticiones, series)
+        self._invalidar_de(self._por_ejercicio, nombre)
+
+    def eliminar_ejercicio(self, nombre: str) -> None:
+        self.almacen.eliminar_ejercicio(nombre)
+        self._invalidar_de(self._por_ejercicio, nombre)
+
+    def importar_sistema(self, sistema: SistemaGestion) -> None:
+        self.almacen.importar_sistema(sistema)
+        self.vaciar()
+
+    def __getattr__(self, nombre: str):
+        # Solo consultas (filas_reporte, contar_usuarios, buscar_rutina...):
+        # toda escritura tiene arriba su envoltorio que invalida la caché.
+        return getattr(self.almacen, nombre)
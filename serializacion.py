@@ -0,0 +1,433 @@
+"""
+Exportación e importación binaria del sistema completo.
+
+Cada ejercicio, rutina y usuario se escribe una sola vez; las rutinas
+apuntan a sus ejercicios y los usuarios a sus rutinas por índice, así que
+una rutina asignada a mil usuarios (o un ejercicio compartido por cien
+rutinas) no se repite. Se reconoce lo compartido por identidad y al cargar
+se vuelve a compartir igual.
+
+El contenido va por columnas: los nombres de una sección en un solo bloque
+UTF-8 separado por NUL y cada campo numérico en un `array`, de modo que
+leer y escribir es casi todo `tobytes`/`frombytes` y un `split`.
+
+Distribución (little-endian):
+    cabecera   magic "GEJS", versión u16, opciones u16 (bit 0: zlib)
+    contenido  (comprimido con zlib si corresponde)
+        perfil      versión, sec_por_rep, descanso (u32)
+        ejercicios  n, n en catálogo, nombres, reps u8, series u8,
+                    sec_por_rep u32, descanso u32
+        rutinas     n, n en el sistema, nombres, descripciones,
+                    cantidad u32, miembros u32 (índice de ejercicio)
+        usuarios    n, nombres, edades u8, cantidad u32,
+                    miembros u32 (índice de rutina)
+        crc32 del contenido sin comprimir (u32)
+
+Cada bloque de texto es u32 con su largo en bytes y los bytes. Las secciones
+se escriben a medida que se arman, pasando por el compresor si lo hay.
+
+Lo que primero figura en cada sección es lo del catálogo/sistema, en orden
+de alta; detrás va lo que solo sigue vivo dentro de una rutina o usuario
+(p. ej. la copia vieja de una rutina editada en la versión funcional).
+"""
+
+import struct
+import sys
+import zlib
+from array import array
+from typing import BinaryIO, Dict, List, NamedTuple, Tuple, Union
+
+import Gestion_funcional as gf
+from Gestion_POO import (
+    Ejercicio,
+    PerfilTiempos,
+    Rutina,
+    SistemaGestion,
+    Usuario,
+    Utilidades,
+)
+
+MAGIC = b"GEJS"
+VERSION = 1
+COMPRIMIDO = 0x1
+
+_CABECERA = struct.Struct("<4sHH")
+_U32 = struct.Struct("<I")
+_PERFIL = struct.Struct("<III")
+_CONTEO = struct.Struct("<II")
+
+Fuente = Union[SistemaGestion, Dict]
+
+
+class _Salida:
+    """Escribe en `f` pasando por zlib (si se pide) y llevando el crc32."""
+
+    def __init__(self, f: BinaryIO, comprimir: bool, nivel: int):
+        self._f = f
+        self._zlib = zlib.compressobj(nivel) if comprimir else None
+        self.crc = 0
+
+    def escribir(self, datos: bytes) -> None:
+        self.crc = zlib.crc32(datos, self.crc)
+        if self._zlib is not None:
+            datos = self._zlib.compress(datos)
+        if datos:
+            self._f.write(datos)
+
+    def cerrar(self) -> None:
+        self.escribir(_U32.pack(self.crc))
+        if self._zlib is not None:
+            self._f.write(self._zlib.flush())
+
+
+def _a_bytes(datos: array) -> bytes:
+    if sys.byteorder == "big":
+        datos = array(datos.typecode, datos)
+        datos.byteswap()
+    return datos.tobytes()
+
+
+def _texto(nombres: List[str]) -> bytes:
+    for n in nombres:
+        if "\0" in n:
+            raise ValueError(f"El texto '{n}' contiene un carácter NUL.")
+    datos = "\0".join(nombres).encode("utf-8")
+    return _U32.pack(len(datos)) + datos
+
+
+def campos_ejercicio(ej) -> Tuple[str, int, int, int, int]:
+    """(nombre, repeticiones, series, sec_por_rep, descanso) de cualquier ejercicio."""
+    if isinstance(ej, dict):
+        return (
+            ej["nombre"],
+            ej["repeticiones"],
+            ej["series"],
+            ej["sec_por_rep"],
+            ej["descanso_entre_series"],
+        )
+    return ej.nombre, ej.repeticiones, ej.series, ej.sec_por_rep, ej.descanso_entre_series
+
+
+def _leer_fuente(fuente: Fuente):
+    """(perfil, catálogo, rutinas, usuarios) y accesores de rutina/usuario."""
+    if isinstance(fuente, dict):
+        p = gf._perfil_tiempos(fuente)
+        return (
+            (p["version"], p["sec_por_rep"], p["descanso_entre_series"]),
+            fuente["ejercicios_catalogo"],
+            fuente["rutinas"],
+            fuente["usuarios"],
+            lambda r: (r["nombre"], r["descripcion"], r["ejercicios"]),
+            lambda u: (u["nombre"], u["edad"], u["rutinas"]),
+        )
+    p = fuente.perfil_tiempos
+    return (
+        (p.version, p.sec_por_rep, p.descanso_entre_series),
+        fuente.ejercicios_catalogo,
+        fuente.rutinas,
+        fuente.usuarios,
+        lambda r: (r.nombre, r.descripcion, r.ejercicios),
+        lambda u: (u.nombre, u.edad, u.rutinas),
+    )
+
+
+class Alcance(NamedTuple):
+    """
+    Todo lo alcanzable desde una fuente, cada cosa una vez (por identidad).
+    Primero va lo del catálogo/sistema y detrás lo que solo vive dentro de
+    una rutina o usuario. Los miembros de la rutina k son
+    `r_miembros[r_inicio[k]:r_inicio[k + 1]]` (índices en `ejercicios`), y
+    lo mismo para usuarios con índices en `rutinas`.
+    """
+
+    perfil: Tuple[int, int, int]
+    ejercicios: List
+    n_catalogo: int
+    rutinas: List[Tuple[str, str]]  # (nombre, descripción)
+    n_rutinas_sistema: int
+    r_inicio: array
+    r_miembros: array
+    usuarios: List[Tuple[str, int]]  # (nombre, edad)
+    u_inicio: array
+    u_miembros: array
+
+
+def alcance(fuente: Fuente) -> Alcance:
+    """Recorre un `SistemaGestion` o un estado funcional (ver `Alcance`)."""
+    perfil, catalogo, rutinas, usuarios, de_rutina, de_usuario = _leer_fuente(fuente)
+    pos_rutina: Dict[int, int] = {}
+    lista_r: List = []
+    for r in rutinas:
+        if id(r) not in pos_rutina:
+            pos_rutina[id(r)] = len(lista_r)
+            lista_r.append(r)
+    n_rutinas_sistema = len(lista_r)
+
+    datos_u: List[Tuple[str, int]] = []
+    u_inicio = array("I", [0])
+    u_miembros = array("I")
+    for u in usuarios:
+        nombre, edad, rs = de_usuario(u)
+        datos_u.append((nombre, edad))
+        for r in rs:
+            i = pos_rutina.get(id(r))
+            if i is None:
+                i = pos_rutina[id(r)] = len(lista_r)
+                lista_r.append(r)
+            u_miembros.append(i)
+        u_inicio.append(len(u_miembros))
+
+    pos_ej: Dict[int, int] = {}
+    lista_ej: List = []
+    for ej in catalogo:
+        if id(ej) not in pos_ej:
+            pos_ej[id(ej)] = len(lista_ej)
+            lista_ej.append(ej)
+    n_catalogo = len(lista_ej)
+    datos_r: List[Tuple[str, str]] = []
+    r_inicio = array("I", [0])
+    r_miembros = array("I")
+    for r in lista_r:
+        nombre, desc, ejercicios = de_rutina(r)
+        datos_r.append((nombre, desc))
+        for ej in ejercicios:
+            i = pos_ej.get(id(ej))
+            if i is None:
+                i = pos_ej[id(ej)] = len(lista_ej)
+                lista_ej.append(ej)
+            r_miembros.append(i)
+        r_inicio.append(len(r_miembros))
+
+    return Alcance(
+        perfil,
+        lista_ej,
+        n_catalogo,
+        datos_r,
+        n_rutinas_sistema,
+        r_inicio,
+        r_miembros,
+        datos_u,
+        u_inicio,
+        u_miembros,
+    )
+
+
+def _cantidades(inicio: array) -> array:
+    return array("I", (inicio[k + 1] - inicio[k] for k in range(len(inicio) - 1)))
+
+
+def escribir(fuente: Fuente, f: BinaryIO, comprimir: bool = False, nivel: int = 6) -> None:
+    """
+    Escribe un `SistemaGestion` o el estado `st` de Gestion_funcional en el
+    archivo binario `f` (abierto en modo "wb").
+    """
+    a = alcance(fuente)
+    f.write(_CABECERA.pack(MAGIC, VERSION, COMPRIMIDO if comprimir else 0))
+    salida = _Salida(f, comprimir, nivel)
+    salida.escribir(_PERFIL.pack(*a.perfil))
+
+    # --- ejercicios ---
+    nombres_e: List[str] = []
+    reps = array("B")
+    series = array("B")
+    secs = array("I")
+    descansos = array("I")
+    for ej in a.ejercicios:
+        nombre, rep, ser, sec, descanso = campos_ejercicio(ej)
+        nombres_e.append(nombre)
+        reps.append(rep)
+        series.append(ser)
+        secs.append(sec)
+        descansos.append(descanso)
+    salida.escribir(_CONTEO.pack(len(a.ejercicios), a.n_catalogo))
+    salida.escribir(_texto(nombres_e))
+    for columna in (reps, series, secs, descansos):
+        salida.escribir(_a_bytes(columna))
+    del nombres_e, reps, series, secs, descansos
+
+    # --- rutinas ---
+    salida.escribir(_CONTEO.pack(len(a.rutinas), a.n_rutinas_sistema))
+    salida.escribir(_texto([nombre for nombre, _ in a.rutinas]))
+    salida.escribir(_texto([desc for _, desc in a.rutinas]))
+    salida.escribir(_a_bytes(_cantidades(a.r_inicio)))
+    salida.escribir(_a_bytes(a.r_miembros))
+
+    # --- usuarios ---
+    edades = array("B", (edad for _, edad in a.usuarios))
+    salida.escribir(_U32.pack(len(a.usuarios)))
+    salida.escribir(_texto([nombre for nombre, _ in a.usuarios]))
+    salida.escribir(_a_bytes(edades))
+    salida.escribir(_a_bytes(_cantidades(a.u_inicio)))
+    salida.escribir(_a_bytes(a.u_miembros))
+    salida.cerrar()
+
+
+def guardar(fuente: Fuente, ruta: str, comprimir: bool = False, nivel: int = 6) -> None:
+    with open(ruta, "wb", buffering=1 << 20) as f:
+        escribir(fuente, f, comprimir, nivel)
+
+
+# -------------------- Lectura --------------------
+
+
+class _Lector:
+    def __init__(self, datos: bytes):
+        vista = memoryview(datos)
+        if len(vista) < 4 or zlib.crc32(vista[:-4]) != _U32.unpack_from(vista, len(vista) - 4)[0]:
+            raise ValueError("El archivo está dañado (crc32 no coincide).")
+        self._datos = vista[:-4]
+        self._pos = 0
+
+    def struct(self, formato: struct.Struct) -> Tuple[int, ...]:
+        valores = formato.unpack_from(self._datos, self._pos)
+        self._pos += formato.size
+        return valores
+
+    def textos(self, n: int) -> List[str]:
+        (largo,) = self.struct(_U32)
+        bloque = bytes(self._datos[self._pos : self._pos + largo])
+        self._pos += largo
+        if n == 0:
+            return []
+        res = bloque.decode("utf-8").split("\0")
+        if len(res) != n:
+            raise ValueError("El archivo está dañado (cantidad de nombres).")
+        return res
+
+    def columna(self, codigo: str, n: int) -> array:
+        datos = array(codigo)
+        fin = self._pos + n * datos.itemsize
+        if fin > len(self._datos):
+            raise ValueError("El archivo está dañado (contenido truncado).")
+        datos.frombytes(self._datos[self._pos : fin])
+        self._pos = fin
+        if sys.byteorder == "big":
+            datos.byteswap()
+        return datos
+
+
+def _leer(f: BinaryIO):
+    magic, version, opciones = _CABECERA.unpack(f.read(_CABECERA.size))
+    if magic != MAGIC:
+        raise ValueError("El archivo no es una exportación del sistema.")
+    if version != VERSION:
+        raise ValueError(f"Versión de exportación no soportada: {version}.")
+    datos = f.read()
+    if opciones & COMPRIMIDO:
+        datos = zlib.decompress(datos)
+    lector = _Lector(datos)
+
+    perfil = lector.struct(_PERFIL)
+    n_ej, n_catalogo = lector.struct(_CONTEO)
+    ejercicios = (
+        lector.textos(n_ej),
+        lector.columna("B", n_ej),
+        lector.columna("B", n_ej),
+        lector.columna("I", n_ej),
+        lector.columna("I", n_ej),
+    )
+    n_rut, n_rutinas_sistema = lector.struct(_CONTEO)
+    nombres_r = lector.textos(n_rut)
+    descripciones = lector.textos(n_rut)
+    cantidades_r = lector.columna("I", n_rut)
+    miembros_r = lector.columna("I", sum(cantidades_r))
+    (n_usu,) = lector.struct(_U32)
+    nombres_u = lector.textos(n_usu)
+    edades = lector.columna("B", n_usu)
+    cantidades_u = lector.columna("I", n_usu)
+    miembros_u = lector.columna("I", sum(cantidades_u))
+    return (
+        perfil,
+        ejercicios,
+        n_catalogo,
+        (nombres_r, descripciones, cantidades_r, miembros_r),
+        n_rutinas_sistema,
+        (nombres_u, edades, cantidades_u, miembros_u),
+    )
+
+
+def _tramos(cantidades: array, miembros: array, elementos: List) -> List[List]:
+    res: List[List] = []
+    inicio = 0
+    for cantidad in cantidades:
+        fin = inicio + cantidad
+        res.append([elementos[i] for i in miembros[inicio:fin]])
+        inicio = fin
+    return res
+
+
+def leer_sistema(f: BinaryIO) -> SistemaGestion:
+    perfil, ejercicios, n_catalogo, rutinas, n_rutinas_sistema, usuarios = _leer(f)
+    s = SistemaGestion()
+    s.perfil_tiempos = PerfilTiempos(*perfil)
+
+    lista_ej = [Ejercicio(*campos) for campos in zip(*ejercicios)]
+    for ej in lista_ej[:n_catalogo]:
+        s.ejercicios_catalogo.append(ej)
+        s.idx_ejercicios[Utilidades.normalizar(ej.nombre)] = ej
+
+    nombres_r, descripciones, cantidades_r, miembros_r = rutinas
+    cuerpos = _tramos(cantidades_r, miembros_r, lista_ej)
+    lista_r = [Rutina(*campos) for campos in zip(nombres_r, descripciones, cuerpos)]
+    for r in lista_r[:n_rutinas_sistema]:
+        s.rutinas.append(r)
+        s.idx_rutinas[Utilidades.normalizar(r.nombre)] = r
+
+    # En POO las rutinas de los usuarios son las del sistema: una copia que
+    # solo sobrevive en un usuario (estado funcional) se cambia por la
+    # rutina del sistema con ese nombre, o se descarta si ya no existe.
+    i = n_rutinas_sistema
+    while i < len(lista_r):
+        lista_r[i] = s.idx_rutinas.get(Utilidades.normalizar(lista_r[i].nombre))
+        i += 1
+
+    nombres_u, edades, cantidades_u, miembros_u = usuarios
+    asignadas = _tramos(cantidades_u, miembros_u, lista_r)
+    for nombre, edad, rs in zip(nombres_u, edades, asignadas):
+        u = Usuario(nombre, edad)
+        u.rutinas = [r for r in rs if r is not None]
+        s.usuarios.append(u)
+        s.idx_usuarios[Utilidades.normalizar(u.nombre)] = u
+    s._marcar_cambio()
+    return s
+
+
+def leer_estado(f: BinaryIO) -> Dict:
+    perfil, ejercicios, n_catalogo, rutinas, n_rutinas_sistema, usuarios = _leer(f)
+    lista_ej = [gf.mk_ejercicio(*campos) for campos in zip(*ejercicios)]
+
+    nombres_r, descripciones, cantidades_r, miembros_r = rutinas
+    cuerpos = _tramos(cantidades_r, miembros_r, lista_ej)
+    lista_r = [gf.mk_rutina(*campos) for campos in zip(nombres_r, descripciones, cuerpos)]
+
+    nombres_u, edades, cantidades_u, miembros_u = usuarios
+    asignadas = _tramos(cantidades_u, miembros_u, lista_r)
+    lista_u = [
+        {
+            **gf.mk_usuario(nombre, edad),
+            "rutinas": rs,
+            "total_seg": sum(map(gf._segundos_rutina, rs)),
+        }
+        for nombre, edad, rs in zip(nombres_u, edades, asignadas)
+    ]
+    catalogo = lista_ej[:n_catalogo]
+    rutinas_sistema = lista_r[:n_rutinas_sistema]
+    return {
+        "usuarios": lista_u,
+        "ejercicios_catalogo": catalogo,
+        "rutinas": rutinas_sistema,
+        "idx_usuarios": {gf._norm(u["nombre"]): u for u in lista_u},
+        "idx_ejercicios": {gf._norm(e["nombre"]): e for e in catalogo},
+        "idx_rutinas": {gf._norm(r["nombre"]): r for r in rutinas_sistema},
+        "perfil_tiempos": gf.mk_perfil_tiempos(*perfil),
+    }
+
+
+def cargar_sistema(ruta: str) -> SistemaGestion:
+    with open(ruta, "rb") as f:
+        return leer_sistema(f)
+
+
+def cargar_estado(ruta: str) -> Dict:
+    with open(ruta, "rb") as f:
+        return leer_estado(f)
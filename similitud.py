@@ -0,0 +1,303 @@
+"""
+Búsqueda de rutinas parecidas por su conjunto de ejercicios.
+
+Cada rutina se reduce al conjunto de nombres normalizados de sus ejercicios
+y se resume con una firma MinHash (el mínimo de varias permutaciones hash
+del conjunto). La fracción de componentes iguales entre dos firmas estima
+la similitud de Jaccard. Las firmas se parten en bandas (LSH): dos rutinas
+son candidatas si coinciden en alguna banda completa, así que una consulta
+solo compara contra esas cubetas y no contra todo el catálogo de rutinas.
+A los candidatos se les calcula el Jaccard exacto para ordenarlos.
+
+Con 64 permutaciones en 16 bandas de 4, un par con Jaccard 0.5 es
+candidato con probabilidad ~0.65 y uno con 0.8 casi siempre; por debajo
+de ~0.3 rara vez. Puede devolver menos de k resultados.
+
+`SimilitudRutinas` se mantiene con los eventos de un SistemaGestion;
+`SimilitudRutinasFuncional` se pone al día con cada estado de
+Gestion_funcional comparando la identidad de las rutinas (dicts inmutables).
+"""
+
+import heapq
+import random
+import zlib
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+import eventos
+from Gestion_POO import Rutina, SistemaGestion, Utilidades
+
+NUM_PERMUTACIONES = 64
+BANDAS = 16
+_PRIMO = (1 << 61) - 1
+
+
+def claves_de(nombres: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(Utilidades.normalizar(n) for n in nombres)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    comunes = len(a & b)
+    return comunes / (len(a) + len(b) - comunes)
+
+
+class IndiceMinHash:
+    """Índice LSH genérico: clave (cualquier hashable) -> conjunto de textos."""
+
+    def __init__(
+        self,
+        num_permutaciones: int = NUM_PERMUTACIONES,
+        bandas: int = BANDAS,
+        semilla: int = 1,
+    ):
+        if num_permutaciones <= 0 or bandas <= 0 or num_permutaciones % bandas != 0:
+            raise ValueError("Las permutaciones deben repartirse en bandas iguales.")
+        azar = random.Random(semilla)
+        self._coeficientes = [
+            (azar.randrange(1, _PRIMO), azar.randrange(0, _PRIMO))
+            for _ in range(num_permutaciones)
+        ]
+        self._filas = num_permutaciones // bandas
+        self._bandas = bandas
+        self._conjuntos: Dict[Hashable, FrozenSet[str]] = {}
+        self._firmas: Dict[Hashable, Tuple[int, ...]] = {}
+        self._cubetas: Dict[Tuple[int, Tuple[int, ...]], Set[Hashable]] = {}
+        self._por_texto: Dict[str, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._conjuntos)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._conjuntos
+
+    def conjunto(self, clave: Hashable) -> FrozenSet[str]:
+        return self._conjuntos[clave]
+
+    def firma(self, conjunto: FrozenSet[str]) -> Tuple[int, ...]:
+        if not conjunto:
+            raise ValueError("El conjunto de ejercicios no puede estar vacío.")
+        return tuple(map(min, zip(*(self._permutaciones(x) for x in conjunto))))
+
+    def _permutaciones(self, x: str) -> Tuple[int, ...]:
+        # Los nombres de ejercicio se repiten entre rutinas: cada uno se
+        # pasa por las permutaciones una sola vez.
+        valores = self._por_texto.get(x)
+        if valores is None:
+            h = zlib.crc32(x.encode("utf-8"))
+            valores = tuple((a * h + b) % _PRIMO for a, b in self._coeficientes)
+            self._por_texto[x] = valores
+        return valores
+
+    def _bandas_de(self, firma: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        f = self._filas
+        for i in range(self._bandas):
+            yield i, firma[i * f : (i + 1) * f]
+
+    def agregar(self, clave: Hashable, conjunto: FrozenSet[str]) -> None:
+        """Alta o reemplazo; si el conjunto no cambió no se recalcula nada."""
+        if self._conjuntos.get(clave) == conjunto:
+            return
+        self.quitar(clave)
+        firma = self.firma(conjunto)
+        self._conjuntos[clave] = conjunto
+        self._firmas[clave] = firma
+        for banda in self._bandas_de(firma):
+            self._cubetas.setdefault(banda, set()).add(clave)
+
+    def quitar(self, clave: Hashable) -> bool:
+        firma = self._firmas.pop(clave, None)
+        if firma is None:
+            return False
+        del self._conjuntos[clave]
+        for banda in self._bandas_de(firma):
+            cubeta = self._cubetas[banda]
+            cubeta.discard(clave)
+            if not cubeta:
+                del self._cubetas[banda]
+        return True
+
+    def similares(
+        self, conjunto: FrozenSet[str], k: int = 5, excluir: Optional[Hashable] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Hasta k claves candidatas por LSH, ordenadas por Jaccard exacto."""
+        if k <= 0:
+            raise ValueError("k debe ser mayor a 0.")
+        candidatos: Set[Hashable] = set()
+        for banda in self._bandas_de(self.firma(conjunto)):
+            candidatos |= self._cubetas.get(banda, set())
+        candidatos.discard(excluir)
+        return heapq.nlargest(
+            k,
+            ((c, jaccard(conjunto, self._conjuntos[c])) for c in candidatos),
+            key=lambda par: par[1],
+        )
+
+
+class SimilitudRutinas:
+    """
+    Índice de rutinas de un SistemaGestion, por identidad de la rutina (un
+    renombre no la reindexa). Los eventos sueltos se aplican al momento; un
+    lote o un cambio sin evento se concilian comparando los conjuntos, y
+    solo las rutinas que cambiaron recalculan su firma.
+    """
+
+    def __init__(self, sistema: SistemaGestion, indice: Optional[IndiceMinHash] = None):
+        self._sistema = sistema
+        self._indice = indice if indice is not None else IndiceMinHash()
+        self._rutinas: Dict[int, Rutina] = {}
+        # Nombre normalizado de rutina -> id, para ubicar las ya eliminadas.
+        self._id_rutina: Dict[str, int] = {}
+        # Nombre normalizado de ejercicio -> rutinas que lo contienen.
+        self._rutinas_con: Dict[str, Set[int]] = {}
+        self._version = -1
+        self.sincronizar()
+        sistema.eventos.suscribir(self._al_cambiar, por_lotes=True)
+
+    # --------- Consultas ---------
+    def similares_a_rutina(self, nombre: str, k: int = 5) -> List[Tuple[Rutina, float]]:
+        self._al_dia()
+        r = self._sistema._buscar_rutina(nombre)
+        if r is None:
+            raise ValueError("Rutina no encontrada.")
+        return self._resultado(
+            self._indice.similares(self._indice.conjunto(id(r)), k, excluir=id(r))
+        )
+
+    def similares_a_ejercicios(
+        self, nombres_ejercicios: List[str], k: int = 5
+    ) -> List[Tuple[Rutina, float]]:
+        self._al_dia()
+        return self._resultado(self._indice.similares(claves_de(nombres_ejercicios), k))
+
+    def _resultado(self, pares: List[Tuple[Hashable, float]]) -> List[Tuple[Rutina, float]]:
+        return [(self._rutinas[id_r], sim) for id_r, sim in pares]
+
+    # --------- Mantenimiento ---------
+    def _al_dia(self) -> None:
+        if self._version != self._sistema.version:
+            self.sincronizar()
+
+    def sincronizar(self) -> None:
+        vistos: Set[int] = set()
+        i = 0
+        while i < len(self._sistema.rutinas):
+            r = self._sistema.rutinas[i]
+            vistos.add(id(r))
+            self._indexar(r)
+            i += 1
+        for id_r in list(self._rutinas):
+            if id_r not in vistos:
+                self._quitar(id_r)
+        self._id_rutina = {}
+        for id_r, r in self._rutinas.items():
+            self._id_rutina[Utilidades.normalizar(r.nombre)] = id_r
+        self._version = self._sistema.version
+
+    def _indexar(self, r: Rutina) -> None:
+        nuevo = claves_de(ej.nombre for ej in r.ejercicios)
+        if id(r) in self._indice:
+            previo = self._indice.conjunto(id(r))
+            if previo == nuevo:
+                return
+            for clave in previo - nuevo:
+                self._sin_rutina(clave, id(r))
+        for clave in nuevo:
+            self._rutinas_con.setdefault(clave, set()).add(id(r))
+        self._rutinas[id(r)] = r
+        self._id_rutina[Utilidades.normalizar(r.nombre)] = id(r)
+        self._indice.agregar(id(r), nuevo)
+
+    def _quitar(self, id_r: int) -> None:
+        for clave in self._indice.conjunto(id_r):
+            self._sin_rutina(clave, id_r)
+        self._indice.quitar(id_r)
+        del self._rutinas[id_r]
+
+    def _sin_rutina(self, clave: str, id_r: int) -> None:
+        rutinas = self._rutinas_con.get(clave)
+        if rutinas is not None:
+            rutinas.discard(id_r)
+            if not rutinas:
+                del self._rutinas_con[clave]
+
+    def _al_cambiar(self, lote: List[eventos.Evento]) -> None:
+        if len(lote) != 1 or self._version != self._sistema.version - 1:
+            self.sincronizar()
+            return
+        try:
+            self._aplicar(lote[0])
+        except (KeyError, AttributeError):
+            self.sincronizar()
+            return
+        self._version = self._sistema.version
+
+    def _aplicar(self, evento: eventos.Evento) -> None:
+        s = self._sistema
+        d = evento.datos
+        tipo = evento.tipo
+        if tipo in (
+            eventos.RUTINA_CREADA,
+            eventos.RUTINA_EJERCICIO_AGREGADO,
+            eventos.RUTINA_EJERCICIO_ELIMINADO,
+        ):
+            self._indexar(s._buscar_rutina(d.get("rutina") or d["nombre"]))
+        elif tipo == eventos.RUTINA_EDITADA:
+            id_r = self._id_rutina.pop(Utilidades.normalizar(d["nombre"]))
+            self._id_rutina[Utilidades.normalizar(self._rutinas[id_r].nombre)] = id_r
+        elif tipo == eventos.RUTINA_ELIMINADA:
+            self._quitar(self._id_rutina.pop(Utilidades.normalizar(d["nombre"])))
+        elif tipo == eventos.EJERCICIO_RENOMBRADO:
+            afectadas = self._rutinas_con.get(Utilidades.normalizar(d["nombre"]), set())
+            for id_r in list(afectadas):
+                self._indexar(self._rutinas[id_r])
+        elif tipo == eventos.EJERCICIO_ELIMINADO:
+            nombres = d["rutinas"]
+            i = 0
+            while i < len(nombres):
+                self._indexar(s._buscar_rutina(nombres[i]))
+                i += 1
+
+
+class SimilitudRutinasFuncional:
+    """
+    Mismo índice para el estado de Gestion_funcional. Cada operación
+    devuelve rutinas nuevas solo para las que cambió, así que al pasar otro
+    estado se reindexan únicamente los dicts que no se habían visto.
+    """
+
+    def __init__(self, st: Optional[Dict] = None, indice: Optional[IndiceMinHash] = None):
+        self._indice = indice if indice is not None else IndiceMinHash()
+        self._rutinas: Dict[int, Dict] = {}
+        self._estado: Optional[Dict] = None
+        if st is not None:
+            self.sincronizar(st)
+
+    def sincronizar(self, st: Dict) -> None:
+        if st is self._estado:
+            return
+        actuales = {id(r): r for r in st["rutinas"]}
+        for id_r in [i for i in self._rutinas if i not in actuales]:
+            self._indice.quitar(id_r)
+            del self._rutinas[id_r]
+        for id_r, r in actuales.items():
+            if id_r not in self._rutinas:
+                # Se guarda el dict: mientras siga aquí su id no se reutiliza.
+                self._rutinas[id_r] = r
+                self._indice.agregar(id_r, r["claves"])
+        self._estado = st
+
+    def similares_a_rutina(self, st: Dict, nombre: str, k: int = 5) -> List[Tuple[Dict, float]]:
+        self.sincronizar(st)
+        r = st["idx_rutinas"].get(Utilidades.normalizar(nombre))
+        if r is None:
+            raise ValueError("Rutina no encontrada.")
+        pares = self._indice.similares(r["claves"], k, excluir=id(r))
+        return [(self._rutinas[id_r], sim) for id_r, sim in pares]
+
+    def similares_a_ejercicios(
+        self, st: Dict, nombres_ejercicios: List[str], k: int = 5
+    ) -> List[Tuple[Dict, float]]:
+        self.sincronizar(st)
+        pares = self._indice.similares(claves_de(nombres_ejercicios), k)
+        return [(self._rutinas[id_r], sim) for id_r, sim in pares]
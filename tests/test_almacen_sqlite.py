@@ -0,0 +1,52 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from Gestion_POO import SistemaGestion
+from almacen_sqlite import RepositorioSQLite
+from similitud import SimilitudRutinas
+
+
+def _sistema() -> SistemaGestion:
+    s = SistemaGestion()
+    with redirect_stdout(io.StringIO()):
+        s.crear_ejercicio("a", 10, 3)
+        s.crear_ejercicio("b", 8, 2)
+    s.crear_rutina("R", "d", ["a", "b"])
+    s.crear_rutina("S", "d", ["b"])
+    s.agregar_usuario("ana", 30)
+    s.asignar_rutina_a_usuario("ana", "R")
+    s.asignar_rutina_a_usuario("ana", "S")
+    return s
+
+
+class TestCargarSistema(unittest.TestCase):
+    def setUp(self):
+        self.repo = RepositorioSQLite()
+        self.repo.importar_sistema(_sistema())
+        self.s = self.repo.cargar_sistema()
+
+    def tearDown(self):
+        self.repo.cerrar()
+
+    def test_reporte_tras_cargar(self):
+        salida = io.StringIO()
+        self.s.reporte_por_usuario(salida)
+        self.assertIn("Usuario: ana", salida.getvalue())
+        self.assertIn("- R:", salida.getvalue())
+
+    def test_eliminar_ejercicio_cascada(self):
+        self.s.eliminar_ejercicio("a")
+        self.assertEqual([e.nombre for e in self.s._buscar_rutina("R").ejercicios], ["b"])
+
+    def test_eliminar_rutina_la_quita_del_usuario(self):
+        self.s.eliminar_rutina("R")
+        self.assertEqual([r.nombre for r in self.s._buscar_usuario("ana").rutinas], ["S"])
+
+    def test_similitud_tras_cargar(self):
+        pares = SimilitudRutinas(self.s).similares_a_rutina("S", k=1)
+        self.assertEqual([r.nombre for r, _ in pares], ["R"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import random
+import unittest
+from itertools import combinations
+
+import Gestion_funcional as gf
+from constructor_rutinas import ConstructorRutinas, segundos_ejercicio
+
+
+def _mejor_distancia(catalogo, objetivo, incluir=(), excluir=(), maximo=None):
+    """Fuerza bruta: la menor distancia al objetivo entre todos los subconjuntos válidos."""
+    fijos = [e for e in catalogo if e["nombre"] in incluir]
+    libres = [e for e in catalogo if e["nombre"] not in incluir and e["nombre"] not in excluir]
+    base = sum(map(segundos_ejercicio, fijos))
+    tope = len(libres) if maximo is None else maximo - len(fijos)
+    mejor = None
+    for n in range(0, tope + 1):
+        for combo in combinations(libres, n):
+            if not fijos and not combo:
+                continue
+            d = abs(base + sum(map(segundos_ejercicio, combo)) - objetivo)
+            mejor = d if mejor is None else min(mejor, d)
+    return mejor
+
+
+class TestConstructorRutinas(unittest.TestCase):
+    def setUp(self):
+        azar = random.Random(41)
+        self.catalogo = [
+            gf.mk_ejercicio(f"e{i}", azar.randint(1, 20), azar.randint(1, 5)) for i in range(11)
+        ]
+        self.c = ConstructorRutinas(self.catalogo)
+        self.azar = azar
+
+    def _revisar(self, objetivo, tolerancia, incluir=(), excluir=(), maximo=None):
+        esperado = _mejor_distancia(self.catalogo, objetivo, incluir, excluir, maximo)
+        if esperado is None or esperado > tolerancia:
+            with self.assertRaises(ValueError):
+                self.c.proponer(objetivo, tolerancia, incluir, excluir, maximo)
+            return
+        p = self.c.proponer(objetivo, tolerancia, incluir, excluir, maximo)
+        nombres = [e["nombre"] for e in p.ejercicios]
+        self.assertEqual(len(nombres), len(set(nombres)))
+        self.assertEqual(p.segundos, sum(map(segundos_ejercicio, p.ejercicios)))
+        self.assertEqual(abs(p.segundos - objetivo), esperado)
+        self.assertEqual(nombres[: len(incluir)], list(incluir))
+        self.assertFalse(set(nombres) & set(excluir))
+        if maximo is not None:
+            self.assertLessEqual(len(nombres), maximo)
+
+    def test_igual_a_fuerza_bruta(self):
+        total = sum(map(segundos_ejercicio, self.catalogo))
+        for _ in range(60):
+            objetivo = self.azar.randint(1, total + 100)
+            tolerancia = self.azar.choice((0, 5, 60))
+            with self.subTest(objetivo=objetivo, tolerancia=tolerancia):
+                self._revisar(objetivo, tolerancia)
+
+    def test_con_obligatorios_excluidos_y_maximo(self):
+        for _ in range(40):
+            nombres = self.azar.sample([e["nombre"] for e in self.catalogo], 4)
+            incluir, excluir = tuple(nombres[:2]), tuple(nombres[2:])
+            maximo = self.azar.choice((None, 3, 5))
+            objetivo = self.azar.randint(100, 3000)
+            with self.subTest(objetivo=objetivo, incluir=incluir, maximo=maximo):
+                self._revisar(objetivo, 30, incluir, excluir, maximo)
+
+    def test_errores(self):
+        with self.assertRaises(ValueError):
+            self.c.proponer(0)
+        with self.assertRaises(ValueError):
+            self.c.proponer(600, incluir=("e1",), excluir=("E1",))
+        with self.assertRaises(ValueError):
+            self.c.proponer(600, incluir=("no existe",))
+        with self.assertRaises(ValueError):
+            self.c.proponer(600, incluir=("e1", "e2"), max_ejercicios=1)
+
+    def test_construir_rutina_funcional(self):
+        st = gf.estado_vacio()
+        for e in self.catalogo:
+            st = gf.crear_ejercicio(st, e["nombre"], e["repeticiones"], e["series"])
+        cache = {}
+        st2 = gf.construir_rutina(st, "R", "d", 10, incluir=("e3",), cache=cache)
+        r = gf.buscar_rutina(st2, "R")
+        self.assertEqual(r["ejercicios"][0]["nombre"], "e3")
+        self.assertLessEqual(abs(gf.rutina_duracion_total_min(r) * 60 - 600), 60)
+        # La caché se reutiliza mientras el catálogo no cambie.
+        constructor = cache["catalogo"][1]
+        gf.proponer_rutina(st2, 5, cache=cache)
+        self.assertIs(cache["catalogo"][1], constructor)
+        st3 = gf.crear_ejercicio(st2, "nuevo", 10, 1)
+        gf.proponer_rutina(st3, 5, cache=cache)
+        self.assertIsNot(cache["catalogo"][1], constructor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import eventos
+import Gestion_funcional as gf
+from Gestion_POO import SistemaGestion
+
+
+class TestBusEventos(unittest.TestCase):
+    def setUp(self):
+        self.bus = eventos.BusEventos()
+        self.uno = []
+        self.lotes = []
+        self.bus.suscribir(self.uno.append)
+        self.bus.suscribir(self.lotes.append, por_lotes=True)
+
+    def test_lote_retiene_y_entrega_junto(self):
+        with self.bus.lote():
+            self.bus.emitir(eventos.USUARIO_AGREGADO, nombre="a", edad=20)
+            with self.bus.lote():
+                self.bus.emitir(eventos.USUARIO_AGREGADO, nombre="b", edad=20)
+            self.assertEqual(self.uno, [])
+        self.assertEqual([e.datos["nombre"] for e in self.uno], ["a", "b"])
+        self.assertEqual([[e.secuencia for e in lote] for lote in self.lotes], [[1, 2]])
+
+    def test_lote_con_error_se_descarta(self):
+        with self.bus.lote():
+            self.bus.emitir(eventos.USUARIO_AGREGADO, nombre="a", edad=20)
+            with self.assertRaises(RuntimeError):
+                with self.bus.lote():
+                    self.bus.emitir(eventos.USUARIO_ELIMINADO, nombre="a")
+                    raise RuntimeError
+        self.assertEqual([e.tipo for e in self.uno], [eventos.USUARIO_AGREGADO])
+        # La secuencia descartada se reutiliza: no quedan huecos.
+        self.assertEqual(self.bus.emitir(eventos.USUARIO_ELIMINADO, nombre="a").secuencia, 2)
+
+    def test_filtro_por_tipo_y_cancelar(self):
+        bajas = []
+        cancelar = self.bus.suscribir(bajas.append, tipos=(eventos.USUARIO_ELIMINADO,))
+        self.bus.emitir(eventos.USUARIO_AGREGADO, nombre="a", edad=20)
+        self.bus.emitir(eventos.USUARIO_ELIMINADO, nombre="a")
+        cancelar()
+        self.bus.emitir(eventos.USUARIO_ELIMINADO, nombre="b")
+        self.assertEqual([e.datos["nombre"] for e in bajas], ["a"])
+
+    def test_asincrono_y_errores(self):
+        recibidos = []
+
+        def roto(evento):
+            raise KeyError(evento.tipo)
+
+        self.bus.suscribir(recibidos.append, asincrono=True)
+        self.bus.suscribir(roto, asincrono=True)
+        for i in range(50):
+            self.bus.emitir(eventos.USUARIO_AGREGADO, nombre=f"u{i}", edad=20)
+        self.bus.esperar()
+        self.assertEqual(len(recibidos), 50)
+        self.assertEqual(len(self.bus.errores), 50)
+        self.bus.cerrar()
+
+
+class TestEventosDelDominio(unittest.TestCase):
+    def test_poo_emite_por_operacion(self):
+        s = SistemaGestion()
+        tipos = []
+        s.eventos.suscribir(lambda e: tipos.append(e.tipo))
+        with redirect_stdout(io.StringIO()):
+            s.crear_ejercicio("a", 10, 3)
+        s.crear_rutina("R", "d", ["a"])
+        s.agregar_usuario("ana", 20)
+        s.asignar_rutina_a_usuario("ana", "R")
+        with self.assertRaises(ValueError):
+            s.agregar_usuario("ana", 20)
+        s.eliminar_rutina("R")
+        self.assertEqual(
+            tipos,
+            [
+                eventos.EJERCICIO_CREADO,
+                eventos.RUTINA_CREADA,
+                eventos.USUARIO_AGREGADO,
+                eventos.RUTINA_ASIGNADA,
+                eventos.RUTINA_ELIMINADA,
+            ],
+        )
+
+    def test_funcional_lote_con_eventos(self):
+        bus = eventos.BusEventos()
+        lotes = []
+        bus.suscribir(lotes.append, por_lotes=True)
+        st = gf.estado_vacio()
+        with self.assertRaises(ValueError):
+            gf.ejecutar_lote_con_eventos(
+                bus, st, [(gf.agregar_usuario, "a", 20), (gf.agregar_usuario, "a", 20)]
+            )
+        self.assertEqual(lotes, [])
+        st = gf.ejecutar_lote_con_eventos(
+            bus, st, [(gf.agregar_usuario, "a", 20), (gf.renombrar_usuario, "a", "b")]
+        )
+        self.assertEqual(
+            [(e.tipo, e.datos["nombre"]) for e in lotes[0]],
+            [(eventos.USUARIO_AGREGADO, "a"), (eventos.USUARIO_RENOMBRADO, "a")],
+        )
+        self.assertEqual(lotes[0][1].datos["nuevo_nombre"], "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from Gestion_POO import SistemaGestion
+from fragmentacion import SistemaFragmentado, fragmento_por_clave
+
+
+class TestSistemaFragmentado(unittest.TestCase):
+    def setUp(self):
+        self.f = SistemaFragmentado(3)
+        with redirect_stdout(io.StringIO()):
+            self.f.crear_ejercicio("a", 10, 3)
+        self.f.crear_rutina("R", "d", ["a"])
+        self.f.crear_rutina("S", "d", ["a"])
+        self.nombres = [f"u{i}" for i in range(12)]
+        for nombre in self.nombres:
+            self.f.agregar_usuario(nombre, 20)
+            self.f.asignar_rutina_a_usuario(nombre, "R")
+
+    def tearDown(self):
+        self.f.cerrar()
+
+    def test_eliminar_usuario(self):
+        self.f.eliminar_usuario("u3")
+        with self.assertRaises(ValueError):
+            self.f.fragmento_de("u3")
+        with self.assertRaises(ValueError):
+            self.f.eliminar_usuario("u3")
+        self.assertEqual(
+            [fila[0] for fila in self.f.filas_reporte()],
+            [n for n in self.nombres if n != "u3"],
+        )
+        # El nombre queda libre para un alta nueva.
+        self.f.agregar_usuario("u3", 30)
+        self.assertEqual([fila[0] for fila in self.f.filas_reporte()][-1], "u3")
+
+    def test_eliminar_rutina_en_todos_los_fragmentos(self):
+        self.f.eliminar_rutina("R")
+        self.assertEqual({fila[2] for fila in self.f.filas_reporte()}, {None})
+        with self.assertRaises(ValueError):
+            self.f.asignar_rutina_a_usuario("u0", "R")
+        self.f.asignar_rutina_a_usuario("u0", "S")
+
+
+class TestRuteoYReporte(unittest.TestCase):
+    def setUp(self):
+        self.f = SistemaFragmentado(3)
+        self.s = SistemaGestion()
+        with redirect_stdout(io.StringIO()):
+            for sistema in (self.f, self.s):
+                sistema.crear_ejercicio("a", 10, 3)
+                sistema.crear_ejercicio("b", 8, 2)
+                sistema.crear_rutina("R", "d", ["a"])
+                sistema.crear_rutina("S", "d", ["a", "b"])
+        for i in range(30):
+            for sistema in (self.f, self.s):
+                sistema.agregar_usuario(f"u{i}", 20 + i)
+                if i % 3:
+                    sistema.asignar_rutina_a_usuario(f"u{i}", "R" if i % 2 else "S")
+
+    def tearDown(self):
+        self.f.cerrar()
+
+    def test_ruteo_por_nombre_o_sucursal(self):
+        for i in range(30):
+            self.assertEqual(self.f.fragmento_de(f"U{i}"), fragmento_por_clave(f"u{i}", 3))
+        self.f.agregar_usuario("x", 30, sucursal="centro")
+        self.assertEqual(self.f.fragmento_de("x"), fragmento_por_clave("centro", 3))
+        antes = self.f.fragmento_de("u4")
+        self.f.renombrar_usuario("u4", "otro")
+        self.assertEqual(self.f.fragmento_de("otro"), antes)
+        with self.assertRaises(ValueError):
+            self.f.agregar_usuario("OTRO", 20)
+
+    def test_reporte_combinado_igual_al_de_un_sistema(self):
+        self.assertEqual(
+            len({self.f.fragmento_de(f"u{i}") for i in range(30)}), 3, "datos poco repartidos"
+        )
+        esperado, obtenido = io.StringIO(), io.StringIO()
+        self.s.reporte_por_usuario(esperado)
+        self.f.reporte_por_usuario(obtenido)
+        self.assertEqual(obtenido.getvalue(), esperado.getvalue())
+
+    def test_errores_no_desfasan_las_tuberias(self):
+        with self.assertRaises(ValueError):
+            self.f.asignar_rutina_a_usuario("u1", "R")
+        with self.assertRaises(ValueError):
+            self.f.crear_rutina("R", "d", ["a"])
+        # Un reporte abandonado a medias tampoco deja respuestas pendientes.
+        filas = self.f.filas_reporte()
+        next(filas)
+        filas.close()
+        self.f.cambiar_edad_usuario("u1", 50)
+        self.assertIn(("u1", 50, "R", 3.5), list(self.f.filas_reporte()))
+
+
+if __name__ == "__main__":
+    unittest.main()
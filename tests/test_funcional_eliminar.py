@@ -0,0 +1,31 @@
+import unittest
+
+import Gestion_funcional as gf
+
+
+class TestEliminarEjercicio(unittest.TestCase):
+    def setUp(self):
+        st = gf.estado_vacio()
+        st = gf.crear_ejercicio(st, "a", 10, 3)
+        st = gf.crear_ejercicio(st, "b", 8, 2)
+        st = gf.crear_ejercicio(st, "c", 5, 2)
+        st = gf.crear_rutina(st, "R", "d", ["a", "b"])
+        self.st = gf.crear_rutina(st, "S", "d", ["c"])
+
+    def test_indice_de_rutinas_sigue_la_cascada(self):
+        st = gf.eliminar_ejercicio(self.st, "a")
+        r = gf.buscar_rutina(st, "R")
+        self.assertIs(r, st["rutinas"][0])
+        self.assertEqual([e["nombre"] for e in r["ejercicios"]], ["b"])
+        self.assertIs(gf.buscar_rutina(st, "S"), gf.buscar_rutina(self.st, "S"))
+
+    def test_edicion_posterior_se_aplica(self):
+        st = gf.eliminar_ejercicio(self.st, "a")
+        st = gf.rutina_agregar_ejercicio_st(st, "R", "c")
+        self.assertEqual(
+            [e["nombre"] for e in st["rutinas"][0]["ejercicios"]], ["b", "c"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import Gestion_funcional as gf
+
+
+def _estado():
+    st = gf.estado_vacio()
+    st = gf.crear_ejercicio(st, "Sentadilla", 10, 3)
+    st = gf.crear_rutina(st, "Piernas", "d", ["Sentadilla"])
+    st = gf.agregar_usuario(st, "Ana", 30)
+    return gf.asignar_rutina_a_usuario(st, "Ana", "Piernas")
+
+
+class TestHistorial(unittest.TestCase):
+    def test_deshacer_y_rehacer(self):
+        st = _estado()
+        h = gf.historial_aplicar(gf.mk_historial(st), gf.agregar_usuario, "Bea", 40)
+        h = gf.historial_aplicar(h, gf.eliminar_usuario, "Ana")
+        self.assertIsNone(gf.buscar_usuario(h["presente"], "Ana"))
+        h = gf.historial_deshacer(h)
+        self.assertIsNotNone(gf.buscar_usuario(h["presente"], "Ana"))
+        h = gf.historial_deshacer(h)
+        self.assertIs(h["presente"], st)
+        with self.assertRaises(ValueError):
+            gf.historial_deshacer(h)
+        h = gf.historial_rehacer(h)
+        self.assertIsNotNone(gf.buscar_usuario(h["presente"], "Bea"))
+        # Un cambio nuevo descarta lo que se podía rehacer.
+        h = gf.historial_aplicar(h, gf.cambiar_edad_usuario, "Bea", 41)
+        with self.assertRaises(ValueError):
+            gf.historial_rehacer(h)
+
+    def test_profundidad_acotada(self):
+        h = gf.mk_historial(gf.estado_vacio(), profundidad=3)
+        for i in range(10):
+            h = gf.historial_aplicar(h, gf.agregar_usuario, f"u{i}", 20)
+        self.assertEqual(gf.historial_estadisticas(h)["deshacer_disponibles"], 3)
+        for _ in range(3):
+            h = gf.historial_deshacer(h)
+        self.assertEqual(len(h["presente"]["usuarios"]), 7)
+
+    def test_presupuesto_acotado(self):
+        h = gf.mk_historial(gf.estado_vacio(), presupuesto_bytes=4096)
+        for i in range(50):
+            h = gf.historial_aplicar(h, gf.agregar_usuario, f"u{i}", 20)
+        self.assertLessEqual(gf.historial_estadisticas(h)["bytes_estimados"], 4096)
+        self.assertLess(gf.historial_estadisticas(h)["deshacer_disponibles"], 50)
+
+
+class TestHistorialDelMenu(unittest.TestCase):
+    def test_cada_cambio_del_menu_se_puede_deshacer(self):
+        st = _estado()
+        sesion = gf.sesion_menu(st)
+        gf._registrar(sesion, st)
+        estadisticas = gf.historial_estadisticas(sesion["historial"])
+        self.assertEqual(estadisticas["deshacer_disponibles"], 0)
+        st2 = gf.cambiar_edad_usuario(st, "Ana", 31)
+        gf._registrar(sesion, st2)
+        st3 = gf._moverse_en_historial(st2, sesion, gf.historial_deshacer)
+        self.assertIs(st3, st)
+        self.assertIs(gf._moverse_en_historial(st3, sesion, gf.historial_rehacer), st2)
+
+    def test_la_bitacora_sigue_al_deshacer_un_renombre(self):
+        st = _estado()
+        sesion = gf.sesion_menu(st)
+        gf.registrar_sesion(sesion["bitacora"], st, "Ana", "Piernas")
+        st2 = gf.aplicar_con_eventos(sesion["eventos"], st, gf.renombrar_usuario, "Ana", "Bea")
+        gf._registrar(sesion, st2)
+        self.assertEqual(len(gf.sesiones_de_usuario(sesion["bitacora"], st2, "Bea")), 1)
+        st3 = gf._moverse_en_historial(st2, sesion, gf.historial_deshacer)
+        self.assertEqual(len(gf.sesiones_de_usuario(sesion["bitacora"], st3, "Ana")), 1)
+        volumen = gf.volumen_usuario(sesion["acumulados"], st3, "Ana", "dia")
+        self.assertEqual(volumen[-1][1].sesiones, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
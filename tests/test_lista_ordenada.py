@@ -0,0 +1,71 @@
+import copy
+import pickle
+import unittest
+
+from Gestion_POO import ListaOrdenada, SistemaGestion
+
+
+class _Item:
+    def __init__(self, n: int):
+        self.n = n
+
+
+class TestListaOrdenada(unittest.TestCase):
+    def test_borrar_indexar_borrar(self):
+        items = [_Item(i) for i in range(10)]
+        lista = ListaOrdenada(items)
+        lista.quitar(items[3])
+        self.assertEqual([lista[i].n for i in range(len(lista))], [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        # El acceso por índice no compacta: las lápidas siguen ahí.
+        self.assertEqual(lista._lapidas, 1)
+        lista.quitar(items[5])
+        self.assertEqual(lista[4].n, 6)
+        self.assertEqual(lista[-1].n, 9)
+        self.assertEqual(lista[0].n, 0)
+        self.assertEqual(len(lista), 8)
+        with self.assertRaises(IndexError):
+            lista[8]
+
+    def test_copias_conservan_borrados(self):
+        items = [_Item(i) for i in range(5)]
+        lista = ListaOrdenada(items)
+        lista.quitar(items[1])
+        for otra in (copy.deepcopy(lista), pickle.loads(pickle.dumps(lista))):
+            self.assertEqual([x.n for x in otra], [0, 2, 3, 4])
+            otra.quitar(otra[2])
+            self.assertEqual([x.n for x in otra], [0, 2, 4])
+            self.assertEqual(len(otra), 3)
+
+    def test_sistema_copiado_elimina_usuario(self):
+        s = SistemaGestion()
+        s.agregar_usuario("u1", 20)
+        s.agregar_usuario("u2", 20)
+        s.agregar_usuario("u3", 20)
+        c = copy.deepcopy(s)
+        c.eliminar_usuario("u3")
+        self.assertEqual([u.nombre for u in c.usuarios], ["u1", "u2"])
+        self.assertEqual(len(c.usuarios), 2)
+        self.assertEqual(len(s.usuarios), 3)
+
+    def test_cascadas_por_indice_inverso(self):
+        s = SistemaGestion()
+        s.crear_ejercicio("a", 10, 3)
+        s.crear_ejercicio("b", 10, 3)
+        s.crear_rutina("r1", "d", ["a", "b"])
+        s.crear_rutina("r2", "d", ["b"])
+        s.crear_rutina("r3", "d", ["a", "b"])
+        s.agregar_usuario("u1", 20)
+        s.agregar_usuario("u2", 20)
+        s.asignar_rutina_a_usuario("u1", "r1")
+        s.asignar_rutina_a_usuario("u2", "r1")
+        s.asignar_rutina_a_usuario("u2", "r2")
+        s.eliminar_ejercicio("a")
+        self.assertEqual([e.nombre for e in s._buscar_rutina("r1").ejercicios], ["b"])
+        self.assertEqual([e.nombre for e in s._buscar_rutina("r3").ejercicios], ["b"])
+        s.eliminar_rutina("r1")
+        self.assertEqual(s._buscar_usuario("u1").rutinas, [])
+        self.assertEqual([r.nombre for r in s._buscar_usuario("u2").rutinas], ["r2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import io
+import multiprocessing as mp
+import unittest
+from contextlib import redirect_stdout
+
+import Gestion_funcional as gf
+from Gestion_POO import SistemaGestion
+from memoria_compartida import InstantaneaCompartida, publicar
+
+
+def _sistema() -> SistemaGestion:
+    s = SistemaGestion()
+    with redirect_stdout(io.StringIO()):
+        s.crear_ejercicio("Sentadilla", 10, 3)
+        s.crear_ejercicio("Plancha", 1, 4)
+    s.crear_rutina("Piernas", "d", ["Sentadilla", "Plancha"])
+    s.crear_rutina("Núcleo", "d", ["Plancha"])
+    for i in range(50):
+        s.agregar_usuario(f"u{i}", 20 + i)
+        s.asignar_rutina_a_usuario(f"u{i}", "Piernas" if i % 2 else "Núcleo")
+    s.agregar_usuario("Éva", 33)
+    return s
+
+
+def _leer_en_otro_proceso(nombre, usuarios, con) -> None:
+    with InstantaneaCompartida.abrir(nombre) as inst:
+        con.send([inst.total_min_usuario(u) for u in usuarios])
+    con.close()
+
+
+class TestInstantaneaCompartida(unittest.TestCase):
+    def setUp(self):
+        self.s = _sistema()
+        self.inst = publicar(self.s)
+
+    def tearDown(self):
+        if self.inst is not None:
+            self.inst.liberar()
+
+    def test_consultas_iguales_al_sistema(self):
+        self.assertEqual(self.inst.cantidad_usuarios(), 51)
+        self.assertEqual(self.inst.cantidad_rutinas(), 2)
+        self.assertEqual(list(self.inst.nombres_usuarios())[-1], "Éva")
+        for u in self.s.usuarios:
+            with self.subTest(usuario=u.nombre):
+                esperado = self.s.resumenes.de(u)
+                obtenido = self.inst.buscar_usuario(u.nombre.upper())
+                self.assertEqual(obtenido[:2], esperado[:2])
+                self.assertEqual(
+                    [n for n, _ in obtenido.rutinas], [n for n, _ in esperado.rutinas]
+                )
+                self.assertAlmostEqual(obtenido.total_min, esperado.total_min)
+        self.assertAlmostEqual(
+            self.inst.duracion_rutina_min("núcleo"),
+            self.s._buscar_rutina("Núcleo").duracion_total_min(),
+        )
+        self.assertEqual(
+            [e.nombre for e in self.inst.ejercicios_de_rutina("PIERNAS")],
+            ["Sentadilla", "Plancha"],
+        )
+        self.assertEqual(self.inst.buscar_ejercicio(" plancha ").series, 4)
+
+    def test_nombres_que_no_estan(self):
+        self.assertIsNone(self.inst.buscar_usuario("nadie"))
+        self.assertIsNone(self.inst.buscar_ejercicio("nada"))
+        with self.assertRaises(ValueError):
+            self.inst.total_min_usuario("nadie")
+        with self.assertRaises(ValueError):
+            self.inst.ejercicios_de_rutina("nada")
+
+    def test_no_cambia_al_cambiar_el_sistema(self):
+        antes = self.inst.total_min_usuario("u1")
+        self.s.rutina_eliminar_ejercicio("Piernas", "Sentadilla")
+        self.s.eliminar_usuario("u2")
+        self.assertEqual(self.inst.total_min_usuario("u1"), antes)
+        self.assertIsNotNone(self.inst.buscar_usuario("u2"))
+
+    def test_otro_proceso_se_conecta_y_no_borra_el_bloque(self):
+        ctx = mp.get_context("fork")
+        usuarios = ["u0", "u1", "Éva"]
+        for _ in range(2):
+            recibir, enviar = ctx.Pipe(duplex=False)
+            p = ctx.Process(
+                target=_leer_en_otro_proceso, args=(self.inst.nombre, usuarios, enviar)
+            )
+            p.start()
+            enviar.close()
+            self.assertEqual(recibir.recv(), [self.inst.total_min_usuario(u) for u in usuarios])
+            p.join(10)
+            self.assertEqual(p.exitcode, 0)
+        # Quien se conecta solo cierra; el bloque sigue hasta que se libera.
+        otra = InstantaneaCompartida.abrir(self.inst.nombre)
+        otra.cerrar()
+        nombre = self.inst.nombre
+        self.inst.liberar()
+        self.inst = None
+        with self.assertRaises(FileNotFoundError):
+            InstantaneaCompartida.abrir(nombre)
+
+
+class TestInstantaneaFuncional(unittest.TestCase):
+    def test_publicar_estado(self):
+        st = gf.estado_vacio()
+        st = gf.crear_ejercicio(st, "a", 10, 3)
+        st = gf.crear_rutina(st, "R", "d", ["a"])
+        st = gf.agregar_usuario(st, "Ana", 30)
+        st = gf.asignar_rutina_a_usuario(st, "Ana", "R")
+        # Ana conserva la rutina con el nombre viejo.
+        st = gf.editar_rutina(st, "R", "R2")
+        with publicar(st) as inst:
+            ana = inst.buscar_usuario("ana")
+            self.assertEqual([n for n, _ in ana.rutinas], ["R"])
+            self.assertAlmostEqual(ana.total_min, st["usuarios"][0]["total_seg"] / 60)
+            self.assertAlmostEqual(inst.duracion_rutina_min("R2"), ana.total_min)
+            with self.assertRaises(ValueError):
+                inst.duracion_rutina_min("R")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from Gestion_POO import SistemaGestion, Usuario, Utilidades
+from replica import ReplicaLectura
+
+
+def _sistema() -> SistemaGestion:
+    s = SistemaGestion()
+    with redirect_stdout(io.StringIO()):
+        s.crear_ejercicio("a", 10, 3)
+        s.crear_ejercicio("b", 8, 2)
+    s.crear_rutina("R", "d", ["a", "b"])
+    s.agregar_usuario("ana", 30)
+    s.asignar_rutina_a_usuario("ana", "R")
+    return s
+
+
+def _alta_sin_eventos(s: SistemaGestion, nombre: str) -> None:
+    u = Usuario(nombre, 40)
+    s.usuarios.append(u)
+    s.idx_usuarios[Utilidades.normalizar(nombre)] = u
+    s._marcar_cambio()
+
+
+class TestReplicaLectura(unittest.TestCase):
+    def setUp(self):
+        self.s = _sistema()
+        self.replica = ReplicaLectura(self.s)
+
+    def tearDown(self):
+        self.replica.cerrar()
+
+    def _igual_al_primario(self, timeout=10.0) -> bool:
+        limite = time.monotonic() + timeout
+        esperado = list(self.s.filas_reporte())
+        while time.monotonic() < limite:
+            if self.replica.esperar(timeout) and self.replica.filas_reporte() == esperado:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_alcanza_al_primario(self):
+        self.assertEqual(self.replica.filas_reporte(), list(self.s.filas_reporte()))
+        with redirect_stdout(io.StringIO()):
+            self.s.crear_ejercicio("c", 5, 5)
+        self.s.rutina_agregar_ejercicio("R", "c")
+        for i in range(200):
+            self.s.agregar_usuario(f"u{i}", 20 + i % 50)
+            self.s.asignar_rutina_a_usuario(f"u{i}", "R")
+        with self.s.transaccion():
+            self.s.renombrar_usuario("ana", "Ana María")
+            self.s.eliminar_usuario("u0")
+        with self.assertRaises(RuntimeError):
+            with self.s.transaccion():
+                self.s.eliminar_usuario("u1")
+                raise RuntimeError
+        self.assertTrue(self._igual_al_primario())
+        self.assertEqual(self.replica.retraso().eventos, 0)
+        self.assertEqual(self.replica.errores, [])
+        u1 = self.s._buscar_usuario("u1")
+        self.assertEqual(self.replica.resumen_usuario("u1"), self.s.resumenes.de(u1))
+        self.assertIsNone(self.replica.resumen_usuario("u0"))
+
+    def test_resincronizar_lo_hecho_sin_eventos(self):
+        _alta_sin_eventos(self.s, "fuera")
+        self.assertTrue(self.replica.esperar(10))
+        self.assertNotIn("fuera", [fila[0] for fila in self.replica.filas_reporte()])
+        self.replica.resincronizar()
+        self.assertTrue(self._igual_al_primario())
+
+    def test_copia_divergente_se_repone_sola(self):
+        _alta_sin_eventos(self.s, "fuera")
+        # En la réplica "fuera" no existe: el lote falla y la copia diverge.
+        self.s.asignar_rutina_a_usuario("fuera", "R")
+        self.s.agregar_usuario("despues", 20)
+        self.assertTrue(self._igual_al_primario())
+        self.assertEqual(len(self.replica.errores), 1)
+        self.assertIn("rutina_asignada", self.replica.errores[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import Gestion_funcional as gf
+from Gestion_POO import SistemaGestion
+
+
+def _sistemas(n_usuarios: int = 40, n_rutinas: int = 9):
+    s = SistemaGestion()
+    st = gf.estado_vacio()
+    with redirect_stdout(io.StringIO()):
+        for i in range(6):
+            s.crear_ejercicio(f"e{i}", 5 + i, 1 + i % 4)
+            st = gf.crear_ejercicio(st, f"e{i}", 5 + i, 1 + i % 4)
+    for k in range(n_rutinas):
+        nombres = [f"e{(k + j) % 6}" for j in range(1 + k % 4)]
+        s.crear_rutina(f"r{k}", "d", nombres)
+        st = gf.crear_rutina(st, f"r{k}", "d", nombres)
+    for i in range(n_usuarios):
+        s.agregar_usuario(f"u{i}", 20 + i % 50)
+        st = gf.agregar_usuario(st, f"u{i}", 20 + i % 50)
+        for k in range(i % 4):
+            s.asignar_rutina_a_usuario(f"u{i}", f"r{(i + k) % n_rutinas}")
+            st = gf.asignar_rutina_a_usuario(st, f"u{i}", f"r{(i + k) % n_rutinas}")
+    return s, st
+
+
+def _capturar(f, *args) -> str:
+    with redirect_stdout(io.StringIO()) as salida:
+        f(*args)
+    return salida.getvalue()
+
+
+class TestReporteParalelo(unittest.TestCase):
+    def setUp(self):
+        self.s, self.st = _sistemas()
+
+    def test_reporte_igual_al_secuencial(self):
+        esperado = _capturar(self.s.reporte_por_usuario)
+        for procesos in (1, 3):
+            salida = io.StringIO()
+            self.s.reporte_paralelo(salida, procesos=procesos, tam_bloque=7)
+            self.assertEqual(salida.getvalue(), esperado)
+        salida = io.StringIO()
+        gf.reporte_paralelo(self.st, salida, procesos=3, tam_bloque=7)
+        self.assertEqual(salida.getvalue(), _capturar(gf.reporte_por_usuario, self.st))
+
+    def test_reporte_tras_borrar_usuarios(self):
+        self.s.eliminar_usuario("u0")
+        self.s.eliminar_usuario("u17")
+        salida = io.StringIO()
+        self.s.reporte_paralelo(salida, procesos=2, tam_bloque=5)
+        self.assertEqual(salida.getvalue(), _capturar(self.s.reporte_por_usuario))
+
+    def test_listar_rutinas_igual_al_secuencial(self):
+        for procesos in (1, 2):
+            salida = io.StringIO()
+            self.s.listar_rutinas_paralelo(salida, procesos=procesos, tam_bloque=2)
+            self.assertEqual(salida.getvalue(), _capturar(self.s.listar_rutinas))
+            salida = io.StringIO()
+            gf.listar_rutinas_paralelo(self.st, salida, procesos=procesos, tam_bloque=2)
+            self.assertEqual(salida.getvalue(), _capturar(gf.listar_rutinas, self.st))
+
+    def test_vacios(self):
+        salida = io.StringIO()
+        SistemaGestion().listar_rutinas_paralelo(salida)
+        gf.reporte_paralelo(gf.estado_vacio(), salida)
+        self.assertEqual(salida.getvalue(), "No hay rutinas.\nNo hay usuarios.\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
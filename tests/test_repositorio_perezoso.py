@@ -0,0 +1,41 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from Gestion_POO import SistemaGestion
+from almacen_sqlite import RepositorioSQLite
+from repositorio_perezoso import RepositorioPerezoso
+
+
+class TestInvalidacion(unittest.TestCase):
+    def setUp(self):
+        self.p = RepositorioPerezoso(RepositorioSQLite())
+        with redirect_stdout(io.StringIO()):
+            self.p.crear_ejercicio("x", 10, 3)
+        self.p.crear_rutina("R", "d", ["x"])
+        self.p.agregar_usuario("ana", 30)
+        self.assertEqual(self.p.buscar_usuario("ana").rutinas, [])
+
+    def tearDown(self):
+        self.p.almacen.cerrar()
+
+    def test_asignar_rutinas_invalida_al_usuario(self):
+        self.assertEqual(self.p.asignar_rutinas(iter([("ana", "R")])), 1)
+        self.assertEqual([r.nombre for r in self.p.buscar_usuario("ana").rutinas], ["R"])
+
+    def test_importar_sistema_vacia_la_cache(self):
+        s = SistemaGestion()
+        s.agregar_usuario("bea", 40)
+        self.p.importar_sistema(s)
+        self.assertEqual(self.p.estadisticas()["usuarios_en_memoria"], 0)
+        self.assertEqual(self.p.buscar_usuario("bea").edad, 40)
+
+    def test_actualizar_ejercicio_invalida_a_quien_lo_usa(self):
+        self.p.asignar_rutina_a_usuario("ana", "R")
+        self.assertEqual(self.p.buscar_usuario("ana").rutinas[0].ejercicios[0].repeticiones, 10)
+        self.p.actualizar_ejercicio("x", repeticiones=12)
+        self.assertEqual(self.p.buscar_usuario("ana").rutinas[0].ejercicios[0].repeticiones, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import Gestion_funcional as gf
+import serializacion
+from Gestion_POO import SistemaGestion
+
+
+def _reporte(fuente) -> str:
+    salida = io.StringIO()
+    if isinstance(fuente, dict):
+        gf.reporte_por_usuario(fuente, salida)
+    else:
+        fuente.reporte_por_usuario(salida)
+    return salida.getvalue()
+
+
+def _vuelta(fuente, leer, comprimir=False):
+    f = io.BytesIO()
+    serializacion.escribir(fuente, f, comprimir=comprimir)
+    f.seek(0)
+    return leer(f)
+
+
+class TestSerializacionPOO(unittest.TestCase):
+    def setUp(self):
+        s = SistemaGestion()
+        with redirect_stdout(io.StringIO()):
+            s.crear_ejercicio("Sentadilla", 10, 3)
+            s.crear_ejercicio("Plancha", 1, 4)
+        s.crear_rutina("Piernas", "día de pierna", ["Sentadilla", "Plancha"])
+        s.crear_rutina("Core", "ñandú", ["Plancha"])
+        s.aplicar_perfil_tiempos(4, 90)
+        for i in range(20):
+            s.agregar_usuario(f"u{i}", 20 + i)
+            s.asignar_rutina_a_usuario(f"u{i}", "Piernas" if i % 2 else "Core")
+        self.s = s
+
+    def test_ida_y_vuelta(self):
+        for comprimir in (False, True):
+            with self.subTest(comprimir=comprimir):
+                s2 = _vuelta(self.s, serializacion.leer_sistema, comprimir)
+                self.assertEqual(_reporte(s2), _reporte(self.s))
+                p = s2.perfil_tiempos
+                self.assertEqual((p.sec_por_rep, p.descanso_entre_series), (4, 90))
+                self.assertEqual(s2._buscar_rutina("Core").descripcion, "ñandú")
+
+    def test_lo_compartido_sigue_compartido(self):
+        s2 = _vuelta(self.s, serializacion.leer_sistema)
+        piernas = s2._buscar_rutina("Piernas")
+        self.assertIs(s2._buscar_usuario("u1").rutinas[0], piernas)
+        self.assertIs(piernas.ejercicios[1], s2._buscar_ejercicio_catalogo("Plancha"))
+        # Y el sistema cargado se puede seguir editando.
+        s2.eliminar_rutina("Piernas")
+        self.assertEqual(s2._buscar_usuario("u1").rutinas, [])
+
+    def test_archivo_danado(self):
+        f = io.BytesIO()
+        serializacion.escribir(self.s, f)
+        datos = bytearray(f.getvalue())
+        datos[-8] ^= 0xFF
+        with self.assertRaises(ValueError):
+            serializacion.leer_sistema(io.BytesIO(bytes(datos)))
+        with self.assertRaises(ValueError):
+            serializacion.leer_sistema(io.BytesIO(b"XXXX" + bytes(datos[4:])))
+        with self.assertRaises(ValueError):
+            serializacion.leer_sistema(io.BytesIO(bytes(datos[:-20])))
+
+
+class TestSerializacionFuncional(unittest.TestCase):
+    def setUp(self):
+        st = gf.estado_vacio()
+        st = gf.crear_ejercicio(st, "Sentadilla", 10, 3)
+        st = gf.crear_ejercicio(st, "Plancha", 1, 4)
+        st = gf.crear_rutina(st, "Piernas", "d", ["Sentadilla", "Plancha"])
+        st = gf.agregar_usuario(st, "Ana", 30)
+        st = gf.asignar_rutina_a_usuario(st, "Ana", "Piernas")
+        # Ana se queda con la copia anterior de la rutina editada.
+        self.st = gf.editar_rutina(st, "Piernas", "Piernas II")
+
+    def test_ida_y_vuelta(self):
+        for comprimir in (False, True):
+            with self.subTest(comprimir=comprimir):
+                st2 = _vuelta(self.st, serializacion.leer_estado, comprimir)
+                self.assertEqual(_reporte(st2), _reporte(self.st))
+                ana, ana2 = self.st["usuarios"][0], st2["usuarios"][0]
+                self.assertEqual(ana2["total_seg"], ana["total_seg"])
+                self.assertEqual([r["nombre"] for r in ana2["rutinas"]], ["Piernas"])
+                self.assertIsNotNone(gf.buscar_rutina(st2, "Piernas II"))
+                self.assertIsNone(gf.buscar_rutina(st2, "Piernas"))
+
+    def test_estado_funcional_a_sistema(self):
+        # La copia que solo vive en el usuario no tiene par en el sistema.
+        s = _vuelta(self.st, serializacion.leer_sistema)
+        self.assertEqual(s._buscar_usuario("Ana").rutinas, [])
+        self.assertEqual([r.nombre for r in s.rutinas], ["Piernas II"])
+
+    def test_sistema_a_estado_funcional(self):
+        s = SistemaGestion()
+        with redirect_stdout(io.StringIO()):
+            s.crear_ejercicio("a", 10, 3)
+        s.crear_rutina("R", "d", ["a"])
+        s.agregar_usuario("ana", 20)
+        s.asignar_rutina_a_usuario("ana", "R")
+        st = _vuelta(s, serializacion.leer_estado)
+        self.assertEqual(_reporte(st), _reporte(s))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+import Gestion_funcional as gf
+from Gestion_POO import SistemaGestion
+from similitud import (
+    IndiceMinHash,
+    SimilitudRutinas,
+    SimilitudRutinasFuncional,
+    claves_de,
+    jaccard,
+)
+
+
+class TestIndiceMinHash(unittest.TestCase):
+    def setUp(self):
+        self.indice = IndiceMinHash()
+        azar = random.Random(42)
+        universo = [f"e{i}" for i in range(200)]
+        self.conjuntos = {}
+        for i in range(300):
+            c = frozenset(azar.sample(universo, 10))
+            self.conjuntos[i] = c
+            self.indice.agregar(i, c)
+        base = frozenset(f"e{i}" for i in range(10))
+        # Parecidos a `base` con Jaccard 1, 9/11 y 8/12.
+        self.indice.agregar("igual", base)
+        self.indice.agregar("casi", (base - {"e0"}) | {"x0"})
+        self.indice.agregar("medio", (base - {"e0", "e1"}) | {"x0", "x1"})
+        self.base = base
+
+    def test_top_k_ordenado_por_jaccard_exacto(self):
+        pares = self.indice.similares(self.base, k=2)
+        self.assertEqual([c for c, _ in pares], ["igual", "casi"])
+        self.assertEqual(pares[1][1], jaccard(self.base, self.indice.conjunto("casi")))
+        pares = self.indice.similares(self.base, k=10)
+        sims = [s for _, s in pares]
+        self.assertEqual(sims, sorted(sims, reverse=True))
+        self.assertLessEqual(len(pares), 10)
+        pares = self.indice.similares(self.base, 1, excluir="igual")
+        self.assertEqual([c for c, _ in pares], ["casi"])
+
+    def test_firma_estima_jaccard(self):
+        a = self.indice.firma(self.base)
+        b = self.indice.firma(self.indice.conjunto("medio"))
+        iguales = sum(x == y for x, y in zip(a, b)) / len(a)
+        self.assertAlmostEqual(iguales, 8 / 12, delta=0.2)
+
+    def test_quitar_y_reemplazar(self):
+        self.assertTrue(self.indice.quitar("igual"))
+        self.assertFalse(self.indice.quitar("igual"))
+        self.assertNotIn("igual", self.indice)
+        self.indice.agregar("casi", frozenset({"otro"}))
+        self.assertEqual(self.indice.similares(self.base, k=1)[0][0], "medio")
+        self.assertEqual(len(self.indice), 302)
+        with self.assertRaises(ValueError):
+            self.indice.similares(self.base, k=0)
+
+
+class TestSimilitudRutinas(unittest.TestCase):
+    def setUp(self):
+        self.s = SistemaGestion()
+        with redirect_stdout(io.StringIO()):
+            for n in "abcdefg":
+                self.s.crear_ejercicio(n, 10, 3)
+        self.s.crear_rutina("R1", "d", ["a", "b", "c", "d"])
+        self.s.crear_rutina("R2", "d", ["a", "b", "c", "e"])
+        self.s.crear_rutina("R3", "d", ["e", "f", "g"])
+        self.sim = SimilitudRutinas(self.s)
+
+    def _nombres(self, nombre, k=5):
+        return [(r.nombre, round(x, 3)) for r, x in self.sim.similares_a_rutina(nombre, k)]
+
+    def test_sigue_los_cambios(self):
+        self.assertEqual(self._nombres("R1", 1), [("R2", 0.6)])
+        self.s.rutina_eliminar_ejercicio("R2", "e")
+        self.assertEqual(self._nombres("R1", 1), [("R2", 0.75)])
+        self.s.editar_rutina("R2", "Otra")
+        self.assertEqual(self._nombres("R1", 1), [("Otra", 0.75)])
+        self.s.eliminar_rutina("Otra")
+        self.assertNotIn("Otra", [n for n, _ in self._nombres("R1")])
+        self.s.crear_rutina("R4", "d", ["D", "C", "B", "A"])
+        self.assertEqual(self._nombres("R1", 1), [("R4", 1.0)])
+
+    def test_transaccion_revertida_y_cambios_por_fuera(self):
+        antes = self._nombres("R1")
+        with self.assertRaises(RuntimeError):
+            with self.s.transaccion():
+                self.s.rutina_agregar_ejercicio("R2", "d")
+                raise RuntimeError
+        self.assertEqual(self._nombres("R1"), antes)
+        # Un cambio hecho por fuera de la API se ve tras `_marcar_cambio()`.
+        r3 = self.s._buscar_rutina("R3")
+        for n in "efg":
+            r3.ejercicios.quitar(self.s._buscar_ejercicio_catalogo(n))
+        for n in "abcd":
+            r3.ejercicios.append(self.s._buscar_ejercicio_catalogo(n))
+        self.s._marcar_cambio()
+        self.assertEqual(self._nombres("R1", 1), [("R3", 1.0)])
+
+    def test_por_ejercicios(self):
+        pares = self.sim.similares_a_ejercicios(["e", "F", "g"], k=1)
+        self.assertEqual([(r.nombre, x) for r, x in pares], [("R3", 1.0)])
+
+
+class TestSimilitudFuncional(unittest.TestCase):
+    def test_sigue_cada_estado(self):
+        st = gf.estado_vacio()
+        for n in "abcde":
+            st = gf.crear_ejercicio(st, n, 10, 3)
+        st = gf.crear_rutina(st, "R1", "d", ["a", "b", "c"])
+        st = gf.crear_rutina(st, "R2", "d", ["a", "b", "d"])
+        sim = SimilitudRutinasFuncional(st)
+        pares = sim.similares_a_rutina(st, "R1")
+        self.assertEqual([(r["nombre"], x) for r, x in pares], [("R2", 0.5)])
+        st2 = gf.rutina_eliminar_ejercicio_st(st, "R2", "d")
+        self.assertEqual(
+            [(r["nombre"], round(x, 3)) for r, x in sim.similares_a_rutina(st2, "R1")],
+            [("R2", 0.667)],
+        )
+        st3 = gf.eliminar_rutina(st2, "R2")
+        self.assertEqual(sim.similares_a_rutina(st3, "R1"), [])
+        # Volver a un estado anterior también funciona.
+        self.assertEqual(len(sim.similares_a_ejercicios(st, ["a", "b", "d"], k=1)), 1)
+        self.assertEqual(claves_de(["A ", "b"]), frozenset({"a", "b"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
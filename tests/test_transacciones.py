@@ -0,0 +1,132 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import Gestion_funcional as gf
+from Gestion_POO import SistemaGestion
+
+
+def _estado(s: SistemaGestion):
+    return (
+        [(u.nombre, u.edad, [r.nombre for r in u.rutinas]) for u in s.usuarios],
+        [(e.nombre, e.repeticiones, e.series, e.sec_por_rep) for e in s.ejercicios_catalogo],
+        [
+            (r.nombre, r.descripcion, [(e.nombre, e.repeticiones, e.series) for e in r.ejercicios])
+            for r in s.rutinas
+        ],
+        sorted(s.idx_usuarios),
+        sorted(s.idx_ejercicios),
+        sorted(s.idx_rutinas),
+        s.perfil_tiempos,
+    )
+
+
+class TestTransaccion(unittest.TestCase):
+    def setUp(self):
+        self.s = SistemaGestion()
+        with redirect_stdout(io.StringIO()):
+            for i in range(20):
+                self.s.crear_ejercicio(f"e{i}", 10, 3)
+        for i in range(15):
+            self.s.crear_rutina(f"r{i}", "d", [f"e{i}", f"e{i + 1}"])
+        for i in range(20):
+            self.s.agregar_usuario(f"u{i}", 20)
+            self.s.asignar_rutina_a_usuario(f"u{i}", f"r{i % 15}")
+        for i in range(5):
+            self.s.eliminar_usuario(f"u{i}")
+
+    def test_revierte_cada_tipo_de_operacion(self):
+        s = self.s
+        operaciones = [
+            lambda: s.agregar_usuario("nuevo", 30),
+            lambda: s.renombrar_usuario("u10", "x10"),
+            lambda: s.cambiar_edad_usuario("u11", 50),
+            lambda: s.eliminar_usuario("u12"),
+            lambda: s.crear_ejercicio("zz", 5, 5),
+            lambda: s.eliminar_ejercicio("e5"),
+            lambda: s.renombrar_ejercicio("e6", "E6b"),
+            lambda: s.actualizar_ejercicio("e7", 20, 4),
+            lambda: s.aplicar_perfil_tiempos(6, 40, True),
+            lambda: s.crear_rutina("rz", "d", ["e1"]),
+            lambda: s.editar_rutina("r3", "R3b", "nd"),
+            lambda: s.eliminar_rutina("r4"),
+            lambda: s.rutina_agregar_ejercicio("r9", "e15"),
+            lambda: s.rutina_eliminar_ejercicio("r10", "e10"),
+            lambda: s.rutina_actualizar_ejercicio("r11", "e11", 7, 7),
+            lambda: s.asignar_rutina_a_usuario("u14", "r2"),
+        ]
+        antes = _estado(s)
+        duracion = s.resumenes.buscar("u13").total_min
+        with redirect_stdout(io.StringIO()):
+            for i in range(len(operaciones)):
+                with self.subTest(hasta=i):
+                    with self.assertRaises(RuntimeError):
+                        with s.transaccion():
+                            for op in operaciones[: i + 1]:
+                                op()
+                            raise RuntimeError
+                    self.assertEqual(_estado(s), antes)
+        self.assertEqual(s.resumenes.buscar("u13").total_min, duracion)
+
+    def test_anidadas(self):
+        s = self.s
+        with s.transaccion():
+            s.agregar_usuario("a1", 20)
+            with self.assertRaises(RuntimeError):
+                with s.transaccion():
+                    s.cambiar_edad_usuario("a1", 40)
+                    s.eliminar_usuario("u13")
+                    raise RuntimeError
+            s.cambiar_edad_usuario("a1", 41)
+        self.assertEqual(s._buscar_usuario("a1").edad, 41)
+        self.assertIsNotNone(s._buscar_usuario("u13"))
+
+        antes = _estado(s)
+        with self.assertRaises(RuntimeError):
+            with s.transaccion():
+                with s.transaccion():
+                    s.eliminar_usuario("u14")
+                    s.cambiar_edad_usuario("a1", 60)
+                raise RuntimeError
+        self.assertEqual(_estado(s), antes)
+
+    def test_eventos_solo_al_confirmar(self):
+        recibidos = []
+        self.s.eventos.suscribir(
+            lambda lote: recibidos.append([e.tipo for e in lote]), por_lotes=True
+        )
+        with self.assertRaises(RuntimeError):
+            with self.s.transaccion():
+                self.s.agregar_usuario("x", 20)
+                raise RuntimeError
+        self.assertEqual(recibidos, [])
+        with self.s.transaccion():
+            self.s.agregar_usuario("x", 20)
+            self.s.cambiar_edad_usuario("x", 21)
+        self.assertEqual(recibidos, [["usuario_agregado", "usuario_edad_cambiada"]])
+
+    def test_ejecutar_lote(self):
+        antes = _estado(self.s)
+        with self.assertRaisesRegex(ValueError, r"Operación 2 \(agregar_usuario\).*Se revirtió"):
+            self.s.ejecutar_lote(
+                [(self.s.agregar_usuario, ("y", 20)), (self.s.agregar_usuario, ("y", 30))]
+            )
+        self.assertEqual(_estado(self.s), antes)
+
+
+class TestLoteFuncional(unittest.TestCase):
+    def test_estado_original_intacto(self):
+        st = gf.agregar_usuario(gf.estado_vacio(), "ana", 30)
+        with self.assertRaisesRegex(ValueError, r"Operación 2 \(agregar_usuario\)"):
+            gf.ejecutar_lote(
+                st, [(gf.agregar_usuario, "bea", 20), (gf.agregar_usuario, "ana", 20)]
+            )
+        self.assertEqual([u["nombre"] for u in st["usuarios"]], ["ana"])
+        st2 = gf.ejecutar_lote(
+            st, [(gf.agregar_usuario, "bea", 20), (gf.cambiar_edad_usuario, "bea", 21)]
+        )
+        self.assertEqual(gf.buscar_usuario(st2, "bea")["edad"], 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
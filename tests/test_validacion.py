@@ -0,0 +1,95 @@
+import random
+import unittest
+
+import Gestion_funcional as gf
+import validacion
+from Gestion_POO import Ejercicio, Usuario
+
+_EDAD_ENTERA = "La edad debe ser un número entero."
+_EDAD_MINIMA = "La edad debe ser un número mayor o igual a 16 años."
+_NOMBRE_VACIO = "El nombre del usuario no puede estar vacío."
+
+
+class TestValidador(unittest.TestCase):
+    def test_un_registro(self):
+        v = validacion.USUARIO
+        v.validar({"nombre": "ana", "edad": 30})
+        with self.assertRaisesRegex(ValueError, _NOMBRE_VACIO):
+            v.validar({"nombre": " ", "edad": 3})
+        self.assertEqual(v.errores({"nombre": " ", "edad": 3}), [_NOMBRE_VACIO, _EDAD_MINIMA])
+        # Un tipo equivocado corta las demás reglas del campo.
+        self.assertEqual(v.errores({"nombre": "ana", "edad": "30"}), [_EDAD_ENTERA])
+        self.assertEqual(v.errores({"nombre": "ana", "edad": True}), [_EDAD_ENTERA])
+        self.assertEqual(v.errores({"nombre": "ana"}), ["Falta el campo 'edad'."])
+        self.assertEqual(v.errores({"edad": 10}, parcial=True), [_EDAD_MINIMA])
+        v.validar({}, parcial=True)
+
+    def test_lote(self):
+        filas = [
+            {"nombre": "ana", "edad": 30},
+            {"nombre": "", "edad": 200},
+            {"nombre": "bea", "edad": None},
+            {"nombre": "eva", "edad": 16},
+        ]
+        self.assertEqual(
+            validacion.USUARIO.validar_lote(filas),
+            {
+                1: [_NOMBRE_VACIO, "La edad debe ser menor o igual a 100 años."],
+                2: [_EDAD_ENTERA],
+            },
+        )
+        self.assertEqual(validacion.USUARIO.validar_lote([]), {})
+
+    def test_columnas_igual_que_lote(self):
+        azar = random.Random(50)
+        valores = {
+            "nombre": ["a", " ", "", None, 3, "Sentadilla"],
+            "repeticiones": [1, 0, 100, 101, -5, "10", 2.5, True, None],
+            "series": [1, 3, 0, 100, 101, "x"],
+            "sec_por_rep": [1, 0, 3, "3"],
+            "descanso_entre_series": [0, -1, 60, None],
+        }
+        for _ in range(20):
+            n = azar.randint(0, 40)
+            campos = [c for c in valores if azar.random() < 0.9]
+            filas = [{c: azar.choice(valores[c]) for c in campos} for _ in range(n)]
+            columnas = {c: [f[c] for f in filas] for c in campos}
+            for parcial in (False, True):
+                with self.subTest(campos=campos, parcial=parcial):
+                    self.assertEqual(
+                        validacion.EJERCICIO.validar_columnas(columnas, parcial),
+                        validacion.EJERCICIO.validar_lote(filas, parcial),
+                    )
+
+    def test_columnas_de_distinto_largo(self):
+        with self.assertRaises(ValueError):
+            validacion.USUARIO.validar_columnas({"nombre": ["a", "b"], "edad": [20]})
+        self.assertEqual(validacion.USUARIO.validar_columnas({}, parcial=True), {})
+
+    def test_rutina_y_perfil(self):
+        self.assertEqual(
+            validacion.RUTINA.errores({"nombre": "R", "descripcion": "d", "ejercicios": 5}),
+            ["Una rutina debe tener al menos un ejercicio."],
+        )
+        self.assertEqual(
+            validacion.PERFIL.validar_columnas(
+                {"sec_por_rep": [3, 0], "descanso_entre_series": [60, 60]}
+            ),
+            {1: ["Los segundos por repetición deben ser mayores a 0."]},
+        )
+
+    def test_misma_regla_en_ambas_implementaciones(self):
+        for nombre, edad, mensaje in (("ana", 10, _EDAD_MINIMA), (" ", 20, _NOMBRE_VACIO)):
+            with self.subTest(nombre=nombre, edad=edad):
+                with self.assertRaisesRegex(ValueError, mensaje):
+                    Usuario(nombre, edad)
+                with self.assertRaisesRegex(ValueError, mensaje):
+                    gf.mk_usuario(nombre, edad)
+        with self.assertRaisesRegex(ValueError, "mayores a 0"):
+            Ejercicio("a", 0, 3)
+        with self.assertRaisesRegex(ValueError, "mayores a 0"):
+            gf.mk_ejercicio("a", 0, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+"""
+Reglas de validación de ejercicios, usuarios, rutinas y perfil de tiempos.
+
+Las reglas viven en una sola tabla (`REGLAS`) que ambas implementaciones
+comparten: cada una dice qué campo mira, qué prueba le aplica y con qué
+mensaje falla. Al importar el módulo la tabla se compila en un `Validador`
+por entidad, que guarda las pruebas ya resueltas a funciones, en el orden
+de la tabla.
+
+Un validador se usa de dos maneras:
+
+- `validar(registro)` revisa un registro (dict, o `vars()` de un objeto de
+  Gestion_POO) y lanza `ValueError` con el primer error, igual que antes
+  lo hacían los `_validar` escritos a mano.
+- `validar_lote(registros)` y `validar_columnas(columnas)` revisan muchos a
+  la vez (cargas masivas, peticiones de una API) y devuelven todos los
+  errores de cada fila que falló, sin detenerse en el primero.
+
+Si un campo no tiene el tipo esperado, o falta, se informa eso y ya no se
+le aplican las demás reglas. Con `parcial=True` los campos ausentes se
+omiten, para validar solo lo que cambia en una actualización.
+"""
+
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# Pruebas disponibles para una regla.
+TEXTO = "texto"  # texto no vacío (tras quitar espacios)
+ENTERO = "entero"  # número entero (no bool)
+MINIMO = "minimo"  # valor >= limite
+MAXIMO = "maximo"  # valor <= limite
+NO_VACIA = "no_vacia"  # colección con al menos un elemento
+
+
+class Regla(NamedTuple):
+    campo: str
+    prueba: str
+    limite: Optional[int]
+    mensaje: str
+
+
+REGLAS: Dict[str, Tuple[Regla, ...]] = {
+    "ejercicio": (
+        Regla("nombre", TEXTO, None, "El nombre del ejercicio no puede estar vacío."),
+        Regla("repeticiones", ENTERO, None, "Las repeticiones deben ser un número entero."),
+        Regla("repeticiones", MINIMO, 1, "Las repeticiones deben ser mayores a 0."),
+        Regla("repeticiones", MAXIMO, 100, "Las repeticiones no pueden ser mayores a 100."),
+        Regla("series", ENTERO, None, "Las series deben ser un número entero."),
+        Regla("series", MINIMO, 1, "Las series deben ser mayores a 0."),
+        Regla("series", MAXIMO, 100, "Las series no pueden ser mayores a 100."),
+        Regla("sec_por_rep", ENTERO, None, "Los segundos por repetición deben ser un número entero."),
+        Regla("sec_por_rep", MINIMO, 1, "Los segundos por repetición deben ser mayores a 0."),
+        Regla("descanso_entre_series", ENTERO, None, "El descanso entre series debe ser un número entero."),
+        Regla("descanso_entre_series", MINIMO, 0, "El descanso entre series no puede ser negativo."),
+    ),
+    "usuario": (
+        Regla("nombre", TEXTO, None, "El nombre del usuario no puede estar vacío."),
+        Regla("edad", ENTERO, None, "La edad debe ser un número entero."),
+        Regla("edad", MINIMO, 16, "La edad debe ser un número mayor o igual a 16 años."),
+        Regla("edad", MAXIMO, 100, "La edad debe ser menor o igual a 100 años."),
+    ),
+    "rutina": (
+        Regla("nombre", TEXTO, None, "El nombre de la rutina no puede estar vacío."),
+        Regla("descripcion", TEXTO, None, "La descripción de la rutina no puede estar vacía."),
+        Regla("ejercicios", NO_VACIA, None, "Una rutina debe tener al menos un ejercicio."),
+    ),
+    "perfil": (
+        Regla("sec_por_rep", ENTERO, None, "Los segundos por repetición deben ser un número entero."),
+        Regla("sec_por_rep", MINIMO, 1, "Los segundos por repetición deben ser mayores a 0."),
+        Regla("descanso_entre_series", ENTERO, None, "El descanso entre series debe ser un número entero."),
+        Regla("descanso_entre_series", MINIMO, 0, "El descanso entre series no puede ser negativo."),
+    ),
+}
+
+# Pruebas que, si fallan, dejan al campo sin revisar el resto de sus reglas
+# (comparar un texto con un número no tiene sentido).
+_CORTAN = frozenset((TEXTO, ENTERO))
+
+
+def _es_texto(v) -> bool:
+    return isinstance(v, str) and v.strip() != ""
+
+
+def _es_entero(v) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _no_vacia(v) -> bool:
+    try:
+        return len(v) > 0
+    except TypeError:
+        return False
+
+
+def _compilar(regla: Regla) -> Callable[[object], bool]:
+    if regla.prueba == TEXTO:
+        return _es_texto
+    if regla.prueba == ENTERO:
+        return _es_entero
+    if regla.prueba == NO_VACIA:
+        return _no_vacia
+    limite = regla.limite
+    if regla.prueba == MINIMO:
+        return lambda v: v >= limite
+    if regla.prueba == MAXIMO:
+        return lambda v: v <= limite
+    raise ValueError(f"Prueba de validación desconocida: {regla.prueba}.")
+
+
+def _falta(campo: str) -> str:
+    return f"Falta el campo '{campo}'."
+
+
+class Validador:
+    """Reglas de una entidad compiladas a (campo, prueba, mensaje, corta)."""
+
+    def __init__(self, reglas: Iterable[Regla]):
+        self.reglas: Tuple[Regla, ...] = tuple(reglas)
+        self._pruebas: Tuple[Tuple[str, Callable[[object], bool], str, bool], ...] = tuple(
+            (r.campo, _compilar(r), r.mensaje, r.prueba in _CORTAN) for r in self.reglas
+        )
+        campos: List[str] = []
+        for r in self.reglas:
+            if r.campo not in campos:
+                campos.append(r.campo)
+        self.campos: Tuple[str, ...] = tuple(campos)
+
+    # --------- Un registro ---------
+    def validar(self, registro: Mapping[str, object], parcial: bool = False) -> None:
+        """Lanza `ValueError` con el primer error del registro."""
+        for campo, prueba, mensaje, _ in self._pruebas:
+            if campo not in registro:
+                if parcial:
+                    continue
+                raise ValueError(_falta(campo))
+            if not prueba(registro[campo]):
+                raise ValueError(mensaje)
+
+    def errores(self, registro: Mapping[str, object], parcial: bool = False) -> List[str]:
+        """Todos los errores del registro, en el orden de la tabla."""
+        salida: List[str] = []
+        cortados = set()
+        for campo, prueba, mensaje, corta in self._pruebas:
+            if campo in cortados:
+                continue
+            if campo not in registro:
+                if not parcial:
+                    salida.append(_falta(campo))
+                cortados.add(campo)
+                continue
+            if not prueba(registro[campo]):
+                salida.append(mensaje)
+                if corta:
+                    cortados.add(campo)
+        return salida
+
+    # --------- Muchos registros ---------
+    def validar_lote(
+        self, registros: Iterable[Mapping[str, object]], parcial: bool = False
+    ) -> Dict[int, List[str]]:
+        """{fila: errores} de las filas que fallaron (las válidas no aparecen)."""
+        salida: Dict[int, List[str]] = {}
+        for i, registro in enumerate(registros):
+            errs = self.errores(registro, parcial)
+            if errs:
+                salida[i] = errs
+        return salida
+
+    def validar_columnas(
+        self, columnas: Mapping[str, Sequence[object]], parcial: bool = False
+    ) -> Dict[int, List[str]]:
+        """
+        Igual que `validar_lote`, pero con los datos por columnas. Cada regla
+        recorre su columna entera de una vez; los errores de cada fila quedan
+        en el orden de la tabla.
+        """
+        largos = {len(col) for col in columnas.values()}
+        if len(largos) > 1:
+            raise ValueError("Todas las columnas deben tener el mismo largo.")
+        n = largos.pop() if largos else 0
+        por_fila: List[Optional[List[str]]] = [None] * n
+
+        def anotar(filas: Iterable[int], mensaje: str) -> None:
+            for i in filas:
+                if por_fila[i] is None:
+                    por_fila[i] = [mensaje]
+                else:
+                    por_fila[i].append(mensaje)
+
+        cortadas: Dict[str, set] = {}
+        for campo, prueba, mensaje, corta in self._pruebas:
+            col = columnas.get(campo)
+            if col is None:
+                if not parcial and campo not in cortadas:
+                    anotar(range(n), _falta(campo))
+                cortadas[campo] = set(range(n))
+                continue
+            fuera = cortadas.get(campo)
+            if fuera:
+                malas = [i for i, v in enumerate(col) if i not in fuera and not prueba(v)]
+            else:
+                malas = [i for i, v in enumerate(col) if not prueba(v)]
+            anotar(malas, mensaje)
+            if corta and malas:
+                cortadas.setdefault(campo, set()).update(malas)
+        return {i: errs for i, errs in enumerate(por_fila) if errs is not None}
+
+
+VALIDADORES: Dict[str, Validador] = {
+    entidad: Validador(reglas) for entidad, reglas in REGLAS.items()
+}
+EJERCICIO = VALIDADORES["ejercicio"]
+USUARIO = VALIDADORES["usuario"]
+RUTINA = VALIDADORES["rutina"]
+PERFIL = VALIDADORES["perfil"]